@@ -1,12 +1,10 @@
-from .base import BaseLoRa
-import spidev
-import RPi.GPIO
+from .base import BaseLoRa, PacketInfo, RxPacket
+from . import rxdutycycle
+from .transport import BaseTransport, SpiGpioTransport
+import threading
 import time
-
-spi = spidev.SpiDev()
-gpio = RPi.GPIO
-gpio.setmode(RPi.GPIO.BCM)
-gpio.setwarnings(False)
+from typing import Optional
+from collections import deque
 
 class SX126x(BaseLoRa) :
     """Class for SX1261/62/68 and LLCC68 LoRa chipsets from Semtech"""
@@ -261,8 +259,8 @@ class SX126x(BaseLoRa) :
     _wake = -1
     _busyTimeout = 5000
     _spiSpeed = 7800000
-    _txState = gpio.LOW
-    _rxState = gpio.LOW
+    _txState = BaseTransport.LOW
+    _rxState = BaseTransport.LOW
 
     # LoRa setting
     _dio = 1
@@ -283,11 +281,33 @@ class SX126x(BaseLoRa) :
     _statusWait = STATUS_DEFAULT
     _statusIrq = STATUS_DEFAULT
     _transmitTime = 0.0
+    _pollInterval = 0.001
+    _packetType = None
+    # interrupt handler attached to IRQ pin and prepared transmit which last configured the chip
+    _irqHandler = None
+    _txPrepared = None
+    # image calibration band currently calibrated and precomputed channel table
+    _calibratedBand = None
+    _channelTable = None
+    # descriptors of packets resident in data buffer and packets already read to host in ring buffer receive mode
+    _rxRing = None
+    _ringDrained = None
 
     # callback functions
     _onTransmit = None
     _onReceive = None
 
+    def __init__(self, transport: BaseTransport = None) :
+
+        # use spidev and RPi.GPIO when no SPI and GPIO transport supplied
+        if transport is None : transport = SpiGpioTransport()
+        self._transport = transport
+        # preallocated command buffers for data buffer write and read
+        self._writeBufferCmd = bytearray(258)
+        self._readBufferCmd = bytearray(259)
+        # set by interrupt handlers after IRQ status stored
+        self._irqEvent = threading.Event()
+
 ### COMMON OPERATIONAL METHODS ###
 
     def begin(self, bus: int = _bus, cs: int = _cs, reset: int = _reset, busy: int = _busy, irq: int = _irq, txen: int = _txen, rxen: int = _rxen, wake: int = _wake) :
@@ -309,30 +329,35 @@ class SX126x(BaseLoRa) :
     def end(self) :
 
         self.sleep(self.SLEEP_COLD_START)
-        spi.close()
-        gpio.cleanup()
+        self._transport.close()
+        self._transport.cleanup()
+        self._irqHandler = None
 
     def reset(self) -> bool :
 
         # put reset pin to low then wait busy pin to low
-        gpio.output(self._reset, gpio.LOW)
+        self._transport.output(self._reset, self._transport.LOW)
         time.sleep(0.001)
-        gpio.output(self._reset, gpio.HIGH)
+        self._transport.output(self._reset, self._transport.HIGH)
+        self._invalidateRegisterCache()
+        self._txPrepared = None
         return not self.busyCheck()
 
     def sleep(self, option = SLEEP_WARM_START) :
 
         # put device in sleep mode, wait for 500 us to enter sleep mode
+        # some registers are not retained even on warm start so register cache always invalidated
         self.standby()
         self.setSleep(option)
+        self._invalidateRegisterCache()
         time.sleep(0.0005)
 
     def wake(self) :
 
         # wake device by set wake pin (cs pin) to low before spi transaction and put device in standby mode
         if (self._wake != -1) :
-            gpio.setup(self._wake, gpio.OUT)
-            gpio.output(self._wake, gpio.LOW)
+            self._transport.setup(self._wake, self._transport.OUT)
+            self._transport.output(self._wake, self._transport.LOW)
             time.sleep(0.0005)
         self.setStandby(self.STANDBY_RC)
         self._fixResistanceAntenna()
@@ -345,7 +370,7 @@ class SX126x(BaseLoRa) :
 
         # wait for busy pin to LOW or timeout reached
         t = time.time()
-        while gpio.input(self._busy) == gpio.HIGH :
+        while self._transport.input(self._busy) == self._transport.HIGH :
             if (time.time() - t) > (timeout / 1000) : return True
         return False
 
@@ -359,16 +384,19 @@ class SX126x(BaseLoRa) :
 
 ### HARDWARE CONFIGURATION METHODS ###
 
+    def setTransport(self, transport: BaseTransport) :
+
+        # replace SPI and GPIO transport, must be called before begin() method
+        self._transport = transport
+        self._irqHandler = None
+
     def setSpi(self, bus: int, cs: int, speed: int = _spiSpeed) :
 
         self._bus = bus
         self._cs = cs
         self._spiSpeed = speed
         # open spi line and set bus id, chip select, and spi speed
-        spi.open(bus, cs)
-        spi.max_speed_hz = speed
-        spi.lsbfirst = False
-        spi.mode = 0
+        self._transport.open(bus, cs, speed)
 
     def setPins(self, reset: int, busy: int, irq: int = -1, txen: int = -1, rxen: int = -1, wake: int = -1) :
 
@@ -378,13 +406,14 @@ class SX126x(BaseLoRa) :
         self._txen = txen
         self._rxen = rxen
         self._wake = wake
+        self._irqHandler = None
         # set pins as input or output
-        gpio.setup(reset, gpio.OUT)
-        gpio.setup(busy, gpio.IN)
-        gpio.setup(self._cs_define, gpio.OUT)
-        if irq != -1 : gpio.setup(irq, gpio.IN)
-        if txen != -1 : gpio.setup(txen, gpio.OUT)
-        # if rxen != -1 : gpio.setup(rxen, gpio.OUT)
+        self._transport.setup(reset, self._transport.OUT)
+        self._transport.setup(busy, self._transport.IN)
+        self._transport.setup(self._cs_define, self._transport.OUT)
+        if irq != -1 : self._transport.setup(irq, self._transport.IN)
+        if txen != -1 : self._transport.setup(txen, self._transport.OUT)
+        # if rxen != -1 : self._transport.setup(rxen, self._transport.OUT)
 
     def setRfIrqPin(self, dioPinSelect: int) :
 
@@ -428,27 +457,46 @@ class SX126x(BaseLoRa) :
 
     def setFrequency(self, frequency: int) :
 
-        # perform image calibration before set frequency
-        if frequency < 446000000 :
-            calFreqMin = self.CAL_IMG_430
-            calFreqMax = self.CAL_IMG_440
-        elif frequency < 734000000 :
-            calFreqMin = self.CAL_IMG_470
-            calFreqMax = self.CAL_IMG_510
-        elif frequency < 828000000 :
-            calFreqMin = self.CAL_IMG_779
-            calFreqMax = self.CAL_IMG_787
-        elif frequency < 877000000 :
-            calFreqMin = self.CAL_IMG_863
-            calFreqMax = self.CAL_IMG_870
-        else :
-            calFreqMin = self.CAL_IMG_902
-            calFreqMax = self.CAL_IMG_928
-        self.calibrateImage(calFreqMin, calFreqMax)
+        # perform image calibration before set frequency, skipped when band already calibrated
+        band = self._calibrationBand(frequency)
+        if band != self._calibratedBand :
+            self.calibrateImage(band[0], band[1])
 
         # calculate frequency and set frequency setting
-        rfFreq = int(frequency * 33554432 / 32000000)
-        self.setRfFrequency(rfFreq)
+        self.setRfFrequency(self._frequencyWord(frequency))
+
+    def setChannelTable(self, frequencies: list) :
+
+        # precompute SetRfFrequency command and calibration band of every channel frequency in Hz
+        table = []
+        for frequency in frequencies :
+            rfFreq = self._frequencyWord(frequency)
+            command = bytes((0x86, (rfFreq >> 24) & 0xFF, (rfFreq >> 16) & 0xFF, (rfFreq >> 8) & 0xFF, rfFreq & 0xFF))
+            table.append((command, self._calibrationBand(frequency)))
+        self._channelTable = table
+
+    def setChannel(self, channel: int) -> bool :
+
+        # set frequency to channel index of table set by setChannelTable() with single command
+        # image calibration only performed when channel in different band from calibrated band
+        (command, band) = self._channelTable[channel]
+        if band != self._calibratedBand :
+            self.calibrateImage(band[0], band[1])
+        return self._writeCommand(command)
+
+    def _calibrationBand(self, frequency: int) -> tuple :
+
+        # image calibration frequency pair of band containing the frequency
+        if frequency < 446000000 : return (self.CAL_IMG_430, self.CAL_IMG_440)
+        if frequency < 734000000 : return (self.CAL_IMG_470, self.CAL_IMG_510)
+        if frequency < 828000000 : return (self.CAL_IMG_779, self.CAL_IMG_787)
+        if frequency < 877000000 : return (self.CAL_IMG_863, self.CAL_IMG_870)
+        return (self.CAL_IMG_902, self.CAL_IMG_928)
+
+    def _frequencyWord(self, frequency: int) -> int :
+
+        # RF frequency setting in PLL step of 32 MHz / 2^25
+        return int(frequency * 33554432 / 32000000)
 
     def setTxPower(self, txPower: int, version = TX_POWER_SX1262) :
 
@@ -507,10 +555,10 @@ class SX126x(BaseLoRa) :
         if rxGain == self.RX_GAIN_BOOSTED :
             gain = self.BOOSTED_GAIN
             # set certain register to retain configuration after wake from sleep mode
-            self.writeRegister(self.REG_RX_GAIN, (gain,), 1)
-            self.writeRegister(0x029F, (0x01, 0x08, 0xAC), 3)
+            if self._writeRegisterCached(self.REG_RX_GAIN, gain) :
+                self.writeRegister(0x029F, (0x01, 0x08, 0xAC), 3)
         else :
-            self.writeRegister(self.REG_RX_GAIN, (gain,), 1)
+            self._writeRegisterCached(self.REG_RX_GAIN, gain)
 
     def setLoRaModulation(self, sf: int, bw: int, cr: int, ldro: bool = False) :
 
@@ -645,8 +693,8 @@ class SX126x(BaseLoRa) :
 
         # save current txen pin state and set txen pin to LOW
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.LOW)
+            self._txState = self._transport.input(self._txen)
+            self._transport.output(self._txen, self._transport.LOW)
         self._fixLoRaBw500(self._bw)
 
     def endPacket(self, timeout: int = TX_SINGLE) -> bool :
@@ -662,47 +710,117 @@ class SX126x(BaseLoRa) :
         # set status to TX wait
         self._statusWait = self.STATUS_TX_WAIT
         self._statusIrq = 0x0000
+        self._irqEvent.clear()
         # calculate TX timeout config
         txTimeout = timeout << 6
         if txTimeout > 0x00FFFFFF : txTimeout = self.TX_SINGLE
 
+        # attach TX interrupt handler before entering TX mode so short transmission is not missed
+        if self._irq != -1 :
+            self._attachInterrupt(self._interruptTx)
+
         # set device to transmit mode with configured timeout or single operation
-        self.setTx(txTimeout)
         self._transmitTime = time.time()
-
-        # set operation status to wait and attach TX interrupt handler
-        if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptTx, bouncetime=10)
+        self.setTx(txTimeout)
         return True
 
     def write(self, data, length: int = 0) :
 
         # prepare data and data length to be transmitted
-        if type(data) is list or type(data) is tuple :
+        if type(data) is bytes or type(data) is bytearray or type(data) is memoryview :
+            data = memoryview(data).cast('B')
+            if length == 0 or length > len(data) : length = len(data)
+            self._writeBufferBytes(self._bufferIndex, data[:length])
+        elif type(data) is list or type(data) is tuple :
             if length == 0 or length > len(data) : length = len(data)
+            self.writeBuffer(self._bufferIndex, data, length)
         elif type(data) is int or type(data) is float :
             length = 1
-            data = (int(data),)
+            self.writeBuffer(self._bufferIndex, (int(data),), length)
         else :
-            raise TypeError("input data must be list, tuple, integer or float")
-        # write data to buffer and update buffer index and payload
-        self.writeBuffer(self._bufferIndex, data, length)
+            raise TypeError("input data must be list, tuple, integer, float, bytes, bytearray or memoryview")
+        # update buffer index and payload
         self._bufferIndex = (self._bufferIndex + length) % 256
         self._payloadTxRx += length
 
     def put(self, data) :
 
-        # prepare bytes or bytearray to be transmitted
-        if type(data) is bytes or type(data) is bytearray :
-            dataList = tuple(data)
-            length = len(dataList)
-        else : raise TypeError("input data must be bytes or bytearray")
+        # prepare bytes, bytearray or memoryview to be transmitted without copying to tuple
+        if type(data) is bytes or type(data) is bytearray or type(data) is memoryview :
+            data = memoryview(data).cast('B')
+            length = len(data)
+        else : raise TypeError("input data must be bytes, bytearray or memoryview")
         # write data to buffer and update buffer index and payload
-        self.writeBuffer(self._bufferIndex, dataList, length)
+        self._writeBufferBytes(self._bufferIndex, data)
         self._bufferIndex = (self._bufferIndex + length) % 256
         self._payloadTxRx += length
 
+    def sendMany(self, payloads, timeout: int = TX_SINGLE) :
+
+        # transmit every bytes-like payload in iterable and return TxReport with status of every packet
+        # next payload is written after current payload in data buffer while current one in the air
+        # packet not started has STATUS_DEFAULT and packet without TX done in time has STATUS_TX_TIMEOUT
+        results = []
+        airtime = 0.0
+        start = time.monotonic()
+        payloads = iter(payloads)
+        data = self._sendManyPayload(next(payloads, None))
+        offset = self._bufferIndex
+        staged = False
+        while data is not None :
+            length = len(data)
+            # set TX base address to payload offset then write payload unless already staged
+            self._bufferIndex = offset
+            self.beginPacket()
+            if staged :
+                self._bufferIndex = (offset + length) % 256
+                self._payloadTxRx = length
+            else :
+                self.put(data)
+            started = self.endPacket(timeout)
+            airtime += self.timeOnAir(length) / 1000
+
+            # fetch and stage next payload when current and next payload fit in data buffer
+            # invalid next payload raised after current packet done so radio not left in TX mode
+            offset = self._bufferIndex
+            staged = False
+            error = None
+            try :
+                data = self._sendManyPayload(next(payloads, None))
+            except ValueError as e :
+                data = None
+                error = e
+            if data is not None :
+                if length + len(data) <= 256 :
+                    self._writeBufferBytes(offset, data)
+                    staged = True
+
+            if not started :
+                results.append(self.STATUS_DEFAULT)
+            elif not self.wait(max(timeout / 1000, self._txWaitTimeout(length))) :
+                # TX done interrupt lost, terminate transmit mode
+                self.standby()
+                results.append(self.STATUS_TX_TIMEOUT)
+            else :
+                results.append(self.status())
+            if error is not None : raise error
+
+        return self._txReport(results, start, airtime)
+
+    def _sendManyPayload(self, data) :
+
+        if data is None : return None
+        data = memoryview(data).cast('B')
+        if len(data) > 255 :
+            raise ValueError("payload length must not exceed 255 bytes")
+        return data
+
+    def prepareTx(self, timeout: int = TX_SINGLE) :
+
+        # precompute command sequences of transmit operation using current radio parameters
+        # for repeated send where only payload changed, TX timeout in ms
+        return PreparedTx(self, timeout)
+
 ### RECEIVE RELATED METHODS ###
 
     def request(self, timeout: int = RX_SINGLE) -> bool :
@@ -716,6 +834,8 @@ class SX126x(BaseLoRa) :
         # set status to RX wait or RX continuous wait
         self._statusWait = self.STATUS_RX_WAIT
         self._statusIrq = 0x0000
+        self._packetInfo = None
+        self._irqEvent.clear()
         # calculate RX timeout config
         rxTimeout = timeout << 6
         if rxTimeout > 0x00FFFFFF : rxTimeout = self.RX_SINGLE
@@ -725,19 +845,18 @@ class SX126x(BaseLoRa) :
 
         # save current txen pin state and set txen pin to high
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.HIGH)
+            self._txState = self._transport.input(self._txen)
+            self._transport.output(self._txen, self._transport.HIGH)
 
-        # set device to receive mode with configured timeout, single, or continuous operation
-        self.setRx(rxTimeout)
-
-        # set operation status to wait and attach RX interrupt handler
+        # attach RX interrupt handler before entering RX mode
         if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
             if timeout == self.RX_CONTINUOUS :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRxContinuous, bouncetime=10)
+                self._attachInterrupt(self._interruptRxContinuous)
             else :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+                self._attachInterrupt(self._interruptRx)
+
+        # set device to receive mode with configured timeout, single, or continuous operation
+        self.setRx(rxTimeout)
         return True
 
     def listen(self, rxPeriod: int, sleepPeriod: int) -> bool :
@@ -751,6 +870,8 @@ class SX126x(BaseLoRa) :
         # set status to RX wait or RX continuous wait
         self._statusWait = self.STATUS_RX_WAIT
         self._statusIrq = 0x0000
+        self._packetInfo = None
+        self._irqEvent.clear()
         # calculate RX period and sleep period config
         rxPeriod = rxPeriod << 6
         sleepPeriod = sleepPeriod << 6
@@ -759,18 +880,57 @@ class SX126x(BaseLoRa) :
 
         # save current txen pin state and set txen pin to high
         if self._txen != -1 :
-            self._txState = gpio.input(self._txen)
-            gpio.output(self._txen, gpio.HIGH)
+            self._txState = self._transport.input(self._txen)
+            self._transport.output(self._txen, self._transport.HIGH)
+
+        # attach RX interrupt handler before entering RX duty cycle mode
+        if self._irq != -1 :
+            self._attachInterrupt(self._interruptRx)
 
         # set device to receive mode with configured receive and sleep period
         self.setRxDutyCycle(rxPeriod, sleepPeriod)
+        return True
+
+    def listenPeriods(self, detectSymbols: int = rxdutycycle.DETECT_SYMBOLS) -> tuple :
+
+        # shortest RX period and longest sleep period in ms for listen() which never miss packet with current preamble length
+        return rxdutycycle.listenPeriods(self._sf, self._bw, self._preambleLength, detectSymbols)
+
+    def requestCad(self, cadSymbolNum: int = CAD_ON_2_SYMB, cadDetPeak: int = 0, cadDetMin: int = 10) -> bool :
 
-        # set operation status to wait and attach RX interrupt handler
+        # skip to start CAD when previous RX operation incomplete
+        if self.getMode() == self.STATUS_MODE_RX : return False
+
+        # clear previous interrupt and set CAD done and CAD detected as interrupt source
+        self._irqSetup(self.IRQ_CAD_DONE | self.IRQ_CAD_DETECTED)
+        # detection peak 0 select SF + 13 for current spreading factor, device go to standby after CAD done
+        if cadDetPeak == 0 : cadDetPeak = self._sf + 13
+        self.setCadParams(cadSymbolNum, cadDetPeak, cadDetMin, self.CAD_EXIT_STDBY, 0)
+
+        # set status to CAD wait
+        self._statusWait = self.STATUS_CAD_WAIT
+        self._statusIrq = 0x0000
+        self._irqEvent.clear()
+
+        # save current txen pin state and set txen pin to high
+        if self._txen != -1 :
+            self._txState = self._transport.input(self._txen)
+            self._transport.output(self._txen, self._transport.HIGH)
+
+        # attach CAD interrupt handler before starting CAD
         if self._irq != -1 :
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+            self._attachInterrupt(self._interruptCad)
+
+        # start channel activity detection on current frequency, check status() after wait() for CAD result
+        self.setCad()
         return True
 
+    def cadScanner(self, frequencies: list, cadSymbolNum: int = CAD_ON_2_SYMB, cadDetPeak: int = 0, cadDetMin: int = 10) :
+
+        # precompute command sequences of channel activity detection on every frequency in Hz
+        # using current modulation parameter, frequency setting changed after scan
+        return CadScanner(self, frequencies, cadSymbolNum, cadDetPeak, cadDetMin)
+
     def available(self) -> int :
 
         # get size of package still available to read
@@ -797,7 +957,7 @@ class SX126x(BaseLoRa) :
     def get(self, length: int = 1) -> bytes :
 
         # read data from buffer and update buffer index and payload
-        buf = self.readBuffer(self._bufferIndex, length)
+        buf = self._readBufferBytes(self._bufferIndex, length)
         self._bufferIndex = (self._bufferIndex + length) % 256
         if self._payloadTxRx > length :
             self._payloadTxRx -= length
@@ -806,6 +966,22 @@ class SX126x(BaseLoRa) :
         # return array of bytes
         return bytes(buf)
 
+    def readinto(self, buf) -> int :
+
+        # fill caller owned bytearray or writable memoryview with available payload
+        view = memoryview(buf).cast('B')
+        length = min(len(view), self._payloadTxRx)
+        if length == 0 : return 0
+        # transfer response copied once to bytearray, data is shorter when command dropped on busy timeout
+        data = self._readBufferBytes(self._bufferIndex, length)
+        length = len(data)
+        if type(buf) is bytearray : buf[:length] = data
+        else : view[:length] = bytes(data)
+        # update buffer index and payload and return number of bytes read
+        self._bufferIndex = (self._bufferIndex + length) % 256
+        self._payloadTxRx -= length
+        return length
+
     def purge(self, length: int = 0) :
 
         # subtract or reset received payload length
@@ -815,6 +991,90 @@ class SX126x(BaseLoRa) :
             self._payloadTxRx = 0
         self._bufferIndex += self._payloadTxRx
 
+    def setRxRing(self, size: int, maxLength: int = 64) :
+
+        # enable ring buffer receive mode for RX continuous, 0 to disable
+        # RX base address advanced after every packet so up to 256 / maxLength packets stay in data buffer until read by readRing()
+        # size is maximum number of packets kept in data buffer and host, available() and read() are not used while ring enabled
+        if size > 0 :
+            if not 0 < maxLength <= 255 : raise ValueError("maximum packet length must be between 1 and 255")
+            self._rxRing = deque()
+            self._ringDrained = []
+            self._ringLock = threading.Lock()
+        else :
+            self._rxRing = None
+            self._ringDrained = None
+        self._ringSize = size
+        self._ringMaxLength = maxLength
+        self._ringUsed = 0
+        self._ringReceived = 0
+        self._ringOverflow = 0
+
+    def readRing(self) -> list :
+
+        # read all received packets with one ReadBuffer command, return list of RxPacket from oldest
+        if self._rxRing is None : return []
+        with self._ringLock :
+            packets = self._ringDrained
+            self._ringDrained = []
+            packets.extend(self._ringRead())
+        return packets
+
+    def rxRingStatus(self) -> tuple :
+
+        # get number of packets in data buffer, packets read to host, packets received, and packets dropped on full ring
+        if self._rxRing is None : return (0, 0, 0, 0)
+        return (len(self._rxRing), len(self._ringDrained), self._ringReceived, self._ringOverflow)
+
+    def _ringPacket(self, statusIrq: int) :
+
+        # called with ring lock held after RX buffer status and packet info captured, keep descriptor and move RX base address after the packet
+        self._ringReceived += 1
+        ring = self._rxRing
+        offset = self._bufferIndex
+        length = self._payloadTxRx
+        if ring and offset != (ring[0][0] + self._ringUsed) % 256 :
+            # base address command was dropped so packet written over resident packets
+            self._ringOverflow += len(ring)
+            ring.clear()
+            self._ringUsed = 0
+        if length > self._ringMaxLength :
+            # packet longer than free space already overwrote oldest resident packets, drop those and the packet itself
+            overwritten = length - (256 - self._ringUsed)
+            start = (offset - self._ringUsed) % 256
+            while ring and (ring[0][0] - start) % 256 < overwritten :
+                self._ringUsed -= ring.popleft()[1]
+                self._ringOverflow += 1
+            self._ringOverflow += 1
+            return
+        if len(ring) + len(self._ringDrained) >= self._ringSize :
+            # drop newest packet, next packet overwrite it since base address not moved
+            self._ringOverflow += 1
+            return
+        info = self._packetInfo
+        ring.append((offset, length, self._statusFromIrq(statusIrq), info.rssi, info.snr, info.timestamp))
+        self._ringUsed += length
+        # read resident packets to host when next packet may overwrite oldest packet
+        if 256 - self._ringUsed < self._ringMaxLength :
+            self._ringDrained.extend(self._ringRead())
+        base = (offset + length) % 256
+        self.setBufferBaseAddress(base, base)
+
+    def _ringRead(self) -> list :
+
+        # one ReadBuffer command from oldest packet covering all resident packets which are contiguous in data buffer
+        ring = self._rxRing
+        if not ring : return []
+        start = ring[0][0]
+        data = bytes(self._readBufferBytes(start, self._ringUsed))
+        packets = []
+        for (offset, length, status, rssi, snr, timestamp) in ring :
+            index = (offset - start) % 256
+            packets.append(RxPacket(data[index:index+length], status, rssi, snr, timestamp))
+        ring.clear()
+        self._ringUsed = 0
+        return packets
+
 ### WAIT, OPERATION STATUS, AND PACKET STATUS METHODS ###
 
     def wait(self, timeout: int = 0) -> bool :
@@ -823,33 +1083,58 @@ class SX126x(BaseLoRa) :
         if self._statusIrq :
             return True
 
-        # wait transmit or receive process finish by checking IRQ status
-        irqStat = 0x0000
-        t = time.time()
-        while irqStat == 0x0000 and self._statusIrq == 0x0000 :
-            # only check IRQ status register for non interrupt operation
-            if self._irq == -1 : irqStat = self.getIrqStatus()
-            # return when timeout reached
-            if (time.time() - t) > timeout and timeout > 0 : return False
-
-        if self._statusIrq :
-            # immediately return when interrupt signal hit
+        # block until interrupt handler store IRQ status, no CPU used while packet in the air
+        deadline = time.monotonic() + timeout
+        if self._irq != -1 :
+            while not self._statusIrq :
+                remaining = None
+                if timeout > 0 :
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 : return False
+                self._irqEvent.wait(remaining)
+                self._irqEvent.clear()
             return True
-        elif self._statusWait == self.STATUS_TX_WAIT :
+
+        # for non interrupt operation, check IRQ status register with increasing sleep interval
+        interval = self._pollInterval / 32
+        irqStat = self.getIrqStatus()
+        while irqStat == 0x0000 :
+            if timeout > 0 :
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 : return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+            interval = min(interval * 2, self._pollInterval)
+            irqStat = self.getIrqStatus()
+
+        if self._statusWait == self.STATUS_TX_WAIT :
             # for transmit, calculate transmit time and set back txen pin to previous state
             self._transmitTime = time.time() - self._transmitTime
             if self._txen != -1 :
-                gpio.output(self._txen, self._txState)
+                self._transport.output(self._txen, self._txState)
         elif self._statusWait == self.STATUS_RX_WAIT :
-            # for receive, get received payload length and buffer index and set back txen pin to previous state
+            # for receive, get received payload length, buffer index, and packet info and set back txen pin to previous state
             (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+            self._capturePacketInfo(irqStat, time.monotonic())
             if self._txen != -1 :
-                gpio.output(self._txen, self._txState)
+                self._transport.output(self._txen, self._txState)
             self._fixRxTimeout()
         elif self._statusWait == self.STATUS_RX_CONTINUOUS :
-            # for receive continuous, get received payload length and buffer index and clear IRQ status
-            (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
-            self.clearIrqStatus(0x03FF)
+            # for receive continuous, get received payload length, buffer index, and packet info and clear IRQ status
+            if self._rxRing is not None :
+                with self._ringLock :
+                    (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+                    self.clearIrqStatus(0x03FF)
+                    self._capturePacketInfo(irqStat, time.monotonic())
+                    self._ringPacket(irqStat)
+            else :
+                (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+                self.clearIrqStatus(0x03FF)
+                self._capturePacketInfo(irqStat, time.monotonic())
+        elif self._statusWait == self.STATUS_CAD_WAIT :
+            # for CAD, set back txen pin to previous state
+            if self._txen != -1 :
+                self._transport.output(self._txen, self._txState)
 
         # store IRQ status
         self._statusIrq = irqStat
@@ -861,6 +1146,9 @@ class SX126x(BaseLoRa) :
         statusIrq = self._statusIrq
         if self._statusWait == self.STATUS_RX_CONTINUOUS :
             self._statusIrq = 0x0000
+        return self._statusFromIrq(statusIrq)
+
+    def _statusFromIrq(self, statusIrq: int) -> int :
 
         # get status for transmit and receive operation based on status IRQ
         if statusIrq & self.IRQ_TIMEOUT :
@@ -868,6 +1156,8 @@ class SX126x(BaseLoRa) :
             else : return self.STATUS_RX_TIMEOUT
         elif statusIrq & self.IRQ_HEADER_ERR : return self.STATUS_HEADER_ERR
         elif statusIrq & self.IRQ_CRC_ERR : return self.STATUS_CRC_ERR
+        elif statusIrq & self.IRQ_CAD_DETECTED : return self.STATUS_CAD_DETECTED
+        elif statusIrq & self.IRQ_CAD_DONE : return self.STATUS_CAD_DONE
         elif statusIrq & self.IRQ_TX_DONE : return self.STATUS_TX_DONE
         elif statusIrq & self.IRQ_RX_DONE : return self.STATUS_RX_DONE
 
@@ -884,21 +1174,24 @@ class SX126x(BaseLoRa) :
         # get data rate last transmitted package in kbps
         return self._payloadTxRx / self._transmitTime
 
-    def packetRssi(self) -> float :
+    def packetRssi(self) -> Optional[float] :
 
-        # get relative signal strength index (RSSI) of last incoming package
+        # get relative signal strength index (RSSI) of last incoming package, None when last receive ended without packet
+        if self._packetInfo is not None : return self._packetInfo.rssi
         (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
         return rssiPkt / -2.0
 
-    def snr(self) -> float :
+    def snr(self) -> Optional[float] :
 
-        # get signal to noise ratio (SNR) of last incoming package
+        # get signal to noise ratio (SNR) of last incoming package, None when last receive ended without packet
+        if self._packetInfo is not None : return self._packetInfo.snr
         (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
         if snrPkt > 127 : snrPkt = snrPkt - 256
         return snrPkt / 4.0
 
-    def signalRssi(self) -> float :
+    def signalRssi(self) -> Optional[float] :
 
+        if self._packetInfo is not None : return self._packetInfo.signalRssi
         (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
         return signalRssiPkt / -2.0
 
@@ -913,6 +1206,14 @@ class SX126x(BaseLoRa) :
 
 ### INTERRUPT HANDLER METHODS ###
 
+    def _attachInterrupt(self, handler) :
+
+        # attach interrupt handler to IRQ pin, skip when same handler already attached
+        if self._irqHandler == handler : return
+        self._transport.removeEdgeCallback(self._irq)
+        self._transport.addEdgeCallback(self._irq, handler)
+        self._irqHandler = handler
+
     def _irqSetup(self, irqMask) :
 
         # clear IRQ status of previous transmit or receive operation
@@ -932,9 +1233,10 @@ class SX126x(BaseLoRa) :
         self._transmitTime = time.time() - self._transmitTime
         # set back txen pin to previous state
         if self._txen != -1 :
-            gpio.output(self._txen, self._txState)
-        # store IRQ status
+            self._transport.output(self._txen, self._txState)
+        # store IRQ status and wake up waiting thread
         self._statusIrq = self.getIrqStatus()
+        self._irqSignal()
 
         # call onTransmit function
         if callable(self._onTransmit) :
@@ -942,14 +1244,18 @@ class SX126x(BaseLoRa) :
 
     def _interruptRx(self, channel) :
 
+        timestamp = time.monotonic()
         # set back txen pin to previous state
         if self._txen != -1 :
-            gpio.output(self._txen, self._txState)
+            self._transport.output(self._txen, self._txState)
         self._fixRxTimeout()
-        # store IRQ status
-        self._statusIrq = self.getIrqStatus()
-        # get received payload length and buffer index
+        statusIrq = self.getIrqStatus()
+        # get received payload length and buffer index and packet info
         (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+        self._capturePacketInfo(statusIrq, timestamp)
+        # store IRQ status after payload status ready and wake up waiting thread
+        self._statusIrq = statusIrq
+        self._irqSignal()
 
         # call onReceive function
         if callable(self._onReceive) :
@@ -957,17 +1263,54 @@ class SX126x(BaseLoRa) :
 
     def _interruptRxContinuous(self, channel) :
 
-        # store IRQ status
-        self._statusIrq = self.getIrqStatus()
-        # clear IRQ status
-        self.clearIrqStatus(0x03FF)
-        # get received payload length and buffer index
-        (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+        timestamp = time.monotonic()
+        if self._rxRing is not None :
+            # application thread read ring with ReadBuffer so ring lock held over whole SPI sequence, keep packet in data buffer
+            with self._ringLock :
+                statusIrq = self._rxContinuousStatus(timestamp)
+                self._ringPacket(statusIrq)
+        else :
+            # read packet to RX queue before next packet overwrite it when RX queue enabled
+            statusIrq = self._rxContinuousStatus(timestamp)
+            if self._rxQueue is not None :
+                self._queuePacket(statusIrq)
+        # store IRQ status after payload status ready and wake up waiting thread
+        self._statusIrq = statusIrq
+        self._irqSignal()
 
         # call onReceive function
         if callable(self._onReceive) :
             self._onReceive()
 
+    def _rxContinuousStatus(self, timestamp: float) -> int :
+
+        # get and clear IRQ status then get received payload length and buffer index and packet info
+        statusIrq = self.getIrqStatus()
+        self.clearIrqStatus(0x03FF)
+        (self._payloadTxRx, self._bufferIndex) = self.getRxBufferStatus()
+        self._capturePacketInfo(statusIrq, timestamp)
+        return statusIrq
+
+    def _interruptCad(self, channel) :
+
+        # set back txen pin to previous state
+        if self._txen != -1 :
+            self._transport.output(self._txen, self._txState)
+        # store IRQ status and wake up waiting thread
+        self._statusIrq = self.getIrqStatus()
+        self._irqSignal()
+
+    def _capturePacketInfo(self, statusIrq: int, timestamp: float) :
+
+        # RX timeout or header error leave packet status of previous packet, so record only IRQ status and timestamp
+        if not statusIrq & self.IRQ_RX_DONE :
+            self._packetInfo = PacketInfo(None, None, None, 0, statusIrq, timestamp)
+            return
+        # RSSI, SNR, and signal RSSI from single GetPacketStatus command
+        (rssiPkt, snrPkt, signalRssiPkt) = self.getPacketStatus()
+        if snrPkt > 127 : snrPkt = snrPkt - 256
+        self._packetInfo = PacketInfo(rssiPkt / -2.0, snrPkt / 4.0, signalRssiPkt / -2.0, self._payloadTxRx, statusIrq, timestamp)
+
     def onTransmit(self, callback) :
 
         # register onTransmit function to call every transmit done
@@ -981,6 +1324,7 @@ class SX126x(BaseLoRa) :
 ### SX126X API: OPERATIONAL MODES COMMANDS ###
 
     def setSleep(self, sleepConfig: int) :
+        self._txPrepared = None
         self._writeBytes(0x84, (sleepConfig,), 1)
 
     def setStandby(self, stbyConfig: int) :
@@ -1033,10 +1377,14 @@ class SX126x(BaseLoRa) :
 
     def calibrate(self, calibParam: int) :
         self._writeBytes(0x89, (calibParam,), 1)
+        # image calibration (bit 6) by calibrate command use default band
+        if calibParam & 0x40 : self._calibratedBand = None
 
     def calibrateImage(self, freq1: int, freq2: int) :
         buf = (freq1, freq2)
-        self._writeBytes(0x98, buf, 2)
+        # band only recorded when calibration command actually sent
+        if self._writeBytes(0x98, buf, 2) :
+            self._calibratedBand = (freq1, freq2)
 
     def setPaConfig(self, paDutyCycle: int, hpMax: int, deviceSel: int, paLut: int) :
         buf = (paDutyCycle, hpMax, deviceSel, paLut)
@@ -1052,7 +1400,11 @@ class SX126x(BaseLoRa) :
             (address >> 8) & 0xFF, 
             address & 0xFF
         ) + tuple(data)
+        self._txPrepared = None
         self._writeBytes(0x0D, buf, nData+2)
+        # keep register cache coherent with direct register write
+        if self._regCache is not None :
+            for i in range(nData) : self._regCache[address + i] = buf[i + 2]
 
     def readRegister(self, address: int, nData: int) -> tuple :
         addr = (
@@ -1083,6 +1435,7 @@ class SX126x(BaseLoRa) :
             (dio3Mask >> 8) & 0xFF,
             dio3Mask & 0xFF
         )
+        self._txPrepared = None
         self._writeBytes(0x08, buf, 8)
 
     def getIrqStatus(self) -> int :
@@ -1120,7 +1473,9 @@ class SX126x(BaseLoRa) :
         self._writeBytes(0x86, buf, 4)
 
     def setPacketType(self, packetType: int) :
+        self._txPrepared = None
         self._writeBytes(0x8A, (packetType,), 1)
+        self._packetType = packetType
 
     def getPakcetType(self) -> int :
         buf = self._readBytes(0x11, 2)
@@ -1132,6 +1487,7 @@ class SX126x(BaseLoRa) :
 
     def setModulationParamsLoRa(self, sf: int, bw: int, cr: int, ldro: int) :
         buf = (sf, bw, cr, ldro, 0, 0, 0, 0)
+        self._txPrepared = None
         self._writeBytes(0x8B, buf, 8)
 
     def setModulationParamsFsk(self, br: int, pulseShape: int, bandwidth: int, Fdev: int) :
@@ -1145,6 +1501,7 @@ class SX126x(BaseLoRa) :
             (br >> 8) & 0xFF,
             Fdev & 0xFF
         )
+        self._txPrepared = None
         self._writeBytes(0x8B, buf, 8)
 
     def setPacketParamsLoRa(self, preambleLength: int, headerType: int, payloadLength: int, crcType: int, invertIq: int) :
@@ -1159,6 +1516,7 @@ class SX126x(BaseLoRa) :
             0,
             0
         )
+        self._txPrepared = None
         self._writeBytes(0x8C, buf, 9)
 
     def setPacketParamsFsk(self, preambleLength: int, preambleDetector: int, syncWordLength: int, addrComp: int, packetType: int, payloadLength: int, crcType: int, whitening: int) :
@@ -1173,6 +1531,7 @@ class SX126x(BaseLoRa) :
             crcType,
             whitening
         )
+        self._txPrepared = None
         self._writeBytes(0x8C, buf, 9)
 
     def setCadParams(self, cadSymbolNum: int, cadDetPeak: int, cadDetMin: int, cadExitMode: int, cadTimeout: int) :
@@ -1189,6 +1548,7 @@ class SX126x(BaseLoRa) :
 
     def setBufferBaseAddress(self, txBaseAddress: int, rxBaseAddress: int) :
         buf = (txBaseAddress, rxBaseAddress)
+        self._txPrepared = None
         self._writeBytes(0x8F, buf, 2)
 
     def setLoRaSymbNumTimeout(self, symbnum: int) :
@@ -1235,47 +1595,322 @@ class SX126x(BaseLoRa) :
 ### SX126X API: WORKAROUND FUNCTIONS ###
 
     def _fixLoRaBw500(self, bw: int) :
-        packetType = self.getPakcetType()
-        buf = self.readRegister(self.REG_TX_MODULATION, 1)
-        value = buf[0] | 0x04
+        packetType = self._getPacketTypeCached()
+        read = self._readRegisterCached(self.REG_TX_MODULATION)
+        value = read | 0x04
         if packetType == self.LORA_MODEM and bw == self.BW_500000 :
-            value = buf[0] & 0xFB
-        self.writeRegister(self.REG_TX_MODULATION, (value,), 1)
+            value = read & 0xFB
+        self._writeRegisterCached(self.REG_TX_MODULATION, value)
 
     def _fixResistanceAntenna(self) :
-        buf = self.readRegister(self.REG_TX_CLAMP_CONFIG, 1)
-        value = buf[0] | 0x1E
-        self.writeRegister(self.REG_TX_CLAMP_CONFIG, (value,), 1)
+        value = self._readRegisterCached(self.REG_TX_CLAMP_CONFIG) | 0x1E
+        self._writeRegisterCached(self.REG_TX_CLAMP_CONFIG, value)
 
     def _fixRxTimeout(self) :
+        # stopping RTC and clearing timeout event are actions so both registers always written
+        # event mask hold event bits set by device so it is always read and never cached
         self.writeRegister(self.REG_RTC_CONTROL, (0,), 1)
-        buf = self.readRegister(self.REG_EVENT_MASK, 1)
-        value = buf[0] | 0x02
+        value = self.readRegister(self.REG_EVENT_MASK, 1)[0] | 0x02
         self.writeRegister(self.REG_EVENT_MASK, (value,), 1)
 
     def _fixInvertedIq(self, invertIq: bool) :
-        buf = self.readRegister(self.REG_IQ_POLARITY_SETUP, 1)
-        value = buf[0] & 0xFB
+        read = self._readRegisterCached(self.REG_IQ_POLARITY_SETUP)
+        value = read & 0xFB
         if invertIq :
-            value = buf[0] | 0x04
-        self.writeRegister(self.REG_IQ_POLARITY_SETUP, (value,), 1)
+            value = read | 0x04
+        self._writeRegisterCached(self.REG_IQ_POLARITY_SETUP, value)
+
+### SX126X API: REGISTER CACHE ###
+
+    def _readRegisterCached(self, address: int) -> int :
+        cache = self._regCache
+        if cache is not None :
+            value = cache.get(address)
+            if value is not None :
+                self._regCacheHit += 1
+                return value
+            self._regCacheMiss += 1
+        buf = self.readRegister(address, 1)
+        if cache is not None : cache[address] = buf[0]
+        return buf[0]
+
+    def _writeRegisterCached(self, address: int, value: int) -> bool :
+        # return false when write skipped because register already hold the value
+        if self._regCache is not None and self._regCache.get(address) == value :
+            self._regCacheHit += 1
+            return False
+        self.writeRegister(address, (value,), 1)
+        return True
+
+    def _invalidateRegisterCache(self) :
+        # image calibration redone by device on reset and cold start
+        self._packetType = None
+        self._calibratedBand = None
+        BaseLoRa._invalidateRegisterCache(self)
+
+    def _getPacketTypeCached(self) -> int :
+        # packet type only changed by setPacketType() and lost on reset and sleep
+        if self._regCache is not None :
+            if self._packetType is not None :
+                self._regCacheHit += 1
+                return self._packetType
+            self._regCacheMiss += 1
+        self._packetType = self.getPakcetType()
+        return self._packetType
 
 ### SX126X API: UTILITIES ###
 
-    def _writeBytes(self, opCode: int, data: tuple, nBytes: int) :
-        if self.busyCheck() : return
-        gpio.output(self._cs_define, gpio.LOW)
+    def _writeBytes(self, opCode: int, data: tuple, nBytes: int) -> bool :
+        # return false when command dropped on busy timeout
+        if self.busyCheck() :
+            self._commandDropped(opCode)
+            return False
+        self._transport.output(self._cs_define, self._transport.LOW)
         buf = [opCode]
-        for i in range(nBytes) : buf.append(data[i])
-        spi.xfer2(buf)
-        gpio.output(self._cs_define, gpio.HIGH)
+        buf.extend(data[:nBytes])
+        self._transport.xfer(buf)
+        self._transport.output(self._cs_define, self._transport.HIGH)
+        return True
 
     def _readBytes(self, opCode: int, nBytes: int, address: tuple = (), nAddress: int = 0) -> tuple :
-        if self.busyCheck() : return ()
-        gpio.output(self._cs_define, gpio.LOW)
+        if self.busyCheck() :
+            self._commandDropped(opCode)
+            return ()
+        self._transport.output(self._cs_define, self._transport.LOW)
         buf = [opCode]
-        for i in range(nAddress) : buf.append(address[i])
-        for i in range(nBytes) : buf.append(0x00)
-        feedback = spi.xfer2(buf)
-        gpio.output(self._cs_define, gpio.HIGH)
+        buf.extend(address[:nAddress])
+        buf.extend(bytes(nBytes))
+        feedback = self._transport.xfer(buf)
+        self._transport.output(self._cs_define, self._transport.HIGH)
         return tuple(feedback[nAddress+1:])
+
+    def _writeBufferBytes(self, offset: int, data: memoryview) :
+        # WriteBuffer command copied into preallocated buffer, no per byte conversion
+        nData = len(data)
+        if nData > 256 :
+            buf = bytes((0x0E, offset)) + data.tobytes()
+        else :
+            cmd = self._writeBufferCmd
+            cmd[0] = 0x0E
+            cmd[1] = offset
+            cmd[2:nData+2] = data
+            buf = memoryview(cmd)[:nData+2]
+        if self.busyCheck() :
+            self._commandDropped(0x0E)
+            return
+        self._transport.output(self._cs_define, self._transport.LOW)
+        self._transport.write(buf)
+        self._transport.output(self._cs_define, self._transport.HIGH)
+
+    def _writeCommand(self, buf) -> bool :
+        # send precomputed command bytes, return false when busy timeout
+        if self.busyCheck() :
+            self._commandDropped(buf[0])
+            return False
+        self._transport.output(self._cs_define, self._transport.LOW)
+        self._transport.write(buf)
+        self._transport.output(self._cs_define, self._transport.HIGH)
+        return True
+
+    def _readBufferBytes(self, offset: int, nData: int) -> list :
+        # ReadBuffer command from preallocated zero filled buffer, return data without status byte
+        if nData > 256 :
+            buf = bytes((0x1E, offset)) + bytes(nData+1)
+        else :
+            cmd = self._readBufferCmd
+            cmd[0] = 0x1E
+            cmd[1] = offset
+            buf = memoryview(cmd)[:nData+3]
+        if self.busyCheck() :
+            self._commandDropped(0x1E)
+            return []
+        self._transport.output(self._cs_define, self._transport.LOW)
+        feedback = self._transport.xfer(buf)
+        self._transport.output(self._cs_define, self._transport.HIGH)
+        return feedback[3:]
+
+
+class PreparedTx :
+    """Transmit operation of SX126x with precomputed command bytes, created by SX126x.prepareTx()"""
+
+    def __init__(self, radio: SX126x, timeout: int = SX126x.TX_SINGLE) :
+
+        self._radio = radio
+        self._clearIrqCmd = bytes((0x02, 0x03, 0xFF))
+        # payload always written at TX base address 0
+        self._baseAddressCmd = bytes((0x8F, 0x00, 0x00))
+        txTimeout = timeout << 6
+        if txTimeout > 0x00FFFFFF : txTimeout = radio.TX_SINGLE
+        self._txCmd = bytes((0x83, (txTimeout >> 16) & 0xFF, (txTimeout >> 8) & 0xFF, txTimeout & 0xFF))
+        self._build()
+        self._length = -1
+
+    def _build(self) :
+
+        # command bytes depending on radio parameters, built again after other command invalidated this prepared transmit
+        radio = self._radio
+        # clear IRQ status and set TX done and TX timeout as interrupt source on selected DIO pin
+        irqMask = radio.IRQ_TX_DONE | radio.IRQ_TIMEOUT
+        dioMask = [0x0000, 0x0000, 0x0000]
+        dioMask[radio._dio - 1] = irqMask
+        self._dioIrqCmd = bytes((
+            0x08,
+            (irqMask >> 8) & 0xFF, irqMask & 0xFF,
+            (dioMask[0] >> 8) & 0xFF, dioMask[0] & 0xFF,
+            (dioMask[1] >> 8) & 0xFF, dioMask[1] & 0xFF,
+            (dioMask[2] >> 8) & 0xFF, dioMask[2] & 0xFF
+        ))
+        # apply BW500 workaround for current bandwidth and keep resulting register value
+        radio._fixLoRaBw500(radio._bw)
+        value = radio._readRegisterCached(radio.REG_TX_MODULATION)
+        self._fixBw500Cmd = bytes((0x0D, (radio.REG_TX_MODULATION >> 8) & 0xFF, radio.REG_TX_MODULATION & 0xFF, value))
+        # packet parameter with payload length at index 4
+        self._packetParamsCmd = bytearray((
+            0x8C,
+            (radio._preambleLength >> 8) & 0xFF,
+            radio._preambleLength & 0xFF,
+            radio._headerType,
+            0,
+            int(radio._crcType),
+            int(radio._invertIq),
+            0, 0, 0
+        ))
+
+    def send(self, payload) -> bool :
+
+        # write payload and enter TX mode, call wait() of radio to wait transmit done
+        radio = self._radio
+        data = memoryview(payload).cast('B')
+        length = len(data)
+        if length > 255 :
+            raise ValueError("payload length must not exceed 255 bytes")
+
+        # save current txen pin state and set txen pin to LOW
+        if radio._txen != -1 :
+            radio._txState = radio._transport.input(radio._txen)
+            radio._transport.output(radio._txen, radio._transport.LOW)
+
+        # IRQ source, buffer address, and workaround register only sent again when other command changed them
+        # command bytes rebuilt from current radio parameters so later packet or modulation setting is kept
+        if radio._txPrepared is not self :
+            self._build()
+            if not self._command(self._dioIrqCmd) : return False
+            if not self._command(self._baseAddressCmd) : return False
+            if not self._command(self._fixBw500Cmd) : return False
+            self._length = -1
+        if not self._command(self._clearIrqCmd) : return False
+        radio._writeBufferBytes(0, data)
+        # packet parameter only sent when payload length changed
+        if length != self._length :
+            self._packetParamsCmd[4] = length
+            if not self._command(self._packetParamsCmd) : return False
+            self._length = length
+        radio._bufferIndex = length
+        radio._payloadTxRx = length
+
+        # set status to TX wait and attach TX interrupt handler before entering TX mode
+        radio._statusWait = radio.STATUS_TX_WAIT
+        radio._statusIrq = 0x0000
+        radio._irqEvent.clear()
+        if radio._irq != -1 :
+            radio._attachInterrupt(radio._interruptTx)
+        radio._transmitTime = time.time()
+        if not self._command(self._txCmd) : return False
+        radio._txPrepared = self
+        return True
+
+    def _command(self, buf) -> bool :
+
+        # send precomputed command, return false when busy timeout
+        return self._radio._writeCommand(buf)
+
+
+class CadScanner :
+    """Channel activity detection over list of frequencies with precomputed command bytes, created by SX126x.cadScanner()"""
+
+    def __init__(self, radio: SX126x, frequencies: list, cadSymbolNum: int, cadDetPeak: int, cadDetMin: int) :
+
+        self._radio = radio
+        self.frequencies = list(frequencies)
+        # SetRfFrequency command and image calibration band of every channel
+        self._frequencyCmds = []
+        self._bands = []
+        for frequency in self.frequencies :
+            rfFreq = radio._frequencyWord(frequency)
+            self._frequencyCmds.append(bytes((0x86, (rfFreq >> 24) & 0xFF, (rfFreq >> 16) & 0xFF, (rfFreq >> 8) & 0xFF, rfFreq & 0xFF)))
+            self._bands.append(radio._calibrationBand(frequency))
+        # CAD parameter with device go to standby after CAD done, detection peak 0 select SF + 13
+        if cadDetPeak == 0 : cadDetPeak = radio._sf + 13
+        self._cadParamsCmd = bytes((0x88, cadSymbolNum, cadDetPeak, cadDetMin, radio.CAD_EXIT_STDBY, 0, 0, 0))
+        # CAD done and CAD detected as interrupt source on selected DIO pin
+        irqMask = radio.IRQ_CAD_DONE | radio.IRQ_CAD_DETECTED
+        dioMask = [0x0000, 0x0000, 0x0000]
+        dioMask[radio._dio - 1] = irqMask
+        self._dioIrqCmd = bytes((
+            0x08,
+            (irqMask >> 8) & 0xFF, irqMask & 0xFF,
+            (dioMask[0] >> 8) & 0xFF, dioMask[0] & 0xFF,
+            (dioMask[1] >> 8) & 0xFF, dioMask[1] & 0xFF,
+            (dioMask[2] >> 8) & 0xFF, dioMask[2] & 0xFF
+        ))
+        self._clearIrqCmd = bytes((0x02, 0x03, 0xFF))
+        self._cadCmd = bytes((0xC5,))
+        # CAD last number of symbols plus half symbol, wait timeout with margin in second
+        symbolTime = (1 << radio._sf) / radio._bw
+        self._timeout = 4 * ((1 << cadSymbolNum) + 0.5) * symbolTime + 0.01
+        self.scans = 0
+        self.detections = [0] * len(self.frequencies)
+
+    def scan(self, rounds: int = 1) -> list :
+
+        # perform CAD on every channel in turn, return number of CAD detected of every channel in this scan
+        radio = self._radio
+        detected = [0] * len(self.frequencies)
+        radio.standby()
+        if not self._command(self._cadParamsCmd) : return detected
+        if not self._command(self._dioIrqCmd) : return detected
+        radio._txPrepared = None
+        if radio._irq != -1 :
+            radio._attachInterrupt(radio._interruptCad)
+        # txen pin kept high for whole scan, CAD done handling set it back to stored state
+        if radio._txen != -1 :
+            txState = radio._transport.input(radio._txen)
+            radio._txState = radio._transport.HIGH
+            radio._transport.output(radio._txen, radio._transport.HIGH)
+        for i in range(rounds) :
+            for channel in range(len(self.frequencies)) :
+                # image calibration only performed when channel in different band from calibrated band
+                band = self._bands[channel]
+                if band != radio._calibratedBand :
+                    radio.calibrateImage(band[0], band[1])
+                if not self._command(self._frequencyCmds[channel]) : continue
+                if not self._command(self._clearIrqCmd) : continue
+                radio._statusWait = radio.STATUS_CAD_WAIT
+                radio._statusIrq = 0x0000
+                radio._irqEvent.clear()
+                if not self._command(self._cadCmd) : continue
+                if not radio.wait(self._timeout) : continue
+                if radio._statusIrq & radio.IRQ_CAD_DETECTED :
+                    detected[channel] += 1
+                    self.detections[channel] += 1
+            self.scans += 1
+        if radio._txen != -1 :
+            radio._txState = txState
+            radio._transport.output(radio._txen, txState)
+        return detected
+
+    def activity(self) -> list :
+
+        # ratio of CAD detected to number of scan of every channel since created or reset
+        if not self.scans : return [0.0] * len(self.frequencies)
+        return [detection / self.scans for detection in self.detections]
+
+    def reset(self) :
+
+        self.scans = 0
+        self.detections = [0] * len(self.frequencies)
+
+    def _command(self, buf) -> bool :
+
+        # send precomputed command, return false when busy timeout
+        return self._radio._writeCommand(buf)
@@ -1,12 +1,9 @@
-from .base import BaseLoRa
-import spidev
-import RPi.GPIO
+from .base import BaseLoRa, PacketInfo
+from .airtime import FAMILY_SX127X
+from .transport import BaseTransport, SpiGpioTransport
+import threading
 import time
-
-spi = spidev.SpiDev()
-gpio = RPi.GPIO
-gpio.setmode(RPi.GPIO.BCM)
-gpio.setwarnings(False)
+from typing import Optional
 
 class SX127x(BaseLoRa) :
     """Class for SX1276/77/78/79 LoRa chipsets from Semtech"""
@@ -158,8 +155,8 @@ class SX127x(BaseLoRa) :
     _txen = -1
     _rxen = -1
     _spiSpeed = 7800000
-    _txState = gpio.LOW
-    _rxState = gpio.LOW
+    _txState = BaseTransport.LOW
+    _rxState = BaseTransport.LOW
 
     # LoRa setting
     _dio = 1
@@ -169,6 +166,7 @@ class SX127x(BaseLoRa) :
     _bw = 125000
     _cr = 5
     _ldro = False
+    _airtimeFamily = FAMILY_SX127X
     _headerType = HEADER_EXPLICIT
     _preambleLength = 12
     _payloadLength = 32
@@ -177,14 +175,26 @@ class SX127x(BaseLoRa) :
 
     # Operation properties
     _payloadTxRx = 32
+    _version = 0x12
     _statusWait = STATUS_DEFAULT
     _statusIrq = STATUS_DEFAULT
     _transmitTime = 0.0
+    _pollInterval = 0.001
+    # configuration registers which only changed by driver, mode and status registers are never cached
+    _cachedRegisters = frozenset((REG_MODEM_CONFIG_1, REG_MODEM_CONFIG_2, REG_MODEM_CONFIG_3, REG_INVERTIQ))
 
     # callback functions
     _onTransmit = None
     _onReceive = None
 
+    def __init__(self, transport: BaseTransport = None) :
+
+        # use spidev and RPi.GPIO when no SPI and GPIO transport supplied
+        if transport is None : transport = SpiGpioTransport()
+        self._transport = transport
+        # set by interrupt handlers after IRQ status stored
+        self._irqEvent = threading.Event()
+
 ### COMMON OPERATIONAL METHODS ###
 
     def begin(self, bus: int = _bus, cs: int = _cs, reset: int = _reset, irq: int = _irq, txen: int = _txen, rxen: int = _rxen) -> bool :
@@ -207,16 +217,17 @@ class SX127x(BaseLoRa) :
     def end(self) :
 
         self.sleep()
-        spi.close()
-        gpio.cleanup()
+        self._transport.close()
+        self._transport.cleanup()
 
     def reset(self) :
 
         # put reset pin to low then wait 5 ms
-        gpio.output(self._reset, gpio.LOW)
+        self._transport.output(self._reset, self._transport.LOW)
         time.sleep(0.001)
-        gpio.output(self._reset, gpio.HIGH)
+        self._transport.output(self._reset, self._transport.HIGH)
         time.sleep(0.005)
+        self._invalidateRegisterCache()
         # wait until device connected, return false when device too long to respond
         t = time.time()
         version = 0x00
@@ -224,6 +235,8 @@ class SX127x(BaseLoRa) :
             version = self.readRegister(self.REG_VERSION)
             if time.time() - t > 1 :
                 return False
+        # keep silicon version for RSSI offset
+        self._version = version
         return True
 
     def sleep(self) :
@@ -242,16 +255,18 @@ class SX127x(BaseLoRa) :
 
 ### HARDWARE CONFIGURATION METHODS ###
 
+    def setTransport(self, transport: BaseTransport) :
+
+        # replace SPI and GPIO transport, must be called before begin() method
+        self._transport = transport
+
     def setSpi(self, bus: int, cs: int, speed: int = _spiSpeed) :
 
         self._bus = bus
         self._cs = cs
         self._spiSpeed = speed
         # open spi line and set bus id, chip select, and spi speed
-        spi.open(bus, cs)
-        spi.max_speed_hz = speed
-        spi.lsbfirst = False
-        spi.mode = 0
+        self._transport.open(bus, cs, speed)
 
     def setPins(self, reset: int, irq: int = -1, txen: int = -1, rxen: int = -1) :
 
@@ -260,10 +275,10 @@ class SX127x(BaseLoRa) :
         self._txen = txen
         self._rxen = rxen
         # set pins as input or output
-        gpio.setup(reset, gpio.OUT)
-        if irq != -1 : gpio.setup(irq, gpio.IN)
-        if txen != -1 : gpio.setup(txen, gpio.OUT)
-        if rxen != -1 : gpio.setup(rxen, gpio.OUT)
+        self._transport.setup(reset, self._transport.OUT)
+        if irq != -1 : self._transport.setup(irq, self._transport.IN)
+        if txen != -1 : self._transport.setup(txen, self._transport.OUT)
+        if rxen != -1 : self._transport.setup(rxen, self._transport.OUT)
 
     def setCurrentProtection(self, current: int) :
 
@@ -293,6 +308,8 @@ class SX127x(BaseLoRa) :
             self._modem = self.MODULATION_FSK
         else :
             self._modem = self.MODULATION_OOK
+        # LoRa and FSK modem use same register address for different configuration
+        self._invalidateRegisterCache()
         self.sleep()
         self.writeRegister(self.REG_OP_MODE, self._modem | self.MODE_STDBY)
 
@@ -408,11 +425,13 @@ class SX127x(BaseLoRa) :
         # valid code rate denominator is 5 - 8
         if cr < 5 : cr = 4
         elif cr > 8 : cr = 8
+        self._cr = cr
         crCfg = cr - 4
         self.writeBits(self.REG_MODEM_CONFIG_1, crCfg, 1, 3)
 
     def setLdroEnable(self, ldro: bool) :
 
+        self._ldro = ldro
         ldroCfg = 0x00
         if ldro : ldroCfg = 0x01
         self.writeBits(self.REG_MODEM_CONFIG_3, ldroCfg, 3, 1)
@@ -426,6 +445,7 @@ class SX127x(BaseLoRa) :
 
     def setPreambleLength(self, preambleLength: int) :
 
+        self._preambleLength = preambleLength
         self.writeRegister(self.REG_PREAMBLE_MSB, (preambleLength >> 8) & 0xFF)
         self.writeRegister(self.REG_PREAMBLE_LSB, preambleLength & 0xFF)
 
@@ -436,6 +456,7 @@ class SX127x(BaseLoRa) :
 
     def setCrcEnable(self, crcType: bool) :
 
+        self._crcType = crcType
         crcTypeCfg = 0x00
         if crcType : crcTypeCfg = 0x01
         self.writeBits(self.REG_MODEM_CONFIG_2, crcTypeCfg, 2, 1)
@@ -469,10 +490,10 @@ class SX127x(BaseLoRa) :
 
         # save current txen and rxen pin state and set txen pin to high and rxen pin to low
         if self._txen != -1 and self._rxen != -1 :
-            self._txState = gpio.input(self._txen)
-            self._rxState = gpio.input(self._rxen)
-            gpio.output(self._txen, gpio.HIGH)
-            gpio.output(self._rxen, gpio.LOW)
+            self._txState = self._transport.input(self._txen)
+            self._rxState = self._transport.input(self._rxen)
+            self._transport.output(self._txen, self._transport.HIGH)
+            self._transport.output(self._rxen, self._transport.LOW)
 
     def endPacket(self, timeout: int = 0) -> bool :
 
@@ -489,16 +510,17 @@ class SX127x(BaseLoRa) :
         # set status to TX wait
         self._statusWait = self.STATUS_TX_WAIT
         self._statusIrq = 0x00
+        self._irqEvent.clear()
 
-        # set device to transmit mode
-        self.writeRegister(self.REG_OP_MODE, self._modem | self.MODE_TX)
-        self._transmitTime = time.time()
-
-        # set TX done interrupt on DIO0 and attach TX interrupt handler
+        # set TX done interrupt on DIO0 and attach TX interrupt handler before entering TX mode
         if self._irq != -1 :
             self.writeRegister(self.REG_DIO_MAPPING_1, self.DIO0_TX_DONE)
-            gpio.remove_event_detect(self._irq)
-            gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptTx, bouncetime=10)
+            self._transport.removeEdgeCallback(self._irq)
+            self._transport.addEdgeCallback(self._irq, self._interruptTx)
+
+        # set device to transmit mode
+        self._transmitTime = time.time()
+        self.writeRegister(self.REG_OP_MODE, self._modem | self.MODE_TX)
         return True
 
     def write(self, data, length: int = 0) :
@@ -512,24 +534,73 @@ class SX127x(BaseLoRa) :
         else :
             raise TypeError("input data must be list, tuple, integer or float")
 
-        # write data to buffer and update payload
-        for i in range(length) :
-            self.writeRegister(self.REG_FIFO, int(data[i]))
+        # write data to buffer in single burst transfer and update payload
+        self.writeRegisterBurst(self.REG_FIFO, [int(data[i]) for i in range(length)])
         self._payloadTxRx += length
 
     def put(self, data) :
 
         # prepare bytes or bytearray to be transmitted
         if type(data) is bytes or type(data) is bytearray :
-            dataList = tuple(data)
-            length = len(dataList)
+            length = len(data)
         else : raise TypeError("input data must be bytes or bytearray")
 
-        # write data to buffer and update payload
-        for i in range(length) :
-            self.writeRegister(self.REG_FIFO, int(data[i]))
+        # write data to buffer in single burst transfer and update payload
+        self.writeRegisterBurst(self.REG_FIFO, data)
         self._payloadTxRx += length
 
+    def sendMany(self, payloads, timeout: int = 0) :
+
+        # transmit every bytes or bytearray payload in iterable and return TxReport with status of every packet
+        # LoRa FIFO can only be filled in standby mode so next payload is fetched and converted to
+        # FIFO burst transfer while current one in the air, timeout in ms for every packet (0 for bound by time on air)
+        # packet not started has STATUS_DEFAULT and packet without TX done in time has STATUS_TX_TIMEOUT
+        results = []
+        airtime = 0.0
+        start = time.monotonic()
+        payloads = iter(payloads)
+        data = next(payloads, None)
+        burst = None
+        if data is not None : burst = self._fifoBurst(data)
+        while burst is not None :
+            length = len(burst) - 1
+            self.beginPacket()
+            if length : self._transport.xfer(burst)
+            self._payloadTxRx = length
+            started = self.endPacket()
+            airtime += self.timeOnAir(length) / 1000
+
+            # invalid next payload raised after current packet done so radio not left in TX mode
+            burst = None
+            error = None
+            try :
+                data = next(payloads, None)
+                if data is not None : burst = self._fifoBurst(data)
+            except (TypeError, ValueError) as e :
+                error = e
+
+            # terminate transmit mode when TX done not reached before timeout
+            if not started :
+                results.append(self.STATUS_DEFAULT)
+            elif not self.wait(timeout / 1000 if timeout else self._txWaitTimeout(length)) :
+                self.standby()
+                results.append(self.STATUS_TX_TIMEOUT)
+            else :
+                results.append(self.status())
+            if error is not None : raise error
+
+        return self._txReport(results, start, airtime)
+
+    def _fifoBurst(self, data) -> list :
+
+        if type(data) is not bytes and type(data) is not bytearray :
+            raise TypeError("input data must be bytes or bytearray")
+        if len(data) > 255 :
+            raise ValueError("payload length must not exceed 255 bytes")
+        buf = [self.REG_FIFO | 0x80]
+        buf.extend(data)
+        return buf
+
 ### RECEIVE RELATED METHODS ###
 
     def request(self, timeout: int = 0) -> bool :
@@ -544,14 +615,16 @@ class SX127x(BaseLoRa) :
 
         # save current txen and rxen pin state and set txen pin to low and rxen pin to high
         if self._txen != -1 and self._rxen != -1 :
-            self._txState = gpio.input(self._txen)
-            self._rxState = gpio.input(self._rxen)
-            gpio.output(self._txen, gpio.LOW)
-            gpio.output(self._rxen, gpio.HIGH)
+            self._txState = self._transport.input(self._txen)
+            self._rxState = self._transport.input(self._rxen)
+            self._transport.output(self._txen, self._transport.LOW)
+            self._transport.output(self._rxen, self._transport.HIGH)
 
         # set status to RX wait
         self._statusWait = self.STATUS_RX_WAIT
         self._statusIrq = 0x00
+        self._packetInfo = None
+        self._irqEvent.clear()
 
         # select RX mode to RX continuous mode for RX single and continuos operation
         rxMode = self.MODE_RX_CONTINUOUS
@@ -565,17 +638,49 @@ class SX127x(BaseLoRa) :
             self.writeBits(self.REG_MODEM_CONFIG_2, (symbTimeout >> 8) & 0x03, 0, 2)
             self.writeRegister(self.REG_SYMB_TIMEOUT_LSB, symbTimeout & 0xFF)
 
-        # set device to receive mode
-        self.writeRegister(self.REG_OP_MODE, self._modem | rxMode)
-
-        # set RX done interrupt on DIO0 and attach RX interrupt handler
+        # set RX done interrupt on DIO0 and attach RX interrupt handler before entering RX mode
         if self._irq != -1 :
             self.writeRegister(self.REG_DIO_MAPPING_1, self.DIO0_RX_DONE)
-            gpio.remove_event_detect(self._irq)
+            self._transport.removeEdgeCallback(self._irq)
             if timeout == self.RX_CONTINUOUS :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRxContinuous, bouncetime=10)
+                self._transport.addEdgeCallback(self._irq, self._interruptRxContinuous)
             else :
-                gpio.add_event_detect(self._irq, gpio.RISING, callback=self._interruptRx, bouncetime=10)
+                self._transport.addEdgeCallback(self._irq, self._interruptRx)
+
+        # set device to receive mode
+        self.writeRegister(self.REG_OP_MODE, self._modem | rxMode)
+        return True
+
+    def requestCad(self) -> bool :
+
+        # skip to start CAD when previous RX operation incomplete
+        mode = self.readRegister(self.REG_OP_MODE) & 0x07
+        if mode == self.MODE_RX_SINGLE or mode == self.MODE_RX_CONTINUOUS :
+            return False
+
+        # clear IRQ flag from last TX or RX operation
+        self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
+
+        # save current txen and rxen pin state and set txen pin to low and rxen pin to high
+        if self._txen != -1 and self._rxen != -1 :
+            self._txState = self._transport.input(self._txen)
+            self._rxState = self._transport.input(self._rxen)
+            self._transport.output(self._txen, self._transport.LOW)
+            self._transport.output(self._rxen, self._transport.HIGH)
+
+        # set status to CAD wait
+        self._statusWait = self.STATUS_CAD_WAIT
+        self._statusIrq = 0x00
+        self._irqEvent.clear()
+
+        # set CAD done interrupt on DIO0 and attach CAD interrupt handler before entering CAD mode
+        if self._irq != -1 :
+            self.writeRegister(self.REG_DIO_MAPPING_1, self.DIO0_CAD_DONE)
+            self._transport.removeEdgeCallback(self._irq)
+            self._transport.addEdgeCallback(self._irq, self._interruptCad)
+
+        # start channel activity detection, check status() after wait() for CAD result
+        self.writeRegister(self.REG_OP_MODE, self._modem | self.MODE_CAD)
         return True
 
     def available(self) :
@@ -596,10 +701,8 @@ class SX127x(BaseLoRa) :
             self._payloadTxRx -= length
         else :
             self._payloadTxRx = 0
-        # read multiple bytes of received package in FIFO buffer
-        data = tuple()
-        for i in range(length) :
-            data = data + (self.readRegister(self.REG_FIFO),)
+        # read multiple bytes of received package in FIFO buffer with single burst transfer
+        data = tuple(self.readRegisterBurst(self.REG_FIFO, length))
 
         # return single byte or tuple
         if single : return data[0]
@@ -612,13 +715,8 @@ class SX127x(BaseLoRa) :
             self._payloadTxRx -= length
         else :
             self._payloadTxRx = 0
-        # read data from FIFO buffer and update payload length
-        data = tuple()
-        for i in range(length) :
-            data = data + (self.readRegister(self.REG_FIFO),)
-
-        # return array of bytes
-        return bytes(data)
+        # read data from FIFO buffer with single burst transfer and return array of bytes
+        return bytes(self.readRegisterBurst(self.REG_FIFO, length))
 
     def purge(self, length: int = 0) :
 
@@ -635,46 +733,67 @@ class SX127x(BaseLoRa) :
         # immediately return when currently not waiting transmit or receive process
         if self._statusIrq : return True
 
-        # wait transmit or receive process finish by checking interrupt status or IRQ status
-        irqFlag = 0x00
+        # block until interrupt handler store IRQ status, no CPU used while packet in the air
+        deadline = time.monotonic() + timeout
+        if self._irq != -1 :
+            while not self._statusIrq :
+                remaining = None
+                if timeout > 0 :
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 : return False
+                self._irqEvent.wait(remaining)
+                self._irqEvent.clear()
+            return True
+
+        # for non interrupt operation, check IRQ flags register with increasing sleep interval
         irqFlagMask = self.IRQ_RX_DONE | self.IRQ_RX_TIMEOUT | self.IRQ_CRC_ERR
         if self._statusWait == self.STATUS_TX_WAIT :
             irqFlagMask = self.IRQ_TX_DONE
-        t = time.time()
-        while not (irqFlag & irqFlagMask) and self._statusIrq == 0x00 :
-            # only check IRQ status register for non interrupt operation
-            if self._irq == -1 : irqFlag = self.readRegister(self.REG_IRQ_FLAGS)
-            # return when timeout reached
-            if time.time() - t > timeout and timeout > 0 : return False
-
-        if self._statusIrq :
-            # immediately return when interrupt signal hit
-            return True
+        elif self._statusWait == self.STATUS_CAD_WAIT :
+            irqFlagMask = self.IRQ_CAD_DONE
+        interval = self._pollInterval / 32
+        irqFlag = self.readRegister(self.REG_IRQ_FLAGS)
+        while not (irqFlag & irqFlagMask) :
+            if timeout > 0 :
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 : return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+            interval = min(interval * 2, self._pollInterval)
+            irqFlag = self.readRegister(self.REG_IRQ_FLAGS)
 
-        elif self._statusWait == self.STATUS_TX_WAIT :
+        if self._statusWait == self.STATUS_TX_WAIT :
             # calculate transmit time and set back txen and rxen pin to previous state
             self._transmitTime = time.time() - self._transmitTime
             if self._txen != -1 and self._rxen != -1 :
-                gpio.output(self._txen, self._txState)
-                gpio.output(self._rxen, self._rxState)
+                self._transport.output(self._txen, self._txState)
+                self._transport.output(self._rxen, self._rxState)
 
         elif self._statusWait == self.STATUS_RX_WAIT :
             # terminate receive mode by setting mode to standby
             self.standby()
-            # set pointer to RX buffer base address and get packet payload length
+            # set pointer to RX buffer base address and get packet payload length and packet info
             self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
             self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+            self._capturePacketInfo(irqFlag, time.monotonic())
             # set back txen and rxen pin to previous state
             if self._txen != -1 and self._rxen != -1 :
-                gpio.output(self._txen, self._txState)
-                gpio.output(self._rxen, self._rxState)
+                self._transport.output(self._txen, self._txState)
+                self._transport.output(self._rxen, self._rxState)
 
         elif self._statusWait == self.STATUS_RX_CONTINUOUS :
-            # set pointer to RX buffer base address and get packet payload length
+            # set pointer to RX buffer base address and get packet payload length and packet info
             self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
             self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
-            # clear IRQ flag
+            # clear IRQ flag before reading packet info so next packet flag is not cleared
             self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
+            self._capturePacketInfo(irqFlag, time.monotonic())
+
+        elif self._statusWait == self.STATUS_CAD_WAIT :
+            # set back txen and rxen pin to previous state
+            if self._txen != -1 and self._rxen != -1 :
+                self._transport.output(self._txen, self._txState)
+                self._transport.output(self._rxen, self._rxState)
 
         # store IRQ status
         self._statusIrq = irqFlag
@@ -686,12 +805,17 @@ class SX127x(BaseLoRa) :
         statusIrq = self._statusIrq
         if self._statusWait == self.STATUS_RX_CONTINUOUS :
             self._statusIrq = 0x0000
+        return self._statusFromIrq(statusIrq)
+
+    def _statusFromIrq(self, statusIrq: int) -> int :
 
         # get status for transmit and receive operation based on status IRQ
         if statusIrq & self.IRQ_RX_TIMEOUT : return self.STATUS_RX_TIMEOUT
         elif statusIrq & self.IRQ_CRC_ERR : return self.STATUS_CRC_ERR
         elif statusIrq & self.IRQ_TX_DONE : return self.STATUS_TX_DONE
         elif statusIrq & self.IRQ_RX_DONE : return self.STATUS_RX_DONE
+        elif statusIrq & self.IRQ_CAD_DETECTED : return self.STATUS_CAD_DETECTED
+        elif statusIrq & self.IRQ_CAD_DONE : return self.STATUS_CAD_DONE
 
         # return TX or RX wait status
         return self._statusWait
@@ -706,29 +830,42 @@ class SX127x(BaseLoRa) :
         # get data rate last transmitted package in kbps
         return self._payloadTxRx / self._transmitTime
 
-    def packetRssi(self) -> float :
+    def packetRssi(self) -> Optional[float] :
 
-        # get relative signal strength index (RSSI) of last incoming package
-        offset = self.RSSI_OFFSET_HF
-        if self._frequency < self.BAND_THRESHOLD :
-            offset = self.RSSI_OFFSET_LF
-        if self.readRegister(self.REG_VERSION) == 0x22 :
-            offset = self.RSSI_OFFSET
-        return self.readRegister(self.REG_PKT_RSSI_VALUE) - offset
+        # get relative signal strength index (RSSI) of last incoming package, None when last receive ended without packet
+        if self._packetInfo is not None : return self._packetInfo.rssi
+        return self.readRegister(self.REG_PKT_RSSI_VALUE) - self._rssiOffset()
 
     def rssi(self) -> float :
 
+        return self.readRegister(self.REG_RSSI_VALUE) - self._rssiOffset()
+
+    def snr(self) -> Optional[float] :
+
+        # get signal to noise ratio (SNR) of last incoming package, None when last receive ended without packet
+        # register value is two's complement
+        if self._packetInfo is not None : return self._packetInfo.snr
+        snrPkt = self.readRegister(self.REG_PKT_SNR_VALUE)
+        if snrPkt > 127 : snrPkt = snrPkt - 256
+        return snrPkt / 4.0
+
+    def signalRssi(self) -> Optional[float] :
+
+        # get signal strength of last incoming package, SNR added when signal below noise floor, None when last receive ended without packet
+        if self._packetInfo is not None : return self._packetInfo.signalRssi
+        snr = self.snr()
+        if snr < 0 : return self.packetRssi() + snr
+        return self.packetRssi()
+
+    def _rssiOffset(self) -> int :
+
+        # silicon version read once in reset()
         offset = self.RSSI_OFFSET_HF
         if self._frequency < self.BAND_THRESHOLD :
             offset = self.RSSI_OFFSET_LF
-        if self.readRegister(self.REG_VERSION) == 0x22 :
+        if self._version == 0x22 :
             offset = self.RSSI_OFFSET
-        return self.readRegister(self.REG_RSSI_VALUE) - offset
-
-    def snr(self) -> float :
-
-        # get signal to noise ratio (SNR) of last incoming package
-        return self.readRegister(self.REG_PKT_SNR_VALUE) / 4.0
+        return offset
 
 ### INTERRUPT HANDLER METHODS ###
 
@@ -737,13 +874,14 @@ class SX127x(BaseLoRa) :
         # calculate transmit time
         self._transmitTime = time.time() - self._transmitTime
 
-        # store IRQ status as TX done
-        self._statusIrq = self.IRQ_TX_DONE
-
         # set back txen and rxen pin to previous state
         if self._txen != -1 and self._rxen != -1 :
-            gpio.output(self._txen, self._txState)
-            gpio.output(self._rxen, self._rxState)
+            self._transport.output(self._txen, self._txState)
+            self._transport.output(self._rxen, self._rxState)
+
+        # store IRQ status as TX done and wake up waiting thread
+        self._statusIrq = self.IRQ_TX_DONE
+        self._irqSignal()
 
         # call onTransmit function
         if callable(self._onTransmit) :
@@ -751,23 +889,28 @@ class SX127x(BaseLoRa) :
 
     def _interruptRx(self, channel) :
 
-        # store IRQ status
-        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
+        timestamp = time.monotonic()
+        # get IRQ status
+        statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
         # set IRQ status to RX done when interrupt occured before register updated
-        if not self._statusIrq & 0xF0 :
-            self._statusIrq = self.IRQ_RX_DONE
+        if not statusIrq & 0xF0 :
+            statusIrq = self.IRQ_RX_DONE
 
         # terminate receive mode by setting mode to standby
         self.writeBits(self.REG_OP_MODE, self.MODE_STDBY, 0, 3)
 
         # set back txen and rxen pin to previous state
         if self._txen != -1 and self._rxen != -1 :
-            gpio.output(self._txen, self._txState)
-            gpio.output(self._rxen, self._rxState)
+            self._transport.output(self._txen, self._txState)
+            self._transport.output(self._rxen, self._rxState)
 
-        # set pointer to RX buffer base address and get packet payload length
+        # set pointer to RX buffer base address and get packet payload length and packet info
         self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
         self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+        self._capturePacketInfo(statusIrq, timestamp)
+        # store IRQ status after payload length ready and wake up waiting thread
+        self._statusIrq = statusIrq
+        self._irqSignal()
 
         # call onReceive function
         if callable(self._onReceive) :
@@ -775,23 +918,56 @@ class SX127x(BaseLoRa) :
 
     def _interruptRxContinuous(self, channel) :
 
-        # store IRQ status
-        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
+        timestamp = time.monotonic()
+        # get IRQ status
+        statusIrq = self.readRegister(self.REG_IRQ_FLAGS)
         # set IRQ status to RX done when interrupt occured before register updated
-        if not self._statusIrq & 0xF0 :
-            self._statusIrq = self.IRQ_RX_DONE
+        if not statusIrq & 0xF0 :
+            statusIrq = self.IRQ_RX_DONE
 
         # clear IRQ flag from last TX or RX operation
         self.writeRegister(self.REG_IRQ_FLAGS, 0xFF)
 
-        # set pointer to RX buffer base address and get packet payload length
+        # set pointer to RX buffer base address and get packet payload length and packet info
         self.writeRegister(self.REG_FIFO_ADDR_PTR, self.readRegister(self.REG_FIFO_RX_CURRENT_ADDR))
         self._payloadTxRx = self.readRegister(self.REG_RX_NB_BYTES)
+        self._capturePacketInfo(statusIrq, timestamp)
+        # read packet to RX queue before next packet overwrite it when RX queue enabled
+        if self._rxQueue is not None :
+            self._queuePacket(statusIrq)
+        # store IRQ status after payload length ready and wake up waiting thread
+        self._statusIrq = statusIrq
+        self._irqSignal()
 
         # call onReceive function
         if callable(self._onReceive) :
             self._onReceive()
 
+    def _interruptCad(self, channel) :
+
+        # set back txen and rxen pin to previous state
+        if self._txen != -1 and self._rxen != -1 :
+            self._transport.output(self._txen, self._txState)
+            self._transport.output(self._rxen, self._rxState)
+        # store IRQ status and wake up waiting thread, device go to standby after CAD done
+        self._statusIrq = self.readRegister(self.REG_IRQ_FLAGS) | self.IRQ_CAD_DONE
+        self._irqSignal()
+
+    def _capturePacketInfo(self, statusIrq: int, timestamp: float) :
+
+        # RX timeout leave packet registers of previous packet, so record only IRQ status and timestamp
+        if not statusIrq & self.IRQ_RX_DONE :
+            self._packetInfo = PacketInfo(None, None, None, 0, statusIrq, timestamp)
+            return
+        # packet SNR and RSSI registers are adjacent so both read in single burst transaction
+        (snrPkt, rssiPkt) = self.readRegisterBurst(self.REG_PKT_SNR_VALUE, 2)
+        if snrPkt > 127 : snrPkt = snrPkt - 256
+        snr = snrPkt / 4.0
+        rssi = rssiPkt - self._rssiOffset()
+        signalRssi = rssi
+        if snr < 0 : signalRssi = rssi + snr
+        self._packetInfo = PacketInfo(rssi, snr, signalRssi, self._payloadTxRx, statusIrq, timestamp)
+
     def onTransmit(self, callback) :
 
         # register onTransmit function to call every transmit done
@@ -806,23 +982,55 @@ class SX127x(BaseLoRa) :
 
     def writeBits(self, address: int, data: int, position: int, length: int) :
 
-        read = self._transfer(address & 0x7F, 0x00)
+        # use shadow copy of configuration register when register cache enabled
+        cache = self._regCache
+        cached = cache is not None and address in self._cachedRegisters
+        read = cache.get(address) if cached else None
+        if read is None :
+            if cached : self._regCacheMiss += 1
+            read = self._transfer(address & 0x7F, 0x00)
+        else :
+            self._regCacheHit += 1
         mask = (0xFF >> (8 - length)) << position
         write = (data << position) | (read & ~mask)
-        self._transfer(address | 0x80, write)
+        # skip writing unchanged register value
+        if write != read :
+            self._transfer(address | 0x80, write)
+        elif cached :
+            self._regCacheHit += 1
+        if cached : cache[address] = write
 
     def writeRegister(self, address: int, data: int) :
 
         self._transfer(address | 0x80, data)
+        # keep register cache coherent with direct register write
+        if self._regCache is not None and address in self._cachedRegisters :
+            self._regCache[address] = data
 
     def readRegister(self, address: int) ->int:
 
         return self._transfer(address & 0x7F, 0x00)
 
+    def writeRegisterBurst(self, address: int, data) :
+
+        # burst write, FIFO address keep pointing to FIFO and other address auto increment
+        if not len(data) : return
+        buf = [address | 0x80]
+        buf.extend(data)
+        self._transport.xfer(buf)
+
+    def readRegisterBurst(self, address: int, length: int) -> list :
+
+        # burst read, FIFO address keep pointing to FIFO and other address auto increment
+        if length <= 0 : return []
+        buf = [address & 0x7F] + [0x00] * length
+        feedback = self._transport.xfer(buf)
+        return feedback[1:]
+
     def _transfer(self, address: int, data: int) ->int:
 
         buf = [address, data]
-        feedback = spi.xfer2(buf)
+        feedback = self._transport.xfer(buf)
         if (len(feedback) == 2) :
             return int(feedback[1])
         return -1
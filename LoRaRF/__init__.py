@@ -1,3 +1,14 @@
 # __init__.py
 from .SX126x import SX126x
 from .SX127x import SX127x
+from .base import RxPacket, PacketInfo, TxReport, LbtReport
+from .airtime import timeOnAir, timeOnAirArray, FAMILY_SX126X, FAMILY_SX127X
+from .rxdutycycle import listenPeriods, minPreambleLength, missProbability, listenReport
+from .metrics import Metrics, InstrumentedTransport
+from .transport import BaseTransport, SpiGpioTransport
+from .emulator import SX126xEmulator, SX127xEmulator
+from .trace import TraceRecorder, TraceReader, TraceReplay
+from .gateway import Gateway, GatewayPacket, RadioStats
+from .dutycycle import DutyCycleScheduler, EU868_SUBBANDS
+from .schema import PayloadSchema
+from .fragment import Fragmenter, Reassembler, fragmentLength
@@ -0,0 +1,59 @@
+import math
+
+HEADER_EXPLICIT                            = 0x00        # explicit header mode
+HEADER_IMPLICIT                            = 0x01        # implicit header mode
+
+# chip family, SX126x SF5 and SF6 use different preamble sync and payload bits than SX127x
+FAMILY_SX126X                              = 0x00
+FAMILY_SX127X                              = 0x01
+
+# low data rate optimization is mandated when symbol time exceed 16 ms
+LDRO_SYMBOL_TIME                           = 0.016
+
+def timeOnAir(sf: int, bw: int, cr: int, payloadLength: int, preambleLength: int = 12, headerType: int = HEADER_EXPLICIT, crcType: bool = True, ldro: bool = False,
+    family: int = FAMILY_SX126X) -> float :
+    """Calculate time on air of a LoRa packet in second, ldro None to select LDRO from symbol time"""
+
+    # symbol time from spreading factor and bandwidth in Hz
+    tSym = (1 << sf) / bw
+    if ldro is None : ldro = tSym >= LDRO_SYMBOL_TIME
+    # explicit header add 20 bits of header to payload
+    header = 0
+    if headerType != HEADER_IMPLICIT : header = 1
+    crc = 0
+    if crcType : crc = 1
+    de = 0
+    if ldro : de = 1
+
+    # SX126x SF5 and SF6 use longer preamble sync and no extra bits for header and CRC (Semtech formula)
+    # SX127x datasheet use the same formula for every spreading factor
+    if sf < 7 and family == FAMILY_SX126X :
+        nPreamble = preambleLength + 6.25
+        nBits = 8 * payloadLength + 16 * crc - 4 * sf + 20 * header
+    else :
+        nPreamble = preambleLength + 4.25
+        nBits = 8 * payloadLength + 16 * crc - 4 * sf + 8 + 20 * header
+    nPayload = 8 + max(math.ceil(nBits / (4 * (sf - 2 * de))), 0) * cr
+
+    return (nPreamble + nPayload) * tSym
+
+def timeOnAirArray(sf, bw, cr, payloadLength, preambleLength = 12, headerType = HEADER_EXPLICIT, crcType = True, ldro = False, family = FAMILY_SX126X) :
+    """Calculate time on air in second of many LoRa packets using NumPy, arguments are scalars or arrays broadcast against each other"""
+
+    import numpy as np
+
+    sf = np.asarray(sf, dtype=np.int64)
+    payloadLength = np.asarray(payloadLength, dtype=np.int64)
+    tSym = np.ldexp(1.0, sf) / np.asarray(bw, dtype=np.float64)
+    header = (np.asarray(headerType) != HEADER_IMPLICIT).astype(np.int64)
+    crc = np.asarray(crcType, dtype=bool).astype(np.int64)
+    if ldro is None : de = (tSym >= LDRO_SYMBOL_TIME).astype(np.int64)
+    else : de = np.asarray(ldro, dtype=bool).astype(np.int64)
+
+    # same Semtech formula as timeOnAir() with SF5 and SF6 branch selected per element
+    low = (sf < 7) & (np.asarray(family) == FAMILY_SX126X)
+    nPreamble = np.asarray(preambleLength) + np.where(low, 6.25, 4.25)
+    nBits = 8 * payloadLength + 16 * crc - 4 * sf + 20 * header + np.where(low, 0, 8)
+    nPayload = 8 + np.maximum(np.ceil(nBits / (4 * (sf - 2 * de))), 0) * np.asarray(cr)
+
+    return (nPreamble + nPayload) * tSym
@@ -1,3 +1,22 @@
+import asyncio
+import random
+import time
+from collections import deque, namedtuple
+from . import airtime
+from .metrics import InstrumentedTransport, _timedCall, _timedBusyCheck
+
+# received packet record stored by RX queue, timestamp from time.monotonic() when interrupt handled
+RxPacket = namedtuple('RxPacket', ['payload', 'status', 'rssi', 'snr', 'timestamp'])
+
+# metadata of received packet captured once when receive done, timestamp from time.monotonic()
+PacketInfo = namedtuple('PacketInfo', ['rssi', 'snr', 'signalRssi', 'length', 'irq', 'timestamp'])
+
+# result of transmitting many packets, status of every packet and achieved versus airtime bound packet rate
+TxReport = namedtuple('TxReport', ['results', 'elapsed', 'packetRate', 'maxPacketRate'])
+
+# result of listen before talk transmit, number of attempts, ratio of busy CAD of completed CAD in this transmit, and number of CAD failed by driver error
+LbtReport = namedtuple('LbtReport', ['status', 'attempts', 'busyRatio', 'errors'])
+
 class BaseLoRa :
 
     def begin(self):
@@ -32,3 +51,309 @@ class BaseLoRa :
 
     def status(self):
         raise NotImplementedError
+
+    def requestCad(self)-> bool:
+        raise NotImplementedError
+
+### PACKET INFO METHODS ###
+
+    _packetInfo = None
+
+    def packetInfo(self) :
+
+        # get metadata of last received packet captured in interrupt handler or wait(), None before any packet
+        return self._packetInfo
+
+    def getPacket(self) -> tuple :
+
+        # get remaining payload of received packet together with its metadata
+        return (self.get(self.available()), self._packetInfo)
+
+### MULTI PACKET TRANSMIT METHODS ###
+
+    def _txReport(self, results: list, start: float, airtime: float) -> TxReport :
+
+        # packet rate in packets per second, maximum rate when radio transmit without any gap
+        elapsed = time.monotonic() - start
+        packetRate = 0.0
+        maxPacketRate = 0.0
+        if elapsed > 0 : packetRate = len(results) / elapsed
+        if airtime > 0 : maxPacketRate = len(results) / airtime
+        return TxReport(results, elapsed, packetRate, maxPacketRate)
+
+### LISTEN BEFORE TALK METHODS ###
+
+    def sendLbt(self, payload, maxAttempts: int = 8, minBackoff: float = 10, maxBackoff: float = 1000, exponential: bool = True) -> LbtReport :
+
+        # transmit payload after channel activity detection found channel free, random backoff in ms between attempts
+        # backoff window double every busy attempt from minBackoff up to maxBackoff when exponential, otherwise uniform between both
+        # status is TX status when transmitted, STATUS_CAD_DETECTED when channel busy on all completed CAD, or STATUS_CAD_WAIT when no CAD completed
+        cadTimeout = 16 * (1 << self._sf) / self._bw + 0.01
+        window = minBackoff
+        cads = 0
+        busy = 0
+        errors = 0
+        for attempt in range(1, maxAttempts + 1) :
+            # CAD not started or not done in time is driver error, not channel activity
+            if not self.requestCad() :
+                errors += 1
+            elif not self.wait(cadTimeout) :
+                self.standby()
+                errors += 1
+            else :
+                cads += 1
+                if self.status() == self.STATUS_CAD_DONE :
+                    status = self._transmitWait(payload)
+                    return LbtReport(status, attempt, busy / cads, errors)
+                busy += 1
+            if attempt == maxAttempts : break
+            if exponential :
+                delay = random.uniform(0, window)
+                window = min(window * 2, maxBackoff)
+            else :
+                delay = random.uniform(minBackoff, maxBackoff)
+            time.sleep(delay / 1000)
+        self.standby()
+        status = self.STATUS_CAD_DETECTED if busy else self.STATUS_CAD_WAIT
+        return LbtReport(status, maxAttempts, busy / cads if cads else 0.0, errors)
+
+    def _transmitWait(self, payload) -> int :
+
+        # transmit payload and wait bounded by its time on air so lost TX done interrupt does not block caller
+        # return STATUS_DEFAULT when transmit not started and STATUS_TX_TIMEOUT when transmit not done in time
+        self.beginPacket()
+        self.put(payload)
+        if not self.endPacket() : return self.STATUS_DEFAULT
+        if not self.wait(self._txWaitTimeout(len(payload))) :
+            self.standby()
+            return self.STATUS_TX_TIMEOUT
+        return self.status()
+
+    def _txWaitTimeout(self, length: int) -> float :
+
+        # host wait timeout in second for TX done of packet with payload length, twice time on air with one second margin
+        return 2 * self.timeOnAir(length) / 1000 + 1.0
+
+### REGISTER CACHE METHODS ###
+
+    # shadow copy of configuration registers, None when register cache disabled
+    _regCache = None
+    _regCacheHit = 0
+    _regCacheMiss = 0
+
+    def setRegisterCache(self, enable: bool) :
+
+        # keep shadow copy of configuration registers so read-modify-write become single write
+        # and writing unchanged value is skipped, disabled by default
+        if enable :
+            self._regCache = {}
+        else :
+            self._regCache = None
+        self._regCacheHit = 0
+        self._regCacheMiss = 0
+
+    def registerCacheStats(self) -> tuple :
+
+        # get number of SPI transactions avoided by register cache and number of register read need SPI transaction
+        return (self._regCacheHit, self._regCacheMiss)
+
+    def _invalidateRegisterCache(self) :
+
+        # register content lost or changed meaning after reset, sleep, or modem change
+        if self._regCache is not None :
+            self._regCache.clear()
+
+### INSTRUMENTATION METHODS ###
+
+    _metrics = None
+    # public API calls timed when metrics enabled
+    _timedMethods = ('beginPacket', 'put', 'endPacket', 'request', 'wait', 'get', 'sendMany')
+
+    def setMetrics(self, metrics = None) :
+
+        # collect SPI transfer, busy wait, and API call metrics into Metrics object, None to disable
+        # transport and methods of this object are only wrapped while enabled so disabled radio has no overhead
+        if self._metrics is not None :
+            if isinstance(self._transport, InstrumentedTransport) :
+                self._transport = self._transport.transport
+            for name in self._timedMethods + ('busyCheck',) :
+                self.__dict__.pop(name, None)
+        self._metrics = metrics
+        if metrics is None : return
+        self._transport = InstrumentedTransport(self._transport, metrics)
+        for name in self._timedMethods :
+            setattr(self, name, _timedCall(metrics, name, getattr(self, name)))
+        if hasattr(self, 'busyCheck') :
+            self.busyCheck = _timedBusyCheck(metrics, self.busyCheck)
+
+    def _commandDropped(self, opCode: int) :
+
+        # called when command not sent because busy timeout
+        if self._metrics is not None :
+            self._metrics.count('commands_dropped', "0x{:02x}".format(opCode))
+
+### AIRTIME METHODS ###
+
+    # chip family selecting time on air formula of SF5 and SF6
+    _airtimeFamily = airtime.FAMILY_SX126X
+
+    def timeOnAir(self, payloadLength: int = None) -> float :
+
+        # calculate time on air in millisecond of LoRa packet using current modulation and packet parameter
+        # payload length from last setLoRaPacket() used when not specified
+        if payloadLength is None : payloadLength = self._payloadLength
+        return airtime.timeOnAir(self._sf, self._bw, self._cr, payloadLength, self._preambleLength, self._headerType, self._crcType, self._ldro, self._airtimeFamily) * 1000
+
+### RX QUEUE METHODS ###
+
+    _rxQueue = None
+    _rxQueueSize = 0
+    _rxReceived = 0
+    _rxOverflow = 0
+
+    def setRxQueue(self, size: int) :
+
+        # enable bounded queue of received packets filled by RX continuous interrupt handler, 0 to disable
+        # packets are read by interrupt handler so available() and read() are not used while queue enabled
+        if size > 0 :
+            self._rxQueue = deque()
+        else :
+            self._rxQueue = None
+        self._rxQueueSize = size
+        self._rxReceived = 0
+        self._rxOverflow = 0
+
+    def popPacket(self) :
+
+        # get oldest received packet record from RX queue, None when queue empty
+        if self._rxQueue :
+            return self._rxQueue.popleft()
+        return None
+
+    def rxQueueStatus(self) -> tuple :
+
+        # get number of queued packets, number of packets received, and number of packets dropped on full queue
+        queued = 0
+        if self._rxQueue is not None : queued = len(self._rxQueue)
+        return (queued, self._rxReceived, self._rxOverflow)
+
+    def _queuePacket(self, statusIrq: int) :
+
+        # called by interrupt handler thread after packet info captured, only this thread append so length check and append do not race
+        self._rxReceived += 1
+        if len(self._rxQueue) >= self._rxQueueSize :
+            # drop newest packet and keep queued packets order
+            self._rxOverflow += 1
+            self._payloadTxRx = 0
+            return
+        payload = self.get(self._payloadTxRx)
+        info = self._packetInfo
+        packet = RxPacket(payload, self._statusFromIrq(statusIrq), info.rssi, info.snr, info.timestamp)
+        self._rxQueue.append(packet)
+
+### ASYNCIO METHODS ###
+
+    # called from interrupt handler thread after IRQ status stored
+    _irqNotify = None
+
+    def _irqSignal(self) :
+
+        # wake up thread blocked in wait() and event loop waiting for interrupt
+        self._irqEvent.set()
+        notify = self._irqNotify
+        if notify is not None : notify()
+
+    async def send(self, payload) -> bool :
+
+        # transmit bytes payload and wait until transmit done without blocking event loop
+        self.beginPacket()
+        self.put(payload)
+        return await self._operationAsync(self.endPacket, 0)
+
+    async def receive(self, timeout: int = 0) :
+
+        # receive single packet with RX timeout in ms, return payload or None on timeout and error
+        # RX timeout may not be routed to IRQ pin so also bound waiting time in event loop
+        if not await self._operationAsync(self.request, timeout, timeout / 1000) : return None
+        if self.status() != self.STATUS_RX_DONE : return None
+        return self.get(self.available())
+
+    async def packets(self) :
+
+        # continuous receive operation, yield payload of every packet received without error
+        # call aclose() of generator after break so RX continuous stopped before next operation started
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def received() :
+            # read packet in interrupt handler thread before next packet arrive
+            status = self.status()
+            payload = self.get(self.available())
+            loop.call_soon_threadsafe(queue.put_nowait, (status, payload))
+
+        # RX queue already read packet in interrupt handler so only wake up event loop
+        ready = asyncio.Event()
+        rxQueue = self._irq != -1 and self._rxQueue is not None
+        notify = None
+        if rxQueue : notify = lambda : loop.call_soon_threadsafe(ready.set)
+        elif self._irq != -1 : notify = received
+        self._irqNotify = notify
+        owner = object()
+        self._rxOwner = owner
+        try :
+            self.request(self.RX_CONTINUOUS)
+            while True :
+                if rxQueue :
+                    packet = self.popPacket()
+                    if packet is None :
+                        ready.clear()
+                        if not self._rxQueue : await ready.wait()
+                        continue
+                    status, payload = packet.status, packet.payload
+                elif self._irq != -1 :
+                    status, payload = await queue.get()
+                elif self.wait(0.000001) :
+                    status = self.status()
+                    payload = self.get(self.available())
+                else :
+                    await asyncio.sleep(self._pollInterval)
+                    continue
+                if status == self.STATUS_RX_DONE : yield payload
+        finally :
+            # generator closed late by event loop must not stop or unhook operation started after it
+            if self._irqNotify is notify : self._irqNotify = None
+            if self._rxOwner is owner and self._statusWait == self.STATUS_RX_CONTINUOUS : self.standby()
+
+    # owner token of last continuous receive started by packets()
+    _rxOwner = None
+
+    async def _operationAsync(self, start, arg, timeout: float = 0) -> bool :
+
+        # start transmit or receive operation and await interrupt or poll IRQ status with event loop sleep
+        # timeout in second (0 for no timeout), device set to standby and return false when timeout
+        loop = asyncio.get_running_loop()
+        done = asyncio.Event()
+        if self._irq != -1 : self._irqNotify = lambda : loop.call_soon_threadsafe(done.set)
+        try :
+            if not start(arg) : return False
+            if self._irq != -1 :
+                if not self._statusIrq :
+                    if timeout > 0 : await asyncio.wait_for(done.wait(), timeout + self._pollInterval)
+                    else : await done.wait()
+            else :
+                t = time.monotonic()
+                while not self.wait(0.000001) :
+                    if timeout > 0 and time.monotonic() - t > timeout + self._pollInterval :
+                        self.standby()
+                        return False
+                    await asyncio.sleep(self._pollInterval)
+        except asyncio.TimeoutError :
+            self.standby()
+            return False
+        except asyncio.CancelledError :
+            # leave TX or RX mode when cancelled
+            self.standby()
+            raise
+        finally :
+            self._irqNotify = None
+        return True
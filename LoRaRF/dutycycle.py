@@ -0,0 +1,193 @@
+import bisect
+import time
+from collections import deque
+
+# EU868 sub-bands from ETSI EN 300 220 as (lower frequency, upper frequency, duty cycle)
+EU868_SUBBANDS = (
+    (863000000, 865000000, 0.001),
+    (865000000, 868000000, 0.01),
+    (868000000, 868600000, 0.01),
+    (868700000, 869200000, 0.001),
+    (869400000, 869650000, 0.1),
+    (869700000, 870000000, 0.01)
+)
+
+class _SubBand :
+
+    def __init__(self, low: int, high: int, dutyCycle: float, window: float) :
+
+        self.low = low
+        self.high = high
+        self.dutyCycle = dutyCycle
+        self.window = window
+        self.budget = dutyCycle * window
+        # start time and cumulative airtime of every transmission, entries before head already left the window
+        self.starts = []
+        self.cumulative = []
+        self.head = 0
+        self.total = 0.0
+        self.expired = 0.0
+        self.pending = deque()
+
+    def expire(self, now: float) :
+
+        # drop transmissions started before window, each entry dropped once so amortized constant time
+        # expiry time computed same as earliest() so transmission leave the window exactly at returned time
+        window = self.window
+        starts = self.starts
+        while self.head < len(starts) and starts[self.head] + window <= now :
+            self.expired = self.cumulative[self.head]
+            self.head += 1
+        if self.head > 64 and self.head * 2 > len(starts) :
+            del starts[:self.head]
+            del self.cumulative[:self.head]
+            self.head = 0
+
+    def used(self, now: float) -> float :
+
+        self.expire(now)
+        return self.total - self.expired
+
+    def earliest(self, now: float, airtime: float) -> float :
+
+        # earliest time airtime fit in budget, constant time when enough budget left
+        if airtime > self.budget : return float('inf')
+        excess = self.used(now) + airtime - self.budget
+        if excess <= 0 : return now
+        # otherwise first transmission whose expiry free enough airtime found by binary search of cumulative airtime in
+        # logarithmic time, airtime differ between packets so searched value is not monotonic and head pointer can not be used
+        index = bisect.bisect_left(self.cumulative, self.expired + excess - 1e-9, self.head)
+        return self.starts[index] + self.window
+
+    def record(self, start: float, airtime: float) :
+
+        self.total += airtime
+        self.starts.append(start)
+        self.cumulative.append(self.total)
+
+
+class DutyCycleScheduler :
+    """Transmit scheduler keeping airtime of every sub-band within duty cycle over sliding window"""
+
+    def __init__(self, radio, frequency: int, subBands: tuple = EU868_SUBBANDS, window: float = 3600.0, clock = time.monotonic, sleep = time.sleep) :
+
+        # radio must be begun with modulation and packet parameter set, frequency set by scheduler
+        # sleep function is given together with clock so blocking send can be simulated
+        self._radio = radio
+        self._clock = clock
+        self._sleep = sleep
+        self._bands = [_SubBand(low, high, dutyCycle, window) for (low, high, dutyCycle) in subBands]
+        self._frequency = None
+        self.setFrequency(frequency)
+
+    def setFrequency(self, frequency: int) :
+
+        # set default frequency of radio for transmit without frequency argument
+        self._band(frequency)
+        if frequency != self._frequency :
+            self._radio.setFrequency(frequency)
+            self._frequency = frequency
+
+    def earliest(self, payloadLength: int, frequency: int = None) -> float :
+
+        # earliest clock time when packet with payload length allowed to transmit, inf when never fit the budget
+        airtime = self._radio.timeOnAir(payloadLength) / 1000
+        return self._band(frequency).earliest(self._clock(), airtime)
+
+    def usage(self, frequency: int = None) -> tuple :
+
+        # airtime used in current window and airtime budget of sub-band in second
+        band = self._band(frequency)
+        return (band.used(self._clock()), band.budget)
+
+    def record(self, airtime: float, frequency: int = None, start: float = None) :
+
+        # account transmission done outside scheduler with airtime in ms
+        if start is None : start = self._clock()
+        self._band(frequency).record(start, airtime / 1000)
+
+    def send(self, payload, frequency: int = None, block: bool = True) -> bool :
+
+        # transmit when allowed by duty cycle, otherwise sleep until allowed or return false when not blocking
+        band = self._band(frequency)
+        airtime = self._radio.timeOnAir(len(payload)) / 1000
+        allowed = band.earliest(self._clock(), airtime)
+        if allowed == float('inf') :
+            raise ValueError("packet time on air exceed duty cycle budget of sub-band")
+        delay = allowed - self._clock()
+        if delay > 0 :
+            if not block : return False
+            self._sleep(delay)
+        return self._transmit(band, payload, frequency, airtime)
+
+    def enqueue(self, payload, frequency: int = None) :
+
+        # queue packet to be transmitted by process() when allowed, packets of a sub-band keep their order
+        band = self._band(frequency)
+        airtime = self._radio.timeOnAir(len(payload)) / 1000
+        if airtime > band.budget :
+            raise ValueError("packet time on air exceed duty cycle budget of sub-band")
+        if frequency is None : frequency = self._frequency
+        band.pending.append((payload, frequency, airtime))
+
+    def process(self) -> int :
+
+        # transmit queued packets already allowed, return number of packets transmitted
+        sent = 0
+        for band in self._bands :
+            while band.pending :
+                payload, frequency, airtime = band.pending[0]
+                if band.earliest(self._clock(), airtime) > self._clock() : break
+                band.pending.popleft()
+                self._transmit(band, payload, frequency, airtime)
+                sent += 1
+        return sent
+
+    def pending(self) -> int :
+
+        return sum(len(band.pending) for band in self._bands)
+
+    def nextDue(self) -> float :
+
+        # earliest clock time when a queued packet allowed to transmit, None when queue empty
+        due = None
+        now = self._clock()
+        for band in self._bands :
+            if band.pending :
+                allowed = band.earliest(now, band.pending[0][2])
+                if due is None or allowed < due : due = allowed
+        return due
+
+    def _band(self, frequency: int = None) -> _SubBand :
+
+        if frequency is None : frequency = self._frequency
+        for band in self._bands :
+            if band.low <= frequency < band.high : return band
+        raise ValueError("frequency {} Hz is not in any sub-band".format(frequency))
+
+    def _transmit(self, band: _SubBand, payload, frequency: int, airtime: float) -> bool :
+
+        # radio tuned to frequency of this packet only, default frequency set back after transmit
+        radio = self._radio
+        if frequency is None or frequency == self._frequency :
+            return self._transmitPacket(band, payload, airtime)
+        radio.setFrequency(frequency)
+        result = self._transmitPacket(band, payload, airtime)
+        radio.setFrequency(self._frequency)
+        return result
+
+    def _transmitPacket(self, band: _SubBand, payload, airtime: float) -> bool :
+
+        # account computed time on air or measured transmit time whichever longer
+        radio = self._radio
+        radio.beginPacket()
+        radio.put(payload)
+        start = self._clock()
+        radio.endPacket()
+        # lost TX done interrupt must not block scheduler, packet may be transmitted so its airtime still accounted
+        if not radio.wait(2 * airtime + 1.0) :
+            radio.standby()
+            band.record(start, airtime)
+            return False
+        band.record(start, max(airtime, radio.transmitTime() / 1000))
+        return radio.status() == radio.STATUS_TX_DONE
@@ -0,0 +1,1078 @@
+from .transport import BaseTransport
+from .airtime import timeOnAir, FAMILY_SX127X
+from collections import deque
+import threading
+import heapq
+import time
+
+class _Emulator(BaseTransport) :
+    """Base class of LoRa chip emulator handling GPIO pins, event timing and interrupt dispatch"""
+
+    def __init__(self, timeScale: float = 1.0) :
+
+        # time scale multiply every chip timing, 0 complete operations immediately
+        self._timeScale = timeScale
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._events = []
+        self._cancelled = set()
+        self._seq = 0
+        self._levels = {}
+        self._callbacks = {}
+        self._edges = {}
+        self._pending = deque()
+        self._thread = None
+        self._opened = False
+        self._peer = None
+        self._rxQueue = deque()
+        # packets transmitted by emulated chip
+        self.transmitted = deque(maxlen=1024)
+
+### TRANSPORT INTERFACE ###
+
+    def open(self, bus: int, cs: int, speed: int) :
+
+        self._opened = True
+
+    def close(self) :
+
+        self._opened = False
+
+    def xfer(self, buf: list) -> list :
+
+        with self._lock :
+            self._advance()
+            return self._command(list(buf))
+
+    def setup(self, pin: int, direction: int) :
+
+        with self._lock :
+            self._levels.setdefault(pin, self.LOW)
+
+    def output(self, pin: int, value: int) :
+
+        with self._lock :
+            self._advance()
+            previous = self._levels.get(pin, self.LOW)
+            self._levels[pin] = value
+            if previous != value : self._pinChanged(pin, value)
+
+    def input(self, pin: int) -> int :
+
+        with self._lock :
+            self._advance()
+            return self._readPin(pin)
+
+    def addEdgeCallback(self, pin: int, callback) :
+
+        with self._lock :
+            self._callbacks[pin] = callback
+            self._startThread()
+
+    def removeEdgeCallback(self, pin: int) :
+
+        with self._lock :
+            self._callbacks.pop(pin, None)
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+
+        with self._cond :
+            self._startThread()
+            count = self._edges.get(pin, 0)
+            if timeout <= 0 : timeout = None
+            return self._cond.wait_for(lambda : self._edges.get(pin, 0) != count, timeout)
+
+    def cleanup(self) :
+
+        with self._lock :
+            self._callbacks.clear()
+
+### EMULATED RADIO LINK ###
+
+    def connect(self, peer) :
+
+        # packets transmitted by this chip are received by peer chip and vice versa
+        self._peer = peer
+        peer._peer = self
+
+    def inject(self, payload, rssi: float = -60.0, snr: float = 10.0, crcError: bool = False, airtime: float = None) :
+
+        # queue an incoming packet, reception start when chip in RX mode
+        with self._lock :
+            self._advance()
+            self._rxQueue.append((bytes(payload), rssi, snr, crcError, airtime))
+            self._packetArrived()
+
+    def _transmitToPeer(self, payload: bytes, airtime: float) :
+
+        # deliver directly when peer lock is free, otherwise from worker thread to avoid deadlock
+        if self._peer is None : return
+        peer = self._peer
+        if peer._lock.acquire(blocking=False) :
+            try : peer.inject(payload, airtime=airtime)
+            finally : peer._lock.release()
+            return
+        self._pending.append((lambda pin : peer.inject(payload, airtime=airtime), -1))
+        self._startThread()
+        self._cond.notify_all()
+
+### EVENT SCHEDULER ###
+
+    def _now(self) -> float :
+
+        return time.monotonic()
+
+    def _schedule(self, delay: float, fn, *args) -> int :
+
+        # schedule chip internal event after delay in second (scaled by time scale)
+        self._seq += 1
+        heapq.heappush(self._events, (self._now() + delay * self._timeScale, self._seq, fn, args))
+        self._startThread()
+        self._cond.notify_all()
+        return self._seq
+
+    def _cancel(self, event: int) :
+
+        if event : self._cancelled.add(event)
+
+    def _advance(self) :
+
+        # run all chip events which deadline already passed
+        now = self._now()
+        while self._events and self._events[0][0] <= now :
+            deadline, seq, fn, args = heapq.heappop(self._events)
+            if seq in self._cancelled :
+                self._cancelled.discard(seq)
+                continue
+            fn(*args)
+
+    def _setLevel(self, pin: int, level: int) :
+
+        # set chip output pin level and dispatch callback on rising edge
+        if pin == -1 : return
+        previous = self._levels.get(pin, self.LOW)
+        self._levels[pin] = level
+        if previous == self.LOW and level == self.HIGH :
+            self._edges[pin] = self._edges.get(pin, 0) + 1
+            if pin in self._callbacks :
+                self._pending.append((self._callbacks[pin], pin))
+            self._cond.notify_all()
+
+    def _startThread(self) :
+
+        if self._thread is None :
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) :
+
+        # worker thread run chip events in time and call edge callbacks outside the lock like RPi.GPIO
+        while True :
+            with self._cond :
+                self._advance()
+                callbacks = list(self._pending)
+                self._pending.clear()
+                if not callbacks :
+                    timeout = None
+                    if self._events : timeout = max(self._events[0][0] - self._now(), 0)
+                    self._cond.wait(timeout)
+                    continue
+            for callback, pin in callbacks :
+                callback(pin)
+
+### CHIP SPECIFIC HOOKS ###
+
+    def _command(self, buf: list) -> list :
+        raise NotImplementedError
+
+    def _pinChanged(self, pin: int, value: int) :
+        pass
+
+    def _readPin(self, pin: int) -> int :
+
+        return self._levels.get(pin, self.LOW)
+
+    def _packetArrived(self) :
+        pass
+
+
+class SX126xEmulator(_Emulator) :
+    """Cycle-approximate software model of SX126x chip used as SPI and GPIO transport"""
+
+    # Chip mode in status byte
+    MODE_SLEEP                             = 0x00
+    MODE_STDBY_RC                          = 0x02
+    MODE_STDBY_XOSC                        = 0x03
+    MODE_FS                                = 0x04
+    MODE_RX                                = 0x05
+    MODE_TX                                = 0x06
+
+    # Command status in status byte
+    CMD_DATA_AVAILABLE                     = 0x02
+    CMD_TIMEOUT                            = 0x03
+    CMD_ERROR                              = 0x04
+    CMD_TX_DONE                            = 0x06
+
+    # IRQ flags
+    IRQ_TX_DONE                            = 0x0001
+    IRQ_RX_DONE                            = 0x0002
+    IRQ_PREAMBLE_DETECTED                  = 0x0004
+    IRQ_SYNC_WORD_VALID                    = 0x0008
+    IRQ_HEADER_VALID                       = 0x0010
+    IRQ_CRC_ERR                            = 0x0040
+    IRQ_CAD_DONE                           = 0x0080
+    IRQ_CAD_DETECTED                       = 0x0100
+    IRQ_TIMEOUT                            = 0x0200
+
+    # BUSY pin high duration in second
+    BUSY_COMMAND                           = 0.000005    # register, buffer and parameter commands
+    BUSY_MODE                              = 0.00005     # mode transition commands
+    BUSY_CALIBRATE                         = 0.0035      # calibrate all blocks
+    BUSY_CALIBRATE_IMAGE                   = 0.0012      # image calibration
+    BUSY_RESET                             = 0.0035      # power on reset
+    BUSY_WAKE_WARM                         = 0.00034     # wake from warm start sleep
+    BUSY_WAKE_COLD                         = 0.0035      # wake from cold start sleep
+
+    # LoRa bandwidth in Hz for modulation parameter value
+    BANDWIDTH = {
+        0x00: 7810, 0x08: 10420, 0x01: 15630, 0x09: 20830, 0x02: 31250,
+        0x0A: 41670, 0x03: 62500, 0x04: 125000, 0x05: 250000, 0x06: 500000
+    }
+
+    # Register reset values
+    REGISTER_DEFAULT = {
+        0x0736: 0x0D, 0x0740: 0x14, 0x0741: 0x24, 0x0889: 0x04, 0x08AC: 0x94,
+        0x08D8: 0xC8, 0x08E7: 0x18, 0x0911: 0x05, 0x0912: 0x05
+    }
+
+    def __init__(self, reset: int = 22, busy: int = 23, dio1: int = -1, dio2: int = -1, dio3: int = -1, nss: int = 21, wake: int = -1, timeScale: float = 1.0) :
+
+        super().__init__(timeScale)
+        self._reset = reset
+        self._busy = busy
+        self._dioPins = (dio1, dio2, dio3)
+        self._nss = nss
+        self._wake = wake
+        self._inReset = False
+        self._busyUntil = 0.0
+        self._handlers = {
+            0x80: self._setStandby, 0x84: self._setSleep, 0xC1: self._setFs, 0x83: self._setTx,
+            0x82: self._setRx, 0x94: self._setRxDutyCycle, 0xC5: self._setCad, 0xD1: self._setTxInfinite,
+            0xD2: self._setTxInfinite, 0x89: self._calibrate, 0x98: self._calibrateImage,
+            0x0D: self._writeRegister, 0x1D: self._readRegister, 0x0E: self._writeBuffer,
+            0x1E: self._readBuffer, 0x08: self._setDioIrqParams, 0x12: self._getIrqStatus,
+            0x02: self._clearIrqStatus, 0x86: self._setRfFrequency, 0x8A: self._setPacketType,
+            0x11: self._getPacketType, 0x8B: self._setModulationParams, 0x8C: self._setPacketParams,
+            0x88: self._setCadParams, 0x8F: self._setBufferBaseAddress, 0x93: self._setFallbackMode,
+            0xC0: self._getStatus, 0x13: self._getRxBufferStatus, 0x14: self._getPacketStatus,
+            0x15: self._getRssiInst, 0x10: self._getStats, 0x00: self._resetStats,
+            0x17: self._getDeviceErrors, 0x07: self._clearDeviceErrors
+        }
+        # commands only store its parameters
+        for opCode in (0x9F, 0x96, 0x95, 0x9D, 0x97, 0x8E, 0xA0) :
+            self._handlers[opCode] = self._ignore
+        self._activity = set()
+        self._powerOn()
+
+    def setActivity(self, frequency: int, active: bool = True) :
+
+        # mark a RF frequency in Hz as busy channel for CAD operation
+        with self._lock :
+            rfFreq = int(frequency * 33554432 / 32000000)
+            if active : self._activity.add(rfFreq)
+            else : self._activity.discard(rfFreq)
+
+### CHIP STATE ###
+
+    def _powerOn(self) :
+
+        # set all chip configuration to reset value
+        self._mode = self.MODE_STDBY_RC
+        self._coldConfig()
+        self._cmdStatus = 0
+        self._busyUntil = self._now() + self.BUSY_RESET * self._timeScale
+
+    def _coldConfig(self) :
+
+        self._buffer = bytearray(256)
+        self._registers = bytearray(0x1000)
+        for address, value in self.REGISTER_DEFAULT.items() :
+            self._registers[address] = value
+        self._irqStatus = 0x0000
+        self._irqMask = 0x0000
+        self._dioMask = [0x0000, 0x0000, 0x0000]
+        self._txBase = 0
+        self._rxBase = 0
+        self._rxLength = 0
+        self._rxPointer = 0
+        self._packetType = 0x00
+        self._sf = 7
+        self._bw = 0x04
+        self._cr = 0x01
+        self._ldro = 0
+        self._preambleLength = 12
+        self._headerType = 0x00
+        self._payloadLength = 0xFF
+        self._crcType = 0x01
+        self._fskBitrate = 0x3200
+        self._rfFreq = 0
+        self._fallback = self.MODE_STDBY_RC
+        self._cadParams = (0x03, 0x16, 0x0A, 0x00, 0x000000)
+        self._packetStatus = (0, 0, 0)
+        self._stats = [0, 0, 0]
+        self._deviceErrors = 0x0000
+        self._continuous = False
+        self._receiving = None
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._sleeping = False
+        self._warm = False
+        self._updateDio()
+
+    def _status(self) -> int :
+
+        return (self._mode << 4) | (self._cmdStatus << 1)
+
+    def _isBusy(self) -> bool :
+
+        return self._inReset or self._sleeping or self._now() < self._busyUntil
+
+    def _setBusy(self, duration: float) :
+
+        self._busyUntil = self._now() + duration * self._timeScale
+
+    def _abort(self) :
+
+        # stop ongoing TX, RX or CAD operation
+        self._cancel(self._opEvent)
+        self._cancel(self._timeoutEvent)
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._receiving = None
+
+    def _raiseIrq(self, irq: int) :
+
+        self._irqStatus |= irq & self._irqMask
+        self._updateDio()
+
+    def _updateDio(self) :
+
+        for i in range(3) :
+            level = self.LOW
+            if self._irqStatus & self._dioMask[i] : level = self.HIGH
+            self._setLevel(self._dioPins[i], level)
+
+    def _airtime(self, length: int) -> float :
+
+        # time on air in second based on current modulation and packet parameters
+        if self._packetType == 0x00 :
+            bitrate = 32 * 32000000 / max(self._fskBitrate, 1)
+            return (self._preambleLength + 8 * (length + 7)) / bitrate
+        ldro = self._ldro == 1
+        return timeOnAir(self._sf, self.BANDWIDTH.get(self._bw, 125000), self._cr + 4, length, self._preambleLength, self._headerType, self._crcType == 1, ldro)
+
+    def _symbolTime(self) -> float :
+
+        return (1 << self._sf) / self.BANDWIDTH.get(self._bw, 125000)
+
+### GPIO PINS ###
+
+    def _readPin(self, pin: int) -> int :
+
+        if pin == self._busy :
+            if self._isBusy() : return self.HIGH
+            return self.LOW
+        return self._levels.get(pin, self.LOW)
+
+    def _pinChanged(self, pin: int, value: int) :
+
+        if pin == self._reset :
+            # hold chip in reset while reset pin low and power on when released
+            if value == self.LOW :
+                self._abort()
+                self._inReset = True
+            else :
+                self._inReset = False
+                self._powerOn()
+        elif (pin == self._nss or pin == self._wake) and value == self.LOW :
+            self._wakeUp()
+
+    def _wakeUp(self) :
+
+        # NSS falling edge wake chip from sleep
+        if not self._sleeping : return
+        if self._warm :
+            self._sleeping = False
+            self._setBusy(self.BUSY_WAKE_WARM)
+        else :
+            self._coldConfig()
+            self._setBusy(self.BUSY_WAKE_COLD)
+        self._mode = self.MODE_STDBY_RC
+
+### SPI COMMANDS ###
+
+    def _command(self, buf: list) -> list :
+
+        # command sent while BUSY high is ignored, NSS low wake the chip from sleep
+        if self._isBusy() :
+            self._wakeUp()
+            return [0] * len(buf)
+        out = [self._status()] * len(buf)
+        handler = self._handlers.get(buf[0])
+        if handler is None :
+            self._cmdStatus = self.CMD_ERROR
+            return out
+        self._setBusy(handler(buf, out))
+        return out
+
+    def _ignore(self, buf: list, out: list) -> float :
+
+        return self.BUSY_COMMAND
+
+    def _setStandby(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_STDBY_RC
+        if len(buf) > 1 and buf[1] : self._mode = self.MODE_STDBY_XOSC
+        return self.BUSY_MODE
+
+    def _setSleep(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_SLEEP
+        self._sleeping = True
+        self._warm = len(buf) > 1 and bool(buf[1] & 0x04)
+        return 0.0
+
+    def _setFs(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_FS
+        return self.BUSY_MODE
+
+    def _setTx(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_TX
+        self._cmdStatus = 0
+        # transmit payload from TX base address of data buffer
+        length = self._payloadLength
+        payload = bytes(self._buffer[(self._txBase + i) % 256] for i in range(length))
+        airtime = self._airtime(length)
+        self._opEvent = self._schedule(airtime, self._txDone, payload)
+        timeout = (buf[1] << 16) | (buf[2] << 8) | buf[3]
+        if timeout :
+            self._timeoutEvent = self._schedule(timeout * 0.000015625, self._opTimeout)
+        self._transmitToPeer(payload, airtime)
+        return self.BUSY_MODE
+
+    def _setTxInfinite(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_TX
+        return self.BUSY_MODE
+
+    def _setRx(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_RX
+        self._cmdStatus = 0
+        timeout = (buf[1] << 16) | (buf[2] << 8) | buf[3]
+        self._continuous = timeout == 0xFFFFFF
+        if timeout and not self._continuous :
+            self._timeoutEvent = self._schedule(timeout * 0.000015625, self._opTimeout)
+        self._packetArrived()
+        return self.BUSY_MODE
+
+    def _setRxDutyCycle(self, buf: list, out: list) -> float :
+
+        # packet sniffing receive until a packet received, preamble assumed long enough
+        self._abort()
+        self._mode = self.MODE_RX
+        self._cmdStatus = 0
+        self._continuous = False
+        self._packetArrived()
+        return self.BUSY_MODE
+
+    def _setCad(self, buf: list, out: list) -> float :
+
+        self._abort()
+        self._mode = self.MODE_RX
+        symbols = 1 << min(self._cadParams[0], 4)
+        self._opEvent = self._schedule((symbols + 0.5) * self._symbolTime(), self._cadDone)
+        return self.BUSY_MODE
+
+    def _calibrate(self, buf: list, out: list) -> float :
+
+        return self.BUSY_CALIBRATE
+
+    def _calibrateImage(self, buf: list, out: list) -> float :
+
+        return self.BUSY_CALIBRATE_IMAGE
+
+    def _writeRegister(self, buf: list, out: list) -> float :
+
+        address = (buf[1] << 8) | buf[2]
+        for i, value in enumerate(buf[3:]) :
+            self._registers[(address + i) & 0x0FFF] = value & 0xFF
+        return self.BUSY_COMMAND
+
+    def _readRegister(self, buf: list, out: list) -> float :
+
+        address = (buf[1] << 8) | buf[2]
+        for i in range(4, len(buf)) :
+            out[i] = self._registers[(address + i - 4) & 0x0FFF]
+        return self.BUSY_COMMAND
+
+    def _writeBuffer(self, buf: list, out: list) -> float :
+
+        offset = buf[1]
+        data = bytes(buf[2:])
+        if offset + len(data) <= 256 :
+            self._buffer[offset:offset+len(data)] = data
+        else :
+            for i in range(len(data)) :
+                self._buffer[(offset + i) % 256] = data[i]
+        return self.BUSY_COMMAND
+
+    def _readBuffer(self, buf: list, out: list) -> float :
+
+        offset = buf[1]
+        length = len(buf) - 3
+        if offset + length <= 256 :
+            out[3:] = self._buffer[offset:offset+length]
+        else :
+            for i in range(length) :
+                out[i + 3] = self._buffer[(offset + i) % 256]
+        return self.BUSY_COMMAND
+
+    def _setDioIrqParams(self, buf: list, out: list) -> float :
+
+        self._irqMask = (buf[1] << 8) | buf[2]
+        self._dioMask = [(buf[3] << 8) | buf[4], (buf[5] << 8) | buf[6], (buf[7] << 8) | buf[8]]
+        self._updateDio()
+        return self.BUSY_COMMAND
+
+    def _getIrqStatus(self, buf: list, out: list) -> float :
+
+        if len(out) > 3 :
+            out[2] = (self._irqStatus >> 8) & 0xFF
+            out[3] = self._irqStatus & 0xFF
+        return self.BUSY_COMMAND
+
+    def _clearIrqStatus(self, buf: list, out: list) -> float :
+
+        self._irqStatus &= ~((buf[1] << 8) | buf[2])
+        self._updateDio()
+        return self.BUSY_COMMAND
+
+    def _setRfFrequency(self, buf: list, out: list) -> float :
+
+        self._rfFreq = (buf[1] << 24) | (buf[2] << 16) | (buf[3] << 8) | buf[4]
+        return self.BUSY_COMMAND
+
+    def _setPacketType(self, buf: list, out: list) -> float :
+
+        self._packetType = buf[1]
+        return self.BUSY_COMMAND
+
+    def _getPacketType(self, buf: list, out: list) -> float :
+
+        if len(out) > 2 : out[2] = self._packetType
+        return self.BUSY_COMMAND
+
+    def _setModulationParams(self, buf: list, out: list) -> float :
+
+        if self._packetType == 0x00 :
+            self._fskBitrate = (buf[1] << 16) | (buf[2] << 8) | buf[3]
+        else :
+            self._sf = buf[1]
+            self._bw = buf[2]
+            self._cr = buf[3]
+            self._ldro = buf[4]
+        return self.BUSY_COMMAND
+
+    def _setPacketParams(self, buf: list, out: list) -> float :
+
+        self._preambleLength = (buf[1] << 8) | buf[2]
+        if self._packetType == 0x00 :
+            self._payloadLength = buf[7]
+        else :
+            self._headerType = buf[3]
+            self._payloadLength = buf[4]
+            self._crcType = buf[5]
+        return self.BUSY_COMMAND
+
+    def _setCadParams(self, buf: list, out: list) -> float :
+
+        self._cadParams = (buf[1], buf[2], buf[3], buf[4], (buf[5] << 16) | (buf[6] << 8) | buf[7])
+        return self.BUSY_COMMAND
+
+    def _setBufferBaseAddress(self, buf: list, out: list) -> float :
+
+        self._txBase = buf[1]
+        self._rxBase = buf[2]
+        return self.BUSY_COMMAND
+
+    def _setFallbackMode(self, buf: list, out: list) -> float :
+
+        self._fallback = (buf[1] >> 4) & 0x07
+        return self.BUSY_COMMAND
+
+    def _getStatus(self, buf: list, out: list) -> float :
+
+        return self.BUSY_COMMAND
+
+    def _getRxBufferStatus(self, buf: list, out: list) -> float :
+
+        if len(out) > 3 :
+            out[2] = self._rxLength
+            out[3] = self._rxPointer
+        return self.BUSY_COMMAND
+
+    def _getPacketStatus(self, buf: list, out: list) -> float :
+
+        for i in range(min(len(out) - 2, 3)) :
+            out[i + 2] = self._packetStatus[i]
+        return self.BUSY_COMMAND
+
+    def _getRssiInst(self, buf: list, out: list) -> float :
+
+        # noise floor -110 dBm or signal of packet currently received
+        rssi = -110.0
+        if self._receiving is not None : rssi = self._receiving[1]
+        if len(out) > 2 : out[2] = min(max(int(-2 * rssi), 0), 255)
+        return self.BUSY_COMMAND
+
+    def _getStats(self, buf: list, out: list) -> float :
+
+        for i in range(min(len(out) - 2, 6)) :
+            out[i + 2] = (self._stats[i // 2] >> (8 * (1 - i % 2))) & 0xFF
+        return self.BUSY_COMMAND
+
+    def _resetStats(self, buf: list, out: list) -> float :
+
+        self._stats = [0, 0, 0]
+        return self.BUSY_COMMAND
+
+    def _getDeviceErrors(self, buf: list, out: list) -> float :
+
+        if len(out) > 2 : out[2] = (self._deviceErrors >> 8) & 0xFF
+        if len(out) > 3 : out[3] = self._deviceErrors & 0xFF
+        return self.BUSY_COMMAND
+
+    def _clearDeviceErrors(self, buf: list, out: list) -> float :
+
+        self._deviceErrors = 0x0000
+        return self.BUSY_COMMAND
+
+### CHIP EVENTS ###
+
+    def _txDone(self, payload: bytes) :
+
+        self._cancel(self._timeoutEvent)
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._mode = self._fallback
+        self._cmdStatus = self.CMD_TX_DONE
+        self.transmitted.append(payload)
+        self._raiseIrq(self.IRQ_TX_DONE)
+
+    def _opTimeout(self) :
+
+        self._cancel(self._opEvent)
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._receiving = None
+        self._mode = self._fallback
+        self._cmdStatus = self.CMD_TIMEOUT
+        self._raiseIrq(self.IRQ_TIMEOUT)
+
+    def _packetArrived(self) :
+
+        # start receiving next queued packet when chip in RX mode and idle
+        if self._mode != self.MODE_RX or self._receiving is not None or self._opEvent : return
+        if not self._rxQueue : return
+        packet = self._rxQueue.popleft()
+        self._receiving = packet
+        # header detected, RX timeout timer stopped
+        self._cancel(self._timeoutEvent)
+        self._timeoutEvent = 0
+        airtime = packet[4]
+        if airtime is None : airtime = self._airtime(len(packet[0]))
+        self._opEvent = self._schedule(airtime, self._rxDone)
+
+    def _rxDone(self) :
+
+        payload, rssi, snr, crcError, airtime = self._receiving
+        self._receiving = None
+        self._opEvent = 0
+        # implicit header packet length is configured payload length
+        if self._headerType == 0x01 and self._packetType == 0x01 :
+            payload = payload[:self._payloadLength].ljust(self._payloadLength, b'\x00')
+        for i in range(len(payload)) :
+            self._buffer[(self._rxBase + i) % 256] = payload[i]
+        self._rxLength = len(payload)
+        self._rxPointer = self._rxBase
+        rssiPkt = min(max(int(-2 * rssi), 0), 255)
+        self._packetStatus = (rssiPkt, int(snr * 4) & 0xFF, rssiPkt)
+        self._stats[0] = (self._stats[0] + 1) & 0xFFFF
+        irq = self.IRQ_RX_DONE | self.IRQ_PREAMBLE_DETECTED | self.IRQ_HEADER_VALID
+        if crcError :
+            irq |= self.IRQ_CRC_ERR
+            self._stats[1] = (self._stats[1] + 1) & 0xFFFF
+        if not self._continuous : self._mode = self._fallback
+        self._cmdStatus = self.CMD_DATA_AVAILABLE
+        self._raiseIrq(irq)
+        if self._continuous : self._packetArrived()
+
+    def _cadDone(self) :
+
+        self._opEvent = 0
+        self._mode = self.MODE_STDBY_RC
+        irq = self.IRQ_CAD_DONE
+        if self._rfFreq in self._activity or self._rxQueue : irq |= self.IRQ_CAD_DETECTED
+        # CAD exit RX mode go to receive when activity detected
+        if irq & self.IRQ_CAD_DETECTED and self._cadParams[3] == 0x01 :
+            self._mode = self.MODE_RX
+            self._continuous = False
+            self._packetArrived()
+        self._raiseIrq(irq)
+
+
+class SX127xEmulator(_Emulator) :
+    """Register level software model of SX1276/77/78/79 chip used as SPI and GPIO transport"""
+
+    # Register address
+    REG_FIFO                               = 0x00
+    REG_OP_MODE                            = 0x01
+    REG_FRF_MSB                            = 0x06
+    REG_FIFO_ADDR_PTR                      = 0x0D
+    REG_FIFO_TX_BASE_ADDR                  = 0x0E
+    REG_FIFO_RX_BASE_ADDR                  = 0x0F
+    REG_FIFO_RX_CURRENT_ADDR               = 0x10
+    REG_IRQ_FLAGS_MASK                     = 0x11
+    REG_IRQ_FLAGS                          = 0x12
+    REG_RX_NB_BYTES                        = 0x13
+    REG_RX_HEADR_CNT_VALUE_MSB             = 0x14
+    REG_RX_PKT_CNT_VALUE_MSB               = 0x16
+    REG_MODEM_STAT                         = 0x18
+    REG_PKT_SNR_VALUE                      = 0x19
+    REG_PKT_RSSI_VALUE                     = 0x1A
+    REG_RSSI_VALUE                         = 0x1B
+    REG_MODEM_CONFIG_1                     = 0x1D
+    REG_MODEM_CONFIG_2                     = 0x1E
+    REG_SYMB_TIMEOUT_LSB                   = 0x1F
+    REG_PREAMBLE_MSB                       = 0x20
+    REG_PREAMBLE_LSB                       = 0x21
+    REG_PAYLOAD_LENGTH                     = 0x22
+    REG_FIFO_RX_BYTE_ADDR                  = 0x25
+    REG_MODEM_CONFIG_3                     = 0x26
+    REG_DIO_MAPPING_1                      = 0x40
+    REG_VERSION                            = 0x42
+
+    # Device modes
+    MODE_SLEEP                             = 0x00
+    MODE_STDBY                             = 0x01
+    MODE_TX                                = 0x03
+    MODE_RX_CONTINUOUS                     = 0x05
+    MODE_RX_SINGLE                         = 0x06
+    MODE_CAD                               = 0x07
+
+    # IRQ flags
+    IRQ_CAD_DETECTED                       = 0x01
+    IRQ_CAD_DONE                           = 0x04
+    IRQ_TX_DONE                            = 0x08
+    IRQ_HEADER_VALID                       = 0x10
+    IRQ_CRC_ERR                            = 0x20
+    IRQ_RX_DONE                            = 0x40
+    IRQ_RX_TIMEOUT                         = 0x80
+
+    # Time needed after reset released before chip respond in second
+    BOOT_TIME                              = 0.005
+
+    # LoRa bandwidth in Hz for bandwidth config
+    BANDWIDTH = (7810, 10420, 15630, 20830, 31250, 41670, 62500, 125000, 250000, 500000)
+
+    # Register reset values
+    REGISTER_DEFAULT = {
+        0x01: 0x09, 0x06: 0x6C, 0x07: 0x80, 0x09: 0x4F, 0x0A: 0x09, 0x0B: 0x2B, 0x0C: 0x20,
+        0x0E: 0x80, 0x1D: 0x72, 0x1E: 0x70, 0x1F: 0x64, 0x21: 0x08, 0x22: 0x01, 0x23: 0xFF,
+        0x26: 0x04, 0x31: 0xC3, 0x33: 0x27, 0x37: 0x0A, 0x39: 0x12, 0x3B: 0x1D, 0x4B: 0x09,
+        0x4D: 0x84
+    }
+
+    def __init__(self, reset: int = 22, dio0: int = -1, dio1: int = -1, version: int = 0x12, timeScale: float = 1.0) :
+
+        super().__init__(timeScale)
+        self._reset = reset
+        self._dio0 = dio0
+        self._dio1 = dio1
+        self._version = version
+        self._inReset = False
+        self._bootUntil = 0.0
+        self._activity = set()
+        self._powerOn()
+
+    def setActivity(self, frequency: int, active: bool = True) :
+
+        # mark a RF frequency in Hz as busy channel for CAD operation
+        with self._lock :
+            frf = int((frequency << 19) / 32000000)
+            if active : self._activity.add(frf)
+            else : self._activity.discard(frf)
+
+    @property
+    def fifo(self) -> bytearray :
+
+        # 256 bytes FIFO data buffer shared by TX and RX
+        return self._fifo
+
+### CHIP STATE ###
+
+    def _powerOn(self) :
+
+        self._fifo = bytearray(256)
+        self._registers = bytearray(0x80)
+        for address, value in self.REGISTER_DEFAULT.items() :
+            self._registers[address] = value
+        self._registers[self.REG_VERSION] = self._version
+        self._rxWritePtr = 0
+        self._receiving = None
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._bootUntil = self._now() + self.BOOT_TIME * self._timeScale
+        self._updateDio()
+
+    def _mode(self) -> int :
+
+        return self._registers[self.REG_OP_MODE] & 0x07
+
+    def _setMode(self, mode: int) :
+
+        self._registers[self.REG_OP_MODE] = (self._registers[self.REG_OP_MODE] & 0xF8) | mode
+
+    def _isLoRa(self) -> bool :
+
+        return bool(self._registers[self.REG_OP_MODE] & 0x80)
+
+    def _abort(self) :
+
+        self._cancel(self._opEvent)
+        self._cancel(self._timeoutEvent)
+        self._opEvent = 0
+        self._timeoutEvent = 0
+        self._receiving = None
+
+    def _raiseIrq(self, irq: int) :
+
+        # masked IRQ sources never set their flag
+        self._registers[self.REG_IRQ_FLAGS] |= irq & ~self._registers[self.REG_IRQ_FLAGS_MASK] & 0xFF
+        self._updateDio()
+
+    def _updateDio(self) :
+
+        # DIO0 mapping: 00 RX done, 01 TX done, 10 CAD done; DIO1 mapping: 00 RX timeout, 10 CAD detected
+        flags = self._registers[self.REG_IRQ_FLAGS]
+        mapping = self._registers[self.REG_DIO_MAPPING_1]
+        dio0 = (self.IRQ_RX_DONE, self.IRQ_TX_DONE, self.IRQ_CAD_DONE, 0x00)[(mapping >> 6) & 0x03]
+        dio1 = (self.IRQ_RX_TIMEOUT, 0x02, self.IRQ_CAD_DETECTED, 0x00)[(mapping >> 4) & 0x03]
+        self._setLevel(self._dio0, self.HIGH if flags & dio0 else self.LOW)
+        self._setLevel(self._dio1, self.HIGH if flags & dio1 else self.LOW)
+
+    def _frequency(self) -> float :
+
+        frf = (self._registers[0x06] << 16) | (self._registers[0x07] << 8) | self._registers[0x08]
+        return frf * 32000000 / (1 << 19)
+
+    def _symbolTime(self) -> float :
+
+        sf = max(self._registers[self.REG_MODEM_CONFIG_2] >> 4, 6)
+        bw = self.BANDWIDTH[min(self._registers[self.REG_MODEM_CONFIG_1] >> 4, 9)]
+        return (1 << sf) / bw
+
+    def _airtime(self, length: int) -> float :
+
+        # time on air in second based on modem config registers
+        config1 = self._registers[self.REG_MODEM_CONFIG_1]
+        config2 = self._registers[self.REG_MODEM_CONFIG_2]
+        config3 = self._registers[self.REG_MODEM_CONFIG_3]
+        sf = max(config2 >> 4, 6)
+        bw = self.BANDWIDTH[min(config1 >> 4, 9)]
+        cr = ((config1 >> 1) & 0x07) + 4
+        preambleLength = (self._registers[self.REG_PREAMBLE_MSB] << 8) | self._registers[self.REG_PREAMBLE_LSB]
+        return timeOnAir(sf, bw, cr, length, preambleLength, config1 & 0x01, bool(config2 & 0x04), bool(config3 & 0x08), FAMILY_SX127X)
+
+    def _rssiOffset(self) -> int :
+
+        if self._version == 0x22 : return 139
+        if self._frequency() < 525E6 : return 164
+        return 157
+
+### GPIO PINS ###
+
+    def _pinChanged(self, pin: int, value: int) :
+
+        # hold chip in reset while reset pin low and boot when released
+        if pin == self._reset :
+            if value == self.LOW :
+                self._abort()
+                self._inReset = True
+            else :
+                self._inReset = False
+                self._powerOn()
+
+### SPI REGISTER ACCESS ###
+
+    def _command(self, buf: list) -> list :
+
+        # no response during reset and boot time
+        out = [0] * len(buf)
+        if self._inReset or self._now() < self._bootUntil : return out
+        # burst access: register address auto increment except FIFO address
+        address = buf[0] & 0x7F
+        write = buf[0] & 0x80
+        for i in range(1, len(buf)) :
+            if write : self._writeRegister(address, buf[i] & 0xFF)
+            else : out[i] = self._readRegister(address)
+            if address != self.REG_FIFO : address = (address + 1) & 0x7F
+        return out
+
+    def _readRegister(self, address: int) -> int :
+
+        if address == self.REG_FIFO :
+            ptr = self._registers[self.REG_FIFO_ADDR_PTR]
+            self._registers[self.REG_FIFO_ADDR_PTR] = (ptr + 1) & 0xFF
+            return self._fifo[ptr]
+        if address == self.REG_RSSI_VALUE :
+            rssi = -110.0
+            if self._receiving is not None : rssi = self._receiving[1]
+            return min(max(int(rssi + self._rssiOffset()), 0), 255)
+        return self._registers[address]
+
+    def _writeRegister(self, address: int, value: int) :
+
+        if address == self.REG_FIFO :
+            ptr = self._registers[self.REG_FIFO_ADDR_PTR]
+            self._fifo[ptr] = value
+            self._registers[self.REG_FIFO_ADDR_PTR] = (ptr + 1) & 0xFF
+        elif address == self.REG_OP_MODE :
+            self._writeOpMode(value)
+        elif address == self.REG_IRQ_FLAGS :
+            # write one to clear IRQ flag
+            self._registers[address] &= ~value & 0xFF
+            self._updateDio()
+        elif address in (self.REG_FIFO_RX_CURRENT_ADDR, self.REG_RX_NB_BYTES, self.REG_MODEM_STAT, self.REG_PKT_SNR_VALUE, self.REG_PKT_RSSI_VALUE, self.REG_RSSI_VALUE, self.REG_FIFO_RX_BYTE_ADDR, self.REG_VERSION) :
+            # read only registers
+            pass
+        elif 0x14 <= address <= 0x17 :
+            pass
+        else :
+            self._registers[address] = value
+            if address == self.REG_DIO_MAPPING_1 : self._updateDio()
+
+    def _writeOpMode(self, value: int) :
+
+        current = self._registers[self.REG_OP_MODE]
+        # long range mode bit can only be changed in sleep mode
+        if (current & 0x07) != self.MODE_SLEEP :
+            value = (value & 0x7F) | (current & 0x80)
+        mode = value & 0x07
+        if mode != (current & 0x07) or mode in (self.MODE_TX, self.MODE_CAD) :
+            self._abort()
+        self._registers[self.REG_OP_MODE] = value
+        if not self._isLoRa() : return
+        if mode == self.MODE_TX :
+            self._startTx()
+        elif mode == self.MODE_RX_CONTINUOUS or mode == self.MODE_RX_SINGLE :
+            if mode != (current & 0x07) or self._opEvent == 0 : self._startRx(mode)
+        elif mode == self.MODE_CAD :
+            self._opEvent = self._schedule(2.5 * self._symbolTime(), self._cadDone)
+
+    def _startTx(self) :
+
+        # TX modulator read payload length bytes from FIFO TX base address
+        length = self._registers[self.REG_PAYLOAD_LENGTH]
+        base = self._registers[self.REG_FIFO_TX_BASE_ADDR]
+        payload = bytes(self._fifo[(base + i) & 0xFF] for i in range(length))
+        airtime = self._airtime(length)
+        self._opEvent = self._schedule(airtime, self._txDone, payload)
+        self._transmitToPeer(payload, airtime)
+
+    def _startRx(self, mode: int) :
+
+        # RX write pointer start from FIFO RX base address
+        self._rxWritePtr = self._registers[self.REG_FIFO_RX_BASE_ADDR]
+        if mode == self.MODE_RX_SINGLE :
+            symbTimeout = ((self._registers[self.REG_MODEM_CONFIG_2] & 0x03) << 8) | self._registers[self.REG_SYMB_TIMEOUT_LSB]
+            self._timeoutEvent = self._schedule(symbTimeout * self._symbolTime(), self._rxTimeout)
+        self._packetArrived()
+
+### CHIP EVENTS ###
+
+    def _txDone(self, payload: bytes) :
+
+        self._opEvent = 0
+        self._setMode(self.MODE_STDBY)
+        self.transmitted.append(payload)
+        self._raiseIrq(self.IRQ_TX_DONE)
+
+    def _rxTimeout(self) :
+
+        self._timeoutEvent = 0
+        self._receiving = None
+        self._cancel(self._opEvent)
+        self._opEvent = 0
+        self._setMode(self.MODE_STDBY)
+        self._raiseIrq(self.IRQ_RX_TIMEOUT)
+
+    def _packetArrived(self) :
+
+        # start receiving next queued packet when chip in RX mode and idle
+        mode = self._mode()
+        if mode != self.MODE_RX_CONTINUOUS and mode != self.MODE_RX_SINGLE : return
+        if not self._isLoRa() or self._receiving is not None or not self._rxQueue : return
+        packet = self._rxQueue.popleft()
+        self._receiving = packet
+        # symbol timeout stopped when preamble detected
+        self._cancel(self._timeoutEvent)
+        self._timeoutEvent = 0
+        airtime = packet[4]
+        if airtime is None : airtime = self._airtime(len(packet[0]))
+        self._opEvent = self._schedule(airtime, self._rxDone)
+
+    def _rxDone(self) :
+
+        payload, rssi, snr, crcError, airtime = self._receiving
+        self._receiving = None
+        self._opEvent = 0
+        # implicit header packet length is configured payload length
+        if self._registers[self.REG_MODEM_CONFIG_1] & 0x01 :
+            length = self._registers[self.REG_PAYLOAD_LENGTH]
+            payload = payload[:length].ljust(length, b'\x00')
+        start = self._rxWritePtr
+        for i in range(len(payload)) :
+            self._fifo[(start + i) & 0xFF] = payload[i]
+        self._rxWritePtr = (start + len(payload)) & 0xFF
+        self._registers[self.REG_FIFO_RX_CURRENT_ADDR] = start
+        self._registers[self.REG_FIFO_RX_BYTE_ADDR] = self._rxWritePtr
+        self._registers[self.REG_RX_NB_BYTES] = len(payload)
+        self._registers[self.REG_PKT_SNR_VALUE] = int(snr * 4) & 0xFF
+        self._registers[self.REG_PKT_RSSI_VALUE] = min(max(int(rssi + self._rssiOffset()), 0), 255)
+        count = ((self._registers[0x16] << 8) | self._registers[0x17]) + 1
+        self._registers[0x16] = (count >> 8) & 0xFF
+        self._registers[0x17] = count & 0xFF
+        irq = self.IRQ_RX_DONE | self.IRQ_HEADER_VALID
+        if crcError : irq |= self.IRQ_CRC_ERR
+        if self._mode() == self.MODE_RX_SINGLE : self._setMode(self.MODE_STDBY)
+        self._raiseIrq(irq)
+        self._packetArrived()
+
+    def _cadDone(self) :
+
+        self._opEvent = 0
+        self._setMode(self.MODE_STDBY)
+        frf = (self._registers[0x06] << 16) | (self._registers[0x07] << 8) | self._registers[0x08]
+        irq = self.IRQ_CAD_DONE
+        if frf in self._activity or self._rxQueue : irq |= self.IRQ_CAD_DETECTED
+        self._raiseIrq(irq)
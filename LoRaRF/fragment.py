@@ -0,0 +1,162 @@
+import random
+import struct
+import time
+from collections import OrderedDict
+
+# fragment header: message ID and fragment index with last fragment flag in most significant bit
+FRAGMENT_HEADER = struct.Struct('<HH')
+FRAGMENT_LAST                              = 0x8000
+MAX_FRAGMENTS                              = 0x8000
+
+def fragmentLength(radio, maxLength: int = 255, maxAirtime: float = None) -> int :
+    """Largest fragment length not exceeding maxLength and maxAirtime in ms which fill its last LoRa symbol"""
+
+    # payload bits are sent in blocks of symbols, so length just before time on air step carry most bytes for the same airtime
+    for length in range(maxLength, FRAGMENT_HEADER.size, -1) :
+        airtime = radio.timeOnAir(length)
+        if maxAirtime is not None and airtime > maxAirtime : continue
+        if length == maxLength or radio.timeOnAir(length + 1) > airtime :
+            return length
+    raise ValueError("no fragment length fit maximum length and maximum airtime")
+
+class Fragmenter :
+    """Split bytes or file-like object to fragments sized to modulation of radio and transmit them with sendMany()"""
+
+    def __init__(self, radio, length: int = None, maxAirtime: float = None) :
+
+        # radio must be configured with modulation and explicit header packet parameter, length computed once from them
+        self._radio = radio
+        if length is None : length = fragmentLength(radio, 255, maxAirtime)
+        if not FRAGMENT_HEADER.size < length <= 255 :
+            raise ValueError("fragment length must be between {} and 255".format(FRAGMENT_HEADER.size + 1))
+        self.length = length
+        self._messageId = random.randrange(65536)
+
+    def fragments(self, data, messageId: int = None) :
+
+        # yield fragments of bytes-like data or data read from file-like object, file is read only one fragment ahead
+        if messageId is None :
+            messageId = self._messageId
+            self._messageId = (self._messageId + 1) % 65536
+        chunks = self._chunks(data, self.length - FRAGMENT_HEADER.size)
+        chunk = next(chunks, b'')
+        index = 0
+        while True :
+            following = next(chunks, None)
+            if index >= MAX_FRAGMENTS :
+                raise ValueError("data need more than {} fragments".format(MAX_FRAGMENTS))
+            flag = FRAGMENT_LAST if following is None else 0
+            yield FRAGMENT_HEADER.pack(messageId, index | flag) + chunk
+            if following is None : return
+            chunk = following
+            index += 1
+
+    def send(self, data, messageId: int = None) :
+
+        # transmit all fragments of data and return TxReport of radio
+        return self._radio.sendMany(self.fragments(data, messageId))
+
+    def _chunks(self, data, size: int) :
+
+        if hasattr(data, 'read') :
+            # file read may return less than requested so read until chunk full or end of file
+            while True :
+                chunk = data.read(size)
+                if not chunk : return
+                while len(chunk) < size :
+                    more = data.read(size - len(chunk))
+                    if not more : break
+                    chunk += more
+                yield bytes(chunk)
+        else :
+            view = memoryview(data).cast('B')
+            for offset in range(0, len(view), size) :
+                yield view[offset:offset+size].tobytes()
+
+
+class _Message :
+
+    def __init__(self, timestamp: float) :
+
+        self.parts = {}
+        self.size = 0
+        self.count = None
+        self.timestamp = timestamp
+
+
+class Reassembler :
+    """Collect fragments received in any order and return message when all its fragments received, memory bounded by messages and bytes"""
+
+    def __init__(self, maxMessages: int = 4, maxBytes: int = 65536, timeout: float = 60.0, clock = time.monotonic) :
+
+        # incomplete messages ordered by last received fragment, oldest evicted when a limit reached or after timeout in second
+        self._messages = OrderedDict()
+        self._maxMessages = maxMessages
+        self._maxBytes = maxBytes
+        self._timeout = timeout
+        self._clock = clock
+        self._bytes = 0
+        self._completed = 0
+        self._dropped = 0
+
+    def add(self, fragment, source = None) :
+
+        # add received fragment, return complete message bytes or None, source separate message IDs of different senders
+        if len(fragment) < FRAGMENT_HEADER.size : return None
+        messageId, index = FRAGMENT_HEADER.unpack_from(fragment)
+        data = bytes(fragment[FRAGMENT_HEADER.size:])
+        now = self._clock()
+        self._expire(now)
+
+        key = (source, messageId)
+        message = self._messages.get(key)
+        if message is None :
+            message = _Message(now)
+            self._messages[key] = message
+        else :
+            self._messages.move_to_end(key)
+            message.timestamp = now
+        if index & FRAGMENT_LAST :
+            index &= ~FRAGMENT_LAST
+            # second different last fragment or stored fragment after last one mean fragments of other message with same ID
+            if message.count is not None and message.count != index + 1 or message.parts and max(message.parts) > index :
+                self._drop(key)
+                return None
+            message.count = index + 1
+        if index in message.parts or message.count is not None and index >= message.count : return None
+
+        # drop message which alone exceed byte limit, otherwise evict least recently active other messages until fragment fit
+        if message.size + len(data) > self._maxBytes :
+            self._drop(key)
+            return None
+        while self._bytes + len(data) > self._maxBytes or len(self._messages) > self._maxMessages :
+            self._drop(next(iter(self._messages)))
+        message.parts[index] = data
+        message.size += len(data)
+        self._bytes += len(data)
+
+        if message.count is not None and len(message.parts) == message.count :
+            del self._messages[key]
+            self._bytes -= message.size
+            self._completed += 1
+            parts = message.parts
+            return b''.join([parts[i] for i in range(message.count)])
+        return None
+
+    def status(self) -> tuple :
+
+        # get number of incomplete messages, buffered bytes, completed messages, and dropped messages
+        return (len(self._messages), self._bytes, self._completed, self._dropped)
+
+    def _expire(self, now: float) :
+
+        while self._messages :
+            key, message = next(iter(self._messages.items()))
+            if message.timestamp + self._timeout > now : break
+            self._drop(key)
+
+    def _drop(self, key) :
+
+        message = self._messages.pop(key)
+        self._bytes -= message.size
+        self._dropped += 1
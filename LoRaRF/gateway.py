@@ -0,0 +1,156 @@
+import queue
+import threading
+from collections import namedtuple
+
+# received packet dispatched by gateway with name of radio which received it
+GatewayPacket = namedtuple('GatewayPacket', ['radio', 'payload', 'status', 'rssi', 'snr', 'timestamp'])
+
+# receive statistic of a radio, rssi and snr are averages of packets received without error
+RadioStats = namedtuple('RadioStats', ['radio', 'received', 'errors', 'dropped', 'rssi', 'snr', 'lastTimestamp'])
+
+class _GatewayRadio :
+
+    def __init__(self, radio, name: str, bufferSize: int) :
+
+        self.radio = radio
+        self.name = name
+        self.bufferSize = bufferSize
+        self.received = 0
+        self.errors = 0
+        self.dropped = 0
+        self.rssiSum = 0.0
+        self.snrSum = 0.0
+        self.lastTimestamp = 0.0
+
+
+class Gateway :
+    """Receive engine owning several SX126x and SX127x radios in RX continuous mode and dispatching their packets through one queue"""
+
+    def __init__(self, queueSize: int = 256) :
+
+        self._radios = []
+        self._queue = queue.Queue(queueSize)
+        self._running = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def addRadio(self, radio, name: str = None, bufferSize: int = 16) -> str :
+
+        # radio must be begun and configured with its own frequency, modulation, and packet parameter
+        # radio with IRQ pin read packets in its interrupt handler to RX queue of bufferSize packets
+        if self._running : raise RuntimeError("radio can not be added while gateway running")
+        if name is None : name = "radio{}".format(len(self._radios))
+        self._radios.append(_GatewayRadio(radio, name, bufferSize))
+        return name
+
+    def start(self) :
+
+        # put every radio in RX continuous mode, radio without IRQ pin are polled by one gateway thread
+        if self._running : return
+        self._running = True
+        self._stop.clear()
+        polled = []
+        for entry in self._radios :
+            radio = entry.radio
+            if radio._irq != -1 :
+                radio.setRxQueue(entry.bufferSize)
+                radio._irqNotify = self._drainer(entry)
+            else :
+                polled.append(entry)
+            radio.request(radio.RX_CONTINUOUS)
+        if polled :
+            self._thread = threading.Thread(target=self._poll, args=(polled,), daemon=True)
+            self._thread.start()
+
+    def stop(self) :
+
+        # stop polling thread and put all radios to standby, queued packets can still be read
+        if not self._running : return
+        self._running = False
+        self._stop.set()
+        if self._thread is not None :
+            self._thread.join()
+            self._thread = None
+        for entry in self._radios :
+            radio = entry.radio
+            radio._irqNotify = None
+            radio.standby()
+            if radio._irq != -1 :
+                # packets left in RX queue of radio are dispatched before queue disabled
+                self._drainer(entry)()
+                entry.dropped += radio.rxQueueStatus()[2]
+                radio.setRxQueue(0)
+
+    def receive(self, timeout: float = None) :
+
+        # get oldest received packet from all radios, timeout in second (None to block), return None when timeout
+        try :
+            return self._queue.get(timeout=timeout)
+        except queue.Empty :
+            return None
+
+    def packets(self, interval: float = 0.1) :
+
+        # yield received packets until gateway stopped and queue empty
+        while self._running or not self._queue.empty() :
+            try :
+                yield self._queue.get(timeout=interval)
+            except queue.Empty :
+                pass
+
+    def stats(self) -> list :
+
+        # receive statistic of every radio in order of added
+        result = []
+        for entry in self._radios :
+            good = entry.received - entry.errors
+            rssi = snr = 0.0
+            if good :
+                rssi = entry.rssiSum / good
+                snr = entry.snrSum / good
+            dropped = entry.dropped
+            if self._running and entry.radio._rxQueue is not None :
+                dropped += entry.radio.rxQueueStatus()[2]
+            result.append(RadioStats(entry.name, entry.received, entry.errors, dropped, rssi, snr, entry.lastTimestamp))
+        return result
+
+    def _dispatch(self, entry: _GatewayRadio, payload, status: int, rssi: float, snr: float, timestamp: float) :
+
+        # called only by thread serving the radio so statistic of a radio has single writer
+        entry.received += 1
+        entry.lastTimestamp = timestamp
+        if status == entry.radio.STATUS_RX_DONE :
+            entry.rssiSum += rssi
+            entry.snrSum += snr
+        else :
+            entry.errors += 1
+        try :
+            self._queue.put_nowait(GatewayPacket(entry.name, payload, status, rssi, snr, timestamp))
+        except queue.Full :
+            entry.dropped += 1
+
+    def _drainer(self, entry: _GatewayRadio) :
+
+        # move packets from RX queue of radio to gateway queue in interrupt handler thread
+        def drain() :
+            packet = entry.radio.popPacket()
+            while packet is not None :
+                self._dispatch(entry, packet.payload, packet.status, packet.rssi, packet.snr, packet.timestamp)
+                packet = entry.radio.popPacket()
+        return drain
+
+    def _poll(self, polled: list) :
+
+        # check IRQ status of every polled radio in turn, sleep when none of them received packet
+        interval = min(entry.radio._pollInterval for entry in polled)
+        while not self._stop.is_set() :
+            idle = True
+            for entry in polled :
+                radio = entry.radio
+                if radio.wait(0.000001) :
+                    status = radio.status()
+                    payload = radio.get(radio.available())
+                    info = radio.packetInfo()
+                    self._dispatch(entry, payload, status, info.rssi, info.snr, info.timestamp)
+                    idle = False
+            if idle : self._stop.wait(interval)
@@ -0,0 +1,196 @@
+import bisect
+import threading
+import time
+from .transport import BaseTransport
+
+# label of every SPI transfer is its first byte, SX126x opcode or SX127x register address with write bit
+_OP_LABELS = tuple("0x{:02x}".format(i) for i in range(256))
+
+class Metrics :
+    """Counters and latency histograms of SPI transfers, busy wait, and API calls of LoRa driver"""
+
+    # histogram upper bounds in second
+    BUCKETS = (0.000001, 0.000002, 0.000005, 0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005,
+        0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+    # label name of every metric family, metric without label use empty label value
+    LABELS = {
+        'spi_transfers': 'op',
+        'spi_bytes': 'op',
+        'spi_transfer_seconds': 'op',
+        'busy_wait_seconds': None,
+        'busy_timeouts': None,
+        'commands_dropped': 'op',
+        'api_call_seconds': 'call'
+    }
+
+    def __init__(self, buckets: tuple = BUCKETS) :
+
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def count(self, name: str, label: str = '', value: int = 1) :
+
+        key = (name, label)
+        with self._lock :
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, label: str, value: float) :
+
+        # histogram store count of every bucket followed by sum and count of all observations
+        key = (name, label)
+        with self._lock :
+            histogram = self._histograms.get(key)
+            if histogram is None :
+                histogram = [0] * (len(self._buckets) + 1) + [0.0, 0]
+                self._histograms[key] = histogram
+            histogram[bisect.bisect_left(self._buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def reset(self) :
+
+        with self._lock :
+            self._counters.clear()
+            self._histograms.clear()
+
+    def asDict(self) -> dict :
+
+        # counters as {name: {label: value}} and histograms as {name: {label: {count, sum, buckets}}} with cumulative buckets
+        result = {}
+        with self._lock :
+            for (name, label), value in self._counters.items() :
+                result.setdefault(name, {})[label] = value
+            for (name, label), histogram in self._histograms.items() :
+                buckets = {}
+                cumulative = 0
+                for i, bound in enumerate(self._buckets) :
+                    cumulative += histogram[i]
+                    buckets[bound] = cumulative
+                buckets[float('inf')] = histogram[-1]
+                result.setdefault(name, {})[label] = {'count': histogram[-1], 'sum': histogram[-2], 'buckets': buckets}
+        return result
+
+    def openMetrics(self, prefix: str = 'lora') -> str :
+
+        # export all metrics in OpenMetrics text exposition format
+        lines = []
+        data = self.asDict()
+        for name in sorted(data) :
+            family = prefix + '_' + name
+            labelName = self.LABELS.get(name, 'label')
+            samples = data[name]
+            isHistogram = isinstance(next(iter(samples.values())), dict)
+            if isHistogram : lines.append("# TYPE {} histogram".format(family))
+            else : lines.append("# TYPE {} counter".format(family))
+            for label in sorted(samples) :
+                labels = []
+                if labelName is not None and label != '' :
+                    labels.append('{}="{}"'.format(labelName, label))
+                if isHistogram :
+                    histogram = samples[label]
+                    for bound, value in histogram['buckets'].items() :
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append("{}_bucket{{{}}} {}".format(family, ','.join(labels + ['le="{}"'.format(le)]), value))
+                    suffix = ''
+                    if labels : suffix = '{' + ','.join(labels) + '}'
+                    lines.append("{}_sum{} {}".format(family, suffix, repr(histogram['sum'])))
+                    lines.append("{}_count{} {}".format(family, suffix, histogram['count']))
+                else :
+                    suffix = ''
+                    if labels : suffix = '{' + ','.join(labels) + '}'
+                    lines.append("{}_total{} {}".format(family, suffix, samples[label]))
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedTransport(BaseTransport) :
+    """Transport wrapper counting and timing every SPI transfer of wrapped transport"""
+
+    def __init__(self, transport: BaseTransport, metrics: Metrics) :
+
+        self.transport = transport
+        self._metrics = metrics
+
+    def open(self, bus: int, cs: int, speed: int) :
+
+        self.transport.open(bus, cs, speed)
+
+    def close(self) :
+
+        self.transport.close()
+
+    def xfer(self, buf: list) -> list :
+
+        t = time.perf_counter()
+        feedback = self.transport.xfer(buf)
+        self._record(buf, time.perf_counter() - t)
+        return feedback
+
+    def write(self, buf) :
+
+        t = time.perf_counter()
+        self.transport.write(buf)
+        self._record(buf, time.perf_counter() - t)
+
+    def _record(self, buf, elapsed: float) :
+
+        if not len(buf) : return
+        op = _OP_LABELS[buf[0]]
+        self._metrics.count('spi_transfers', op)
+        self._metrics.count('spi_bytes', op, len(buf))
+        self._metrics.observe('spi_transfer_seconds', op, elapsed)
+
+    def setup(self, pin: int, direction: int) :
+
+        self.transport.setup(pin, direction)
+
+    def output(self, pin: int, value: int) :
+
+        self.transport.output(pin, value)
+
+    def input(self, pin: int) -> int :
+
+        return self.transport.input(pin)
+
+    def addEdgeCallback(self, pin: int, callback) :
+
+        self.transport.addEdgeCallback(pin, callback)
+
+    def removeEdgeCallback(self, pin: int) :
+
+        self.transport.removeEdgeCallback(pin)
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+
+        return self.transport.waitForEdge(pin, timeout)
+
+    def cleanup(self) :
+
+        self.transport.cleanup()
+
+
+def _timedCall(metrics: Metrics, name: str, method) :
+
+    # wrapper recording call duration of bound method
+    def call(*args, **kwargs) :
+        t = time.perf_counter()
+        try :
+            return method(*args, **kwargs)
+        finally :
+            metrics.observe('api_call_seconds', name, time.perf_counter() - t)
+    return call
+
+
+def _timedBusyCheck(metrics: Metrics, method) :
+
+    # wrapper recording busy wait duration and busy timeout of bound busyCheck method
+    def busyCheck(*args, **kwargs) :
+        t = time.perf_counter()
+        timeout = method(*args, **kwargs)
+        metrics.observe('busy_wait_seconds', '', time.perf_counter() - t)
+        if timeout : metrics.count('busy_timeouts')
+        return timeout
+    return busyCheck
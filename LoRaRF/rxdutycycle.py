@@ -0,0 +1,93 @@
+import math
+from collections import namedtuple
+
+# number of preamble symbols receiver need in RX window to detect preamble and stay in RX mode
+DETECT_SYMBOLS                             = 4
+
+# typical SX1262 figures with DC-DC regulator, time in ms and current in mA
+WAKE_TIME                                  = 0.34        # wake up from warm start sleep and PLL lock before RX window
+RX_CURRENT                                 = 4.6         # RX mode current with power saving gain
+WAKE_CURRENT                               = 0.6         # STDBY_RC current while waking up
+SLEEP_CURRENT                              = 0.0012      # sleep current with warm start and RC64k timer running
+
+# average current and probability a packet is missed for an RX duty cycle setting
+ListenPoint = namedtuple('ListenPoint', ['rxPeriod', 'sleepPeriod', 'current', 'missProbability'])
+
+def _symbolTime(sf: int, bw: int) -> float :
+
+    # LoRa symbol time in ms, spreading factor and bandwidth in Hz checked so wrong argument order is rejected
+    if not 5 <= sf <= 12 : raise ValueError("spreading factor must be between 5 and 12")
+    if bw <= 0 : raise ValueError("bandwidth must be positive in Hz")
+    return (1 << sf) / bw * 1000
+
+def listenPeriods(sf: int, bw: int, preambleLength: int, detectSymbols: int = DETECT_SYMBOLS, wakeTime: float = WAKE_TIME) -> tuple :
+    """Calculate shortest RX period and longest sleep period in ms of SX126x listen() which never miss a packet with preamble length"""
+
+    # preamble starting just too late to be detected in a RX window must still last for next window wake up and detection
+    # so preamble time >= sleep period + wake time + 2 * detection time, RX period only need to cover detection time
+    if detectSymbols < 1 : raise ValueError("detect symbols must be at least 1")
+    tSym = _symbolTime(sf, bw)
+    detectTime = detectSymbols * tSym
+    rxPeriod = math.ceil(detectTime)
+    sleepPeriod = math.floor(preambleLength * tSym - 2 * detectTime - wakeTime)
+    if sleepPeriod < 1 :
+        raise ValueError("preamble length too short for RX duty cycle, use at least {} symbols".format(minPreambleLength(sf, bw, 1, detectSymbols, wakeTime)))
+    return (rxPeriod, sleepPeriod)
+
+def minPreambleLength(sf: int, bw: int, sleepPeriod: int, detectSymbols: int = DETECT_SYMBOLS, wakeTime: float = WAKE_TIME) -> int :
+    """Calculate minimum preamble length in symbols of sender so packet is never missed by receiver listen() with sleep period in ms"""
+
+    tSym = _symbolTime(sf, bw)
+    return math.ceil((sleepPeriod + wakeTime) / tSym) + 2 * detectSymbols
+
+def missProbability(sf: int, bw: int, preambleLength: int, rxPeriod: int, sleepPeriod: int, detectSymbols: int = DETECT_SYMBOLS, wakeTime: float = WAKE_TIME) -> float :
+    """Calculate probability a packet arriving at random time is missed by listen() with RX and sleep period in ms"""
+
+    # every cycle is wake up, RX window, and sleep, packet detected when its preamble overlap a RX window for detection time
+    tSym = _symbolTime(sf, bw)
+    detectTime = detectSymbols * tSym
+    preambleTime = preambleLength * tSym
+    if rxPeriod < detectTime : return 1.0
+    cycle = wakeTime + rxPeriod + sleepPeriod
+    # preamble starting at offset x in cycle is detected in window k starting at k * cycle + wakeTime when
+    # overlap = min(x + preamble, window end) - max(x, window start) >= detection time, missed offsets summed per window
+    detected = 0.0
+    windows = int(preambleTime // cycle) + 2
+    intervals = []
+    for k in range(windows) :
+        start = k * cycle + wakeTime
+        end = start + rxPeriod
+        # offsets x in [start - preambleTime + detectTime, end - detectTime] detect in this window
+        intervals.append((max(start - preambleTime + detectTime, 0.0), min(end - detectTime, cycle)))
+    # union of detected offsets within one cycle
+    intervals.sort()
+    reach = 0.0
+    for low, high in intervals :
+        low = max(low, reach)
+        if high > low :
+            detected += high - low
+            reach = high
+    return max(0.0, 1.0 - detected / cycle)
+
+def listenReport(sf: int, bw: int, preambleLength: int, rxPeriod: int = None, sleepPeriods = None, detectSymbols: int = DETECT_SYMBOLS, wakeTime: float = WAKE_TIME,
+    rxCurrent: float = RX_CURRENT, wakeCurrent: float = WAKE_CURRENT, sleepCurrent: float = SLEEP_CURRENT) -> list :
+    """Calculate average current in mA and miss probability of listen() for range of sleep periods in ms"""
+
+    tSym = _symbolTime(sf, bw)
+    if rxPeriod is None : rxPeriod = math.ceil(detectSymbols * tSym)
+    if sleepPeriods is None :
+        # from continuous RX to twice the longest safe sleep period
+        safe = max(math.floor(preambleLength * tSym - 2 * detectSymbols * tSym - wakeTime), 1)
+        step = max(safe // 5, 1)
+        sleepPeriods = range(0, 2 * safe + step, step)
+    report = []
+    for sleepPeriod in sleepPeriods :
+        if sleepPeriod == 0 :
+            # no sleep period is continuous RX
+            report.append(ListenPoint(rxPeriod, 0, rxCurrent, 0.0))
+            continue
+        cycle = wakeTime + rxPeriod + sleepPeriod
+        current = (wakeTime * wakeCurrent + rxPeriod * rxCurrent + sleepPeriod * sleepCurrent) / cycle
+        miss = missProbability(sf, bw, preambleLength, rxPeriod, sleepPeriod, detectSymbols, wakeTime)
+        report.append(ListenPoint(rxPeriod, sleepPeriod, current, miss))
+    return report
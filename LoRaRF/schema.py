@@ -0,0 +1,115 @@
+import struct
+from collections import namedtuple
+
+# struct format character to NumPy type of same size, byte order prefixed when dtype compiled
+_NUMPY_TYPES = {
+    '?': 'b1', 'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4', 'l': 'i4', 'L': 'u4',
+    'q': 'i8', 'Q': 'u8', 'e': 'f2', 'f': 'f4', 'd': 'f8'
+}
+
+class PayloadSchema :
+    """Payload layout of named fields compiled once to struct.Struct for single packet and NumPy structured dtype for many packets"""
+
+    def __init__(self, fields, byteOrder: str = '<', name: str = 'Payload') :
+
+        # fields is sequence of (name, format) with single struct format character, count prefixed 's' for bytes, or 'x' for padding
+        # byte order is one of struct standard size prefix so layout does not depend on host
+        if byteOrder not in ('<', '>', '!', '=') :
+            raise ValueError("byte order must be '<', '>', '!', or '='")
+        self.byteOrder = byteOrder
+        self._layout = []
+        names = []
+        formats = []
+        offset = 0
+        for (fieldName, fieldFormat) in fields :
+            count = fieldFormat[:-1]
+            code = fieldFormat[-1:]
+            if code in ('s', 'x') : valid = count == '' or count.isdigit()
+            else : valid = count == '' and code in _NUMPY_TYPES
+            if not valid :
+                raise ValueError("unsupported format '{}' of field {}".format(fieldFormat, fieldName))
+            size = struct.calcsize(byteOrder + fieldFormat)
+            if code != 'x' :
+                names.append(fieldName)
+                self._layout.append((fieldName, code, size, offset))
+            formats.append(fieldFormat)
+            offset += size
+        self.names = tuple(names)
+        self.format = byteOrder + ''.join(formats)
+        self._struct = struct.Struct(self.format)
+        self.size = self._struct.size
+        self.record = namedtuple(name, names)
+        self._dtype = None
+
+    @property
+    def dtype(self) :
+
+        # NumPy structured dtype with same offsets as struct layout, compiled on first batch operation
+        if self._dtype is None :
+            import numpy as np
+            order = '>' if self.byteOrder in ('>', '!') else '<'
+            if self.byteOrder == '=' : order = '='
+            formats = []
+            for (fieldName, code, size, offset) in self._layout :
+                if code == 's' : formats.append('S{}'.format(size))
+                else : formats.append(order + _NUMPY_TYPES[code])
+            self._dtype = np.dtype({
+                'names': list(self.names),
+                'formats': formats,
+                'offsets': [offset for (fieldName, code, size, offset) in self._layout],
+                'itemsize': self.size
+            })
+        return self._dtype
+
+    def pack(self, *values, **fields) -> bytes :
+
+        # encode field values given in order or by name
+        if fields : values = self.record(*values, **fields)
+        return self._struct.pack(*values)
+
+    def unpack(self, payload) :
+
+        # decode one payload to named tuple, trailing bytes after schema size are ignored
+        if len(payload) < self.size :
+            raise ValueError("payload length {} is shorter than schema size {}".format(len(payload), self.size))
+        return self.record._make(self._struct.unpack_from(payload))
+
+    def put(self, radio, *values, **fields) :
+
+        # write encoded payload to transmit buffer of radio after beginPacket()
+        radio.put(self.pack(*values, **fields))
+
+    def get(self, radio) :
+
+        # read and decode one payload from receive buffer of radio after wait()
+        return self.unpack(radio.get(self.size))
+
+    def unpackArray(self, payloads) :
+
+        # decode many payloads to NumPy structured array in one call, payloads is concatenated bytes or iterable of payloads
+        # payload shorter than schema size is rejected and trailing bytes of longer payload are ignored
+        import numpy as np
+        if isinstance(payloads, (bytes, bytearray, memoryview)) :
+            return np.frombuffer(payloads, dtype=self.dtype, count=len(payloads) // self.size)
+        # iterator or generator is materialized once since lengths are checked before joining
+        payloads = list(payloads)
+        size = self.size
+        if min(map(len, payloads), default=size) < size :
+            raise ValueError("payload shorter than schema size {}".format(size))
+        if max(map(len, payloads), default=size) > size :
+            data = b''.join([payload[:size] for payload in payloads])
+        else :
+            data = b''.join(payloads)
+        return np.frombuffer(data, dtype=self.dtype)
+
+    def packArray(self, array) -> bytes :
+
+        # encode NumPy structured array or mapping of field name to column into concatenated payloads
+        import numpy as np
+        if isinstance(array, dict) :
+            columns = array
+            length = len(next(iter(columns.values()))) if columns else 0
+            array = np.zeros(length, dtype=self.dtype)
+            for fieldName in self.names :
+                array[fieldName] = columns[fieldName]
+        return np.ascontiguousarray(array, dtype=self.dtype).tobytes()
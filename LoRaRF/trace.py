@@ -0,0 +1,315 @@
+import mmap
+import queue
+import struct
+import threading
+import time
+from collections import namedtuple
+from .transport import BaseTransport
+
+# record types
+TRACE_XFER                                 = 0x01        # full duplex transfer, data is sent bytes followed by received bytes
+TRACE_WRITE                                = 0x02        # write only transfer, data is sent bytes
+TRACE_OUTPUT                               = 0x03        # output pin level in value
+TRACE_INPUT                                = 0x04        # input pin level read in value
+TRACE_EDGE                                 = 0x05        # rising edge callback invoked
+TRACE_WAIT_EDGE                            = 0x06        # waitForEdge result in value
+
+# record context
+TRACE_MAIN                                 = 0x00        # issued by application thread
+TRACE_CALLBACK                             = 0x01        # issued inside edge callback
+
+# file header: magic, version, reserved, wall clock start in ns, monotonic clock start in ns
+_HEADER = struct.Struct('<4sHHQQ')
+_MAGIC = b'LRFT'
+_VERSION = 1
+# record header: type, context, pin, value, data length, timestamp in ns from start
+_RECORD = struct.Struct('<BBBBIQ')
+
+TraceRecord = namedtuple('TraceRecord', ['type', 'context', 'pin', 'value', 'timestamp', 'tx', 'rx'])
+
+class TraceRecorder(BaseTransport) :
+    """Transport wrapper writing every SPI transfer and GPIO access of wrapped transport to binary trace file"""
+
+    def __init__(self, transport: BaseTransport, path: str) :
+
+        self.transport = transport
+        self._file = open(path, 'wb')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start = time.monotonic_ns()
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, 0, time.time_ns(), self._start))
+
+    def _record(self, recordType: int, pin: int = 0, value: int = 0, data: bytes = b'', length: int = 0) :
+
+        context = TRACE_MAIN
+        if getattr(self._local, 'callback', False) : context = TRACE_CALLBACK
+        timestamp = time.monotonic_ns() - self._start
+        with self._lock :
+            self._file.write(_RECORD.pack(recordType, context, pin & 0xFF, value & 0xFF, length, timestamp))
+            if data : self._file.write(data)
+
+    def close(self) :
+
+        self.transport.close()
+        with self._lock :
+            self._file.flush()
+
+    def cleanup(self) :
+
+        self.transport.cleanup()
+        with self._lock :
+            if not self._file.closed : self._file.close()
+
+    def open(self, bus: int, cs: int, speed: int) :
+
+        self.transport.open(bus, cs, speed)
+
+    def xfer(self, buf: list) -> list :
+
+        feedback = self.transport.xfer(buf)
+        self._record(TRACE_XFER, data=bytes(buf) + bytes(feedback), length=len(buf))
+        return feedback
+
+    def write(self, buf) :
+
+        self.transport.write(buf)
+        data = bytes(buf)
+        self._record(TRACE_WRITE, data=data, length=len(data))
+
+    def setup(self, pin: int, direction: int) :
+
+        self.transport.setup(pin, direction)
+
+    def output(self, pin: int, value: int) :
+
+        self.transport.output(pin, value)
+        self._record(TRACE_OUTPUT, pin, value)
+
+    def input(self, pin: int) -> int :
+
+        value = self.transport.input(pin)
+        self._record(TRACE_INPUT, pin, value)
+        return value
+
+    def addEdgeCallback(self, pin: int, callback) :
+
+        # mark records issued inside callback so replay can feed callback thread separately
+        def edge(channel) :
+            self._record(TRACE_EDGE, pin)
+            self._local.callback = True
+            try :
+                callback(channel)
+            finally :
+                self._local.callback = False
+        self.transport.addEdgeCallback(pin, edge)
+
+    def removeEdgeCallback(self, pin: int) :
+
+        self.transport.removeEdgeCallback(pin)
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+
+        result = self.transport.waitForEdge(pin, timeout)
+        self._record(TRACE_WAIT_EDGE, pin, int(result))
+        return result
+
+
+class TraceReader :
+    """Memory mapped reader of trace file written by TraceRecorder"""
+
+    def __init__(self, path: str) :
+
+        with open(path, 'rb') as f :
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, reserved, self.startTime, self.startMonotonic = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION :
+            raise ValueError("not a LoRaRF trace file or unsupported version")
+        self._offsets = None
+
+    def _index(self) -> list :
+
+        # offset of every record, built once on first random access
+        if self._offsets is None :
+            offsets = []
+            offset = _HEADER.size
+            end = len(self._mmap)
+            while offset + _RECORD.size <= end :
+                offsets.append(offset)
+                recordType, context, pin, value, length, timestamp = _RECORD.unpack_from(self._mmap, offset)
+                offset += _RECORD.size + self._dataLength(recordType, length)
+            self._offsets = offsets
+        return self._offsets
+
+    def _dataLength(self, recordType: int, length: int) -> int :
+
+        if recordType == TRACE_XFER : return 2 * length
+        if recordType == TRACE_WRITE : return length
+        return 0
+
+    def _read(self, offset: int) -> TraceRecord :
+
+        # sent and received bytes copied from mapped file so record stay valid after reader closed
+        recordType, context, pin, value, length, timestamp = _RECORD.unpack_from(self._mmap, offset)
+        start = offset + _RECORD.size
+        tx = self._mmap[start:start+length]
+        rx = None
+        if recordType == TRACE_XFER : rx = self._mmap[start+length:start+2*length]
+        return TraceRecord(recordType, context, pin, value, timestamp, tx, rx)
+
+    def __len__(self) :
+
+        return len(self._index())
+
+    def __getitem__(self, index: int) -> TraceRecord :
+
+        return self._read(self._index()[index])
+
+    def __iter__(self) :
+
+        for offset in self._index() :
+            yield self._read(offset)
+
+    def close(self) :
+
+        self._offsets = None
+        self._mmap.close()
+
+
+class TraceReplay(BaseTransport) :
+    """Fake transport replaying trace file, transfers of application and edge callbacks are fed from separate record streams"""
+
+    def __init__(self, path: str, strict: bool = False) :
+
+        # all records loaded once then trace file closed
+        reader = TraceReader(path)
+        records = list(reader)
+        reader.close()
+        self._count = len(records)
+        self._main = [(i, r) for i, r in enumerate(records) if r.context == TRACE_MAIN and r.type != TRACE_EDGE]
+        self._callback = [r for r in records if r.context == TRACE_CALLBACK and r.type != TRACE_EDGE]
+        self._edges = [(i, r.pin) for i, r in enumerate(records) if r.type == TRACE_EDGE]
+        self._mainPos = 0
+        self._callbackPos = 0
+        self._edgePos = 0
+        self._strict = strict
+        self._lock = threading.RLock()
+        self._callbacks = {}
+        self._queue = queue.Queue()
+        self._thread = None
+        # number of requests not matching recorded type or sent bytes and requests after end of trace
+        self.mismatches = 0
+        self.exhausted = 0
+
+    def _next(self, recordType: int, pin: int = -1, tx = None) :
+
+        # take next record from stream of calling thread
+        with self._lock :
+            if threading.current_thread() is self._thread :
+                stream = self._callback
+                pos = self._callbackPos
+                entries = lambda i : stream[i]
+            else :
+                stream = self._main
+                pos = self._mainPos
+                entries = lambda i : stream[i][1]
+            record = None
+            while pos < len(stream) :
+                candidate = entries(pos)
+                pos += 1
+                if candidate.type == recordType and (pin < 0 or candidate.pin == pin) :
+                    record = candidate
+                    break
+                self._mismatch("expected record type {} but trace has type {}".format(recordType, candidate.type))
+            if stream is self._callback : self._callbackPos = pos
+            else : self._mainPos = pos
+            if record is None :
+                self.exhausted += 1
+                if self._strict : raise EOFError("end of trace reached")
+            elif tx is not None and bytes(tx) != bytes(record.tx) :
+                self._mismatch("sent bytes differ from trace")
+            self._fireEdges()
+            return record
+
+    def _mismatch(self, message: str) :
+
+        self.mismatches += 1
+        if self._strict : raise ValueError(message)
+
+    def _fireEdges(self) :
+
+        # edge recorded before next application record is due once application consumed all records before it
+        nextMain = self._count
+        if self._mainPos < len(self._main) : nextMain = self._main[self._mainPos][0]
+        while self._edgePos < len(self._edges) and self._edges[self._edgePos][0] < nextMain :
+            pin = self._edges[self._edgePos][1]
+            callback = self._callbacks.get(pin)
+            if callback is None : break
+            self._edgePos += 1
+            self._queue.put((callback, pin))
+
+    def _run(self) :
+
+        # edge callbacks run in their own thread like RPi.GPIO
+        while True :
+            callback, pin = self._queue.get()
+            if callback is None : return
+            callback(pin)
+
+    def open(self, bus: int, cs: int, speed: int) :
+
+        pass
+
+    def close(self) :
+
+        pass
+
+    def xfer(self, buf: list) -> list :
+
+        record = self._next(TRACE_XFER, tx=buf)
+        if record is None : return [0] * len(buf)
+        return list(record.rx)
+
+    def write(self, buf) :
+
+        self._next(TRACE_WRITE, tx=buf)
+
+    def setup(self, pin: int, direction: int) :
+
+        pass
+
+    def output(self, pin: int, value: int) :
+
+        record = self._next(TRACE_OUTPUT, pin)
+        if record is not None and record.value != value :
+            with self._lock : self._mismatch("output level differ from trace")
+
+    def input(self, pin: int) -> int :
+
+        record = self._next(TRACE_INPUT, pin)
+        if record is None : return self.LOW
+        return record.value
+
+    def addEdgeCallback(self, pin: int, callback) :
+
+        with self._lock :
+            self._callbacks[pin] = callback
+            if self._thread is None :
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._fireEdges()
+
+    def removeEdgeCallback(self, pin: int) :
+
+        with self._lock :
+            self._callbacks.pop(pin, None)
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+
+        record = self._next(TRACE_WAIT_EDGE, pin)
+        return record is not None and record.value != 0
+
+    def cleanup(self) :
+
+        if self._thread is not None :
+            self._queue.put((None, 0))
+        self._callbacks.clear()
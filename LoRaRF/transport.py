@@ -0,0 +1,122 @@
+class BaseTransport :
+    """Interface of SPI bus and GPIO pins access used by LoRa drivers"""
+
+    # GPIO pin level and direction
+    LOW                                    = 0
+    HIGH                                   = 1
+    OUT                                    = 0
+    IN                                     = 1
+
+    def open(self, bus: int, cs: int, speed: int) :
+        raise NotImplementedError
+
+    def close(self) :
+        raise NotImplementedError
+
+    def xfer(self, buf: list) -> list :
+        raise NotImplementedError
+
+    def write(self, buf) :
+
+        # write only transfer of bytes-like object, response is discarded
+        self.xfer(list(buf))
+
+    def setup(self, pin: int, direction: int) :
+        raise NotImplementedError
+
+    def output(self, pin: int, value: int) :
+        raise NotImplementedError
+
+    def input(self, pin: int) -> int :
+        raise NotImplementedError
+
+    def addEdgeCallback(self, pin: int, callback) :
+        raise NotImplementedError
+
+    def removeEdgeCallback(self, pin: int) :
+        raise NotImplementedError
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+        raise NotImplementedError
+
+    def cleanup(self) :
+        raise NotImplementedError
+
+
+class SpiGpioTransport(BaseTransport) :
+    """Transport using spidev for SPI bus and RPi.GPIO for GPIO pins"""
+
+    _gpioReady = False
+
+    def __init__(self) :
+
+        import spidev
+        import RPi.GPIO
+        # every transport own a SPI handle so several radios can use different bus and chip select
+        self._spi = spidev.SpiDev()
+        self._gpio = RPi.GPIO
+        self._pins = set()
+        if not SpiGpioTransport._gpioReady :
+            self._gpio.setmode(RPi.GPIO.BCM)
+            self._gpio.setwarnings(False)
+            SpiGpioTransport._gpioReady = True
+
+    def open(self, bus: int, cs: int, speed: int) :
+
+        # open spi line and set bus id, chip select, and spi speed
+        self._spi.open(bus, cs)
+        self._spi.max_speed_hz = speed
+        self._spi.lsbfirst = False
+        self._spi.mode = 0
+
+    def close(self) :
+
+        self._spi.close()
+
+    def xfer(self, buf: list) -> list :
+
+        if type(buf) is not list : buf = list(buf)
+        return self._spi.xfer2(buf)
+
+    def write(self, buf) :
+
+        # writebytes2 accept buffer protocol object without converting to list
+        self._spi.writebytes2(buf)
+
+    def setup(self, pin: int, direction: int) :
+
+        self._pins.add(pin)
+        if direction == self.OUT : self._gpio.setup(pin, self._gpio.OUT)
+        else : self._gpio.setup(pin, self._gpio.IN)
+
+    def output(self, pin: int, value: int) :
+
+        self._gpio.output(pin, value)
+
+    def input(self, pin: int) -> int :
+
+        return self._gpio.input(pin)
+
+    def addEdgeCallback(self, pin: int, callback) :
+
+        self._gpio.add_event_detect(pin, self._gpio.RISING, callback=callback, bouncetime=10)
+
+    def removeEdgeCallback(self, pin: int) :
+
+        self._gpio.remove_event_detect(pin)
+
+    def waitForEdge(self, pin: int, timeout: float) -> bool :
+
+        # timeout in second (0 for no timeout), RPi.GPIO expect timeout in millisecond
+        if timeout > 0 :
+            channel = self._gpio.wait_for_edge(pin, self._gpio.RISING, timeout=max(int(timeout * 1000), 1))
+        else :
+            channel = self._gpio.wait_for_edge(pin, self._gpio.RISING)
+        return channel is not None
+
+    def cleanup(self) :
+
+        # only release pins used by this transport so other radios keep working
+        if self._pins :
+            self._gpio.cleanup(list(self._pins))
+            self._pins.clear()
@@ -0,0 +1,59 @@
+import os, sys
+currentdir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentdir)))
+from LoRaRF import SX126x
+import asyncio
+
+# Begin LoRa radio and set NSS, reset, busy, IRQ, txen, and rxen pin with connected Raspberry Pi gpio pins
+busId = 0; csId = 0 
+resetPin = 18; busyPin = 20; irqPin = 16; txenPin = 6; rxenPin = -1 
+LoRa = SX126x()
+print("Begin LoRa radio")
+if not LoRa.begin(busId, csId, resetPin, busyPin, irqPin, txenPin, rxenPin) :
+    raise Exception("Something wrong, can't begin LoRa radio")
+
+LoRa.setDio2RfSwitch()
+# Set frequency to 868 Mhz
+print("Set frequency to 868 Mhz")
+LoRa.setFrequency(868000000)
+
+# Configure modulation parameter including spreading factor (SF), bandwidth (BW), and coding rate (CR)
+print("Set modulation parameters:\n\tSpreading factor = 7\n\tBandwidth = 125 kHz\n\tCoding rate = 4/5")
+LoRa.setLoRaModulation(7, 125000, 5)
+
+# Configure packet parameter including header type, preamble length, payload length, and CRC type
+print("Set packet parameters:\n\tExplicit header type\n\tPreamble length = 12\n\tPayload Length = 15\n\tCRC on")
+LoRa.setLoRaPacket(LoRa.HEADER_EXPLICIT, 12, 15, True)
+
+# Set syncronize word for public network (0x3444)
+print("Set syncronize word to 0x3444")
+LoRa.setSyncWord(0x3444)
+
+async def heartbeat() :
+
+    # Other task keep running in event loop while waiting for packet
+    while True :
+        await asyncio.sleep(5)
+        print("Waiting for packet...")
+
+async def main() :
+
+    print("\n-- LoRa Receiver Asyncio --\n")
+    task = asyncio.create_task(heartbeat())
+
+    # Receive packets in RX continuous mode until stop packet received
+    packets = LoRa.packets()
+    async for payload in packets :
+        print(f"{payload}  RSSI = {LoRa.packetRssi():0.2f} dBm | SNR = {LoRa.snr():0.2f} dB")
+        if payload == b"stop" : break
+    # Close generator to stop RX continuous mode before transmit
+    await packets.aclose()
+
+    # Transmit single packet and wait transmit done
+    await LoRa.send(b"bye")
+    task.cancel()
+
+try :
+    asyncio.run(main())
+finally :
+    LoRa.end()
@@ -0,0 +1,54 @@
+import os, sys
+currentdir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentdir)))
+from LoRaRF import SX127x, SX127xEmulator
+import time
+
+# Compare host time to move a packet through SX127x FIFO using one SPI transaction per byte
+# (previous put() and get() implementation) and a single burst transaction
+
+class CountingEmulator(SX127xEmulator) :
+
+    xferCount = 0
+
+    def xfer(self, buf: list) -> list :
+        self.xferCount += 1
+        return super().xfer(buf)
+
+chip = CountingEmulator(timeScale=0)
+LoRa = SX127x(chip)
+if not LoRa.begin() :
+    raise Exception("Something wrong, can't begin LoRa radio")
+
+def putBytewise(data) :
+    for i in range(len(data)) :
+        LoRa.writeRegister(LoRa.REG_FIFO, int(data[i]))
+
+def getBytewise(length) :
+    data = tuple()
+    for i in range(length) :
+        data = data + (LoRa.readRegister(LoRa.REG_FIFO),)
+    return bytes(data)
+
+def putBurst(data) :
+    LoRa.writeRegisterBurst(LoRa.REG_FIFO, data)
+
+def getBurst(length) :
+    return bytes(LoRa.readRegisterBurst(LoRa.REG_FIFO, length))
+
+def measure(put, get, length, repeat) :
+    payload = bytes(range(length))
+    chip.xferCount = 0
+    t = time.perf_counter()
+    for i in range(repeat) :
+        LoRa.writeRegister(LoRa.REG_FIFO_ADDR_PTR, 0)
+        put(payload)
+        LoRa.writeRegister(LoRa.REG_FIFO_ADDR_PTR, 0)
+        if get(length) != payload : raise Exception("FIFO data mismatch")
+    return (time.perf_counter() - t) / repeat, chip.xferCount / repeat
+
+print("Length | Bytewise (us / xfer) | Burst (us / xfer) | Speedup")
+for length in (1, 16, 64, 128, 255) :
+    bytewise, bytewiseXfer = measure(putBytewise, getBytewise, length, 200)
+    burst, burstXfer = measure(putBurst, getBurst, length, 200)
+    print("{0:6d} | {1:10.1f} / {2:5.0f}  | {3:9.1f} / {4:3.0f}   | {5:5.1f}x".format(length, bytewise * 1e6, bytewiseXfer, burst * 1e6, burstXfer, bytewise / burst))
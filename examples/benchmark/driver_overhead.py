@@ -0,0 +1,143 @@
+import os, sys
+currentdir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentdir)))
+from LoRaRF import SX126x, SX127x, SX126xEmulator, SX127xEmulator, Metrics, InstrumentedTransport, TraceRecorder, TraceReplay
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+
+# Measure host overhead of public driver methods: wall time, SPI transactions and allocated memory per call
+# Emulated transport include chip model time in every SPI transaction, null transport replay responses recorded
+# from emulator so only driver time is measured. Results are stored in JSON and can be compared to previous release
+
+parser = argparse.ArgumentParser(description="LoRaRF driver host overhead benchmark")
+parser.add_argument("--transport", choices=("emulator", "null"), default="emulator")
+parser.add_argument("--repeat", type=int, default=50)
+parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 16, 32, 64, 128, 255])
+parser.add_argument("--output", help="write results to JSON file")
+parser.add_argument("--compare", help="compare with results of previous JSON file")
+parser.add_argument("--threshold", type=float, default=1.5, help="wall time or allocation ratio reported as regression")
+args = parser.parse_args()
+
+class Bench :
+
+    def __init__(self, metrics) :
+        self.metrics = metrics
+        self.results = {}
+
+    def count(self) :
+        # total SPI transfers counted by instrumented transport
+        return sum(self.metrics.asDict().get('spi_transfers', {}).values())
+
+    def call(self, name, size, function, traced = False) :
+        # last call of every operation is traced for allocation only so tracing does not affect wall time
+        entry = self.results.setdefault((name, size), {'times': [], 'spi': 0, 'alloc': 0})
+        count = self.count()
+        if traced :
+            tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            function()
+            entry['alloc'] = tracemalloc.get_traced_memory()[1] - base
+            tracemalloc.stop()
+            return
+        t = time.perf_counter()
+        function()
+        entry['times'].append(time.perf_counter() - t)
+        entry['spi'] += self.count() - count
+
+def run(LoRa, bench, chip) :
+    # identical call sequence for emulator, recording, and replay run
+    for i in range(args.repeat + 1) :
+        bench.call('begin', 0, lambda: LoRa.begin(irq=-1), i == args.repeat)
+    for i in range(args.repeat + 1) :
+        bench.call('setFrequency', 0, lambda: LoRa.setFrequency(868100000 + (i % 2) * 200000), i == args.repeat)
+    for i in range(args.repeat + 1) :
+        bench.call('setLoRaModulation', 0, lambda: LoRa.setLoRaModulation(7 + i % 2, 125000, 5), i == args.repeat)
+    LoRa.setLoRaModulation(7, 125000, 5)
+    for size in args.sizes :
+        payload = bytes(i % 256 for i in range(size))
+        for i in range(args.repeat + 1) :
+            traced = i == args.repeat
+            bench.call('beginPacket', size, LoRa.beginPacket, traced)
+            bench.call('put', size, lambda: LoRa.put(payload), traced)
+            bench.call('endPacket', size, LoRa.endPacket, traced)
+            LoRa.wait(1)
+        for i in range(args.repeat + 1) :
+            traced = i == args.repeat
+            bench.call('request', size, LoRa.request, traced)
+            if chip is not None : chip.inject(payload)
+            bench.call('wait', size, lambda: LoRa.wait(1), traced)
+            bench.call('get', size, lambda: LoRa.get(LoRa.available()), traced)
+
+def benchmark(Driver, Emulator) :
+    # SPI transfers counted by InstrumentedTransport wrapping emulator or replay transport
+    if args.transport == "emulator" :
+        chip = Emulator(timeScale=0)
+        bench = Bench(Metrics())
+        run(Driver(InstrumentedTransport(chip, bench.metrics)), bench, chip)
+    else :
+        # record chip responses once then measure driver against replay of the recording
+        path = os.path.join(tempfile.mkdtemp(), "benchmark.lrft")
+        chip = Emulator(timeScale=0)
+        recording = Bench(Metrics())
+        recorder = TraceRecorder(InstrumentedTransport(chip, recording.metrics), path)
+        run(Driver(recorder), recording, chip)
+        recorder.close()
+        recorder.cleanup()
+        bench = Bench(Metrics())
+        run(Driver(InstrumentedTransport(TraceReplay(path), bench.metrics)), bench, None)
+        os.remove(path)
+    results = []
+    for (name, size), entry in bench.results.items() :
+        times = entry['times']
+        results.append({
+            'driver': Driver.__name__,
+            'operation': name,
+            'payload': size,
+            'wall_us': sum(times) / len(times) * 1e6,
+            'wall_min_us': min(times) * 1e6,
+            'spi': entry['spi'] / len(times),
+            'alloc_bytes': entry['alloc']
+        })
+    return results
+
+results = benchmark(SX126x, SX126xEmulator) + benchmark(SX127x, SX127xEmulator)
+report = {
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'transport': args.transport,
+    'repeat': args.repeat,
+    'results': results
+}
+
+baseline = {}
+if args.compare :
+    with open(args.compare) as f :
+        for r in json.load(f)['results'] :
+            baseline[(r['driver'], r['operation'], r['payload'])] = r
+
+print("Driver | Operation         | Payload | wall (us) |  SPI  | alloc (B) | regression")
+regressions = 0
+for r in results :
+    note = ""
+    base = baseline.get((r['driver'], r['operation'], r['payload']))
+    if base is not None :
+        flags = []
+        # minimum wall time is compared since mean is sensitive to scheduling noise
+        if r['wall_min_us'] > base['wall_min_us'] * args.threshold : flags.append("wall x{:.2f}".format(r['wall_min_us'] / base['wall_min_us']))
+        if r['spi'] > base['spi'] : flags.append("SPI {:+.1f}".format(r['spi'] - base['spi']))
+        if r['alloc_bytes'] > max(base['alloc_bytes'] * args.threshold, base['alloc_bytes'] + 256) :
+            flags.append("alloc {:+d} B".format(r['alloc_bytes'] - base['alloc_bytes']))
+        if flags : regressions += 1
+        note = ", ".join(flags)
+    print("{0} | {1:17s} | {2:7d} | {3:9.1f} | {4:5.1f} | {5:9d} | {6}".format(r['driver'], r['operation'], r['payload'], r['wall_us'], r['spi'], r['alloc_bytes'], note))
+
+if args.output :
+    with open(args.output, "w") as f :
+        json.dump(report, f, indent=2)
+if args.compare :
+    print("{} regression(s) against {}".format(regressions, args.compare))
+    sys.exit(1 if regressions else 0)
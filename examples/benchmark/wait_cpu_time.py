@@ -0,0 +1,40 @@
+import os, sys
+currentdir = os.path.dirname(os.path.realpath(__file__))
+sys.path.append(os.path.dirname(os.path.dirname(currentdir)))
+from LoRaRF import SX126x, SX127x, SX126xEmulator, SX127xEmulator
+import time
+
+# Measure CPU time consumed by wait() for every transmitted packet using emulated chip with real timing
+# Spreading factor 9 and 32 bytes payload give about 250 ms time on air
+
+irqPin = 16
+packets = 5
+payload = bytes(32)
+
+def measure(LoRa) :
+    LoRa.setLoRaModulation(9, 125000, 5)
+    LoRa.setLoRaPacket(LoRa.HEADER_EXPLICIT, 12, 32, True)
+    cpu = 0.0
+    wall = 0.0
+    for i in range(packets) :
+        LoRa.beginPacket()
+        LoRa.put(payload)
+        LoRa.endPacket()
+        c = time.process_time()
+        t = time.perf_counter()
+        LoRa.wait()
+        cpu += time.process_time() - c
+        wall += time.perf_counter() - t
+    return cpu / packets, wall / packets
+
+print("Driver | IRQ pin | wall time (ms) | CPU time (ms) | CPU load")
+for name in ("SX126x", "SX127x") :
+    for irq in (irqPin, -1) :
+        if name == "SX126x" :
+            LoRa = SX126x(SX126xEmulator(dio1=irq))
+            LoRa.begin(irq=irq)
+        else :
+            LoRa = SX127x(SX127xEmulator(dio0=irq))
+            LoRa.begin(irq=irq)
+        cpu, wall = measure(LoRa)
+        print("{0} | {1:7d} | {2:14.1f} | {3:13.2f} | {4:7.1f}%".format(name, irq, wall * 1000, cpu * 1000, cpu / wall * 100))
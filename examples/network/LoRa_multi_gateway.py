@@ -0,0 +1,64 @@
+import os, sys
+currentdir = os.path.dirname(os.path.realpath(__file__))
+parentdir = os.path.dirname(currentdir)
+sys.path.append(parentdir)
+from LoRaRF import SX126x, SX127x, Gateway, PayloadSchema
+
+# Gateway with two radios listening on different channel and spreading factor
+# Packets received by both radios are dispatched through one queue so none missed while printing
+LoRa1 = SX126x()
+LoRa2 = SX127x()
+print("Begin LoRa radios")
+if not LoRa1.begin(0, 0, 18, 20, 16, 6, -1) :
+    raise Exception("Something wrong, can't begin SX126x radio")
+if not LoRa2.begin(0, 1, 22, 26) :
+    raise Exception("Something wrong, can't begin SX127x radio")
+
+# Radio 1 on 868.1 Mhz with SF7 and radio 2 on 868.3 Mhz with SF9
+LoRa1.setDio2RfSwitch()
+LoRa1.setFrequency(868100000)
+LoRa1.setRxGain(LoRa1.RX_GAIN_BOOSTED)
+LoRa1.setLoRaModulation(7, 125000, 5)
+LoRa2.setFrequency(868300000)
+LoRa2.setRxGain(LoRa2.RX_GAIN_BOOSTED, LoRa2.RX_GAIN_AUTO)
+LoRa2.setLoRaModulation(9, 125000, 5)
+for LoRa in (LoRa1, LoRa2) :
+    LoRa.setLoRaPacket(LoRa.HEADER_IMPLICIT, 12, 12, True)
+    LoRa.setSyncWord(0x34)
+
+gateway = Gateway()
+gateway.addRadio(LoRa1, "868.1 SF7")
+gateway.addRadio(LoRa2, "868.3 SF9")
+gateway.start()
+print("\n-- LoRa Multi Radio Gateway --\n")
+
+# IDs and message format from received message
+gatewayId = 0xCC
+message = PayloadSchema((
+    ('gatewayId', 'B'),
+    ('nodeId', 'B'),
+    ('messageId', 'H'),
+    ('time', 'I'),
+    ('data', 'i')
+))
+
+try :
+    for packet in gateway.packets() :
+
+        if packet.status != LoRa1.STATUS_RX_DONE or len(packet.payload) != message.size :
+            print("{0}: receive error status {1}".format(packet.radio, packet.status))
+            continue
+        structure = message.unpack(packet.payload)
+        if structure.gatewayId != gatewayId :
+            print("{0}: received message with wrong gateway ID (0x{1:02X})".format(packet.radio, structure.gatewayId))
+            continue
+
+        print("{0}: node 0x{1:02X} message {2} time {3} data {4} | RSSI = {5:0.2f} dBm | SNR = {6:0.2f} dB".format(
+            packet.radio, structure.nodeId, structure.messageId, structure.time, structure.data, packet.rssi, packet.snr))
+
+except KeyboardInterrupt :
+    gateway.stop()
+    for stats in gateway.stats() :
+        print("{0}: received {1}, errors {2}, dropped {3}, average RSSI {4:0.1f} dBm".format(stats.radio, stats.received, stats.errors, stats.dropped, stats.rssi))
+    LoRa1.end()
+    LoRa2.end()
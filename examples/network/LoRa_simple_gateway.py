@@ -2,9 +2,8 @@ import os, sys
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
-from LoRaRF import SX126x
+from LoRaRF import SX126x, PayloadSchema
 import time
-import struct
 
 # Begin LoRa radio and set NSS, reset, busy, IRQ, txen, and rxen pin with connected Raspberry Pi gpio pins
 busId = 0; csId = 0 
@@ -44,35 +43,38 @@ print("Set syncronize word to 0x3444")
 
 print("\n-- LoRa Gateway --\n")
 
-# IDs and message format from received message
+# IDs and message format from received message, compiled once
 gatewayId = 0xCC
-format = 'BBHIi'
-length = struct.calcsize(format)
+message = PayloadSchema((
+    ('gatewayId', 'B'),
+    ('nodeId', 'B'),
+    ('messageId', 'H'),
+    ('time', 'I'),
+    ('data', 'i')
+))
 
 # Transmit message continuously
 while True :
 
-    # Set RF module to listen mode with 20 ms RX mode and 10 ms sleep
+    # Set RF module to listen mode with RX and sleep period calculated from spreading factor, bandwidth, and preamble length
     # Some LoRa packet will not be received if sleep period too long or preamble length too short
-    rxPeriod = 20
-    sleepPeriod = 10
+    rxPeriod, sleepPeriod = LoRa.listenPeriods()
     LoRa.listen(rxPeriod, sleepPeriod)
     # Wait for incoming LoRa packet
     LoRa.wait()
 
     # Get received structured message
-    message = LoRa.get(length)
-    structure = struct.unpack(format, message)
+    structure = message.get(LoRa)
 
     # Check gateway ID from received message
-    if structure[0] == gatewayId :
+    if structure.gatewayId == gatewayId :
 
         # Print structured message
         print("Gateway ID    : 0x{0:02X}".format(gatewayId))
-        print("Node ID       : 0x{0:02X}".format(structure[1]))
-        print(f"Message ID    : {structure[2]}")
-        print(f"Time          : {structure[3]}")
-        print(f"Data          : {structure[4]}")
+        print("Node ID       : 0x{0:02X}".format(structure.nodeId))
+        print(f"Message ID    : {structure.messageId}")
+        print(f"Time          : {structure.time}")
+        print(f"Data          : {structure.data}")
 
         # Print packet status
         print("Packet status : RSSI = {0:0.2f} dBm | SNR = {1:0.2f} dB\n".format(LoRa.packetRssi(), LoRa.snr()))
@@ -80,7 +82,7 @@ while True :
     else :
 
         # Print error message
-        print("Received message with wrong gateway ID (0x{0:02X})".format(structure[0]))
+        print("Received message with wrong gateway ID (0x{0:02X})".format(structure.gatewayId))
 
     # Show received status in case CRC or header error occur
     status = LoRa.status()
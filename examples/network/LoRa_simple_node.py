@@ -2,9 +2,8 @@ import os, sys
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
-from LoRaRF import SX126x
+from LoRaRF import SX126x, PayloadSchema
 import time
-import struct
 import random
 
 # Begin LoRa radio and set NSS, reset, busy, IRQ, txen, and rxen pin with connected Raspberry Pi gpio pins
@@ -49,8 +48,13 @@ print("\n-- LoRa Node --\n")
 gatewayId = 0xCC
 nodeId = 0x77
 messageId = 0
-format = 'BBHIi'
-length = struct.calcsize(format)
+message = PayloadSchema((
+    ('gatewayId', 'B'),
+    ('nodeId', 'B'),
+    ('messageId', 'H'),
+    ('time', 'I'),
+    ('data', 'i')
+))
 
 # Transmit message continuously
 while True :
@@ -63,13 +67,12 @@ while True :
         round(time.time()),
         random.randrange(-1073741824, 1073741824)
     ]
-    message = struct.pack(format, *structure)
     messageId = (messageId + 1) % 65536
 
     # Transmit structured message
     # Set transmit timeout to 250 ms
     LoRa.beginPacket()
-    LoRa.put(message)
+    message.put(LoRa, *structure)
     LoRa.endPacket(250)
     LoRa.wait()
 
@@ -0,0 +1,30 @@
+import pytest
+from LoRaRF import SX126x, SX127x, SX126xEmulator, SX127xEmulator
+
+# driver, emulator, and name of emulator IRQ pin argument of every chip family
+DRIVERS = {
+    'SX126x': (SX126x, SX126xEmulator, 'dio1'),
+    'SX127x': (SX127x, SX127xEmulator, 'dio0')
+}
+IRQ_PIN = 16
+
+def emulated(name: str, irq: int = -1, timeScale: float = 0) :
+
+    # begun driver on emulated chip, IRQ pin -1 for polling operation
+    Driver, Emulator, pin = DRIVERS[name]
+    chip = Emulator(**{pin: irq}, timeScale=timeScale)
+    radio = Driver(chip)
+    assert radio.begin(irq=irq)
+    return radio, chip
+
+def emulatedPair(name: str, irq: int = -1, timeScale: float = 0) :
+
+    # transmitter and receiver with connected emulated chips
+    tx, chipTx = emulated(name, -1, timeScale)
+    rx, chipRx = emulated(name, irq, timeScale)
+    chipTx.connect(chipRx)
+    return tx, rx, chipRx
+
+@pytest.fixture(params=sorted(DRIVERS))
+def driver(request) :
+    return request.param
@@ -0,0 +1,54 @@
+import pytest
+from LoRaRF import timeOnAir, timeOnAirArray, FAMILY_SX126X, FAMILY_SX127X
+from LoRaRF.airtime import HEADER_EXPLICIT, HEADER_IMPLICIT
+from conftest import emulated
+
+# time on air in ms from Semtech formula, preamble 8, explicit header, CRC on, coding rate 4/5, 125 kHz
+@pytest.mark.parametrize("sf, length, ldro, expected", [
+    (7, 13, False, 46.336),
+    (7, 64, False, 118.016),
+    (12, 64, True, 2793.472),
+])
+def test_datasheet_values(sf, length, ldro, expected) :
+
+    for family in (FAMILY_SX126X, FAMILY_SX127X) :
+        airtime = timeOnAir(sf, 125000, 5, length, 8, HEADER_EXPLICIT, True, ldro, family) * 1000
+        assert airtime == pytest.approx(expected, abs=0.001)
+
+def test_low_spreading_factor_family() :
+
+    # SX126x SF6: (8 + 6.25) preamble and 8 + 3 * 5 payload symbols of 0.512 ms
+    assert timeOnAir(6, 125000, 5, 10, 8, HEADER_IMPLICIT, True, False, FAMILY_SX126X) * 1000 == pytest.approx(19.072)
+    # SX127x SF6: (8 + 4.25) preamble and 8 + 4 * 5 payload symbols of 0.512 ms
+    assert timeOnAir(6, 125000, 5, 10, 8, HEADER_IMPLICIT, True, False, FAMILY_SX127X) * 1000 == pytest.approx(20.608)
+
+def test_ldro_from_symbol_time() :
+
+    assert timeOnAir(12, 125000, 5, 64, 8, HEADER_EXPLICIT, True, None) == timeOnAir(12, 125000, 5, 64, 8, HEADER_EXPLICIT, True, True)
+    assert timeOnAir(7, 125000, 5, 64, 8, HEADER_EXPLICIT, True, None) == timeOnAir(7, 125000, 5, 64, 8, HEADER_EXPLICIT, True, False)
+
+def test_array_match_scalar() :
+
+    np = pytest.importorskip("numpy")
+    sfs = np.arange(5, 13)[:, None]
+    lengths = np.arange(1, 256)
+    for family in (FAMILY_SX126X, FAMILY_SX127X) :
+        array = timeOnAirArray(sfs, 125000, 5, lengths, 8, HEADER_EXPLICIT, True, None, family)
+        for i, sf in enumerate(range(5, 13)) :
+            for length in (1, 17, 255) :
+                assert array[i, length - 1] == pytest.approx(timeOnAir(sf, 125000, 5, length, 8, HEADER_EXPLICIT, True, None, family))
+
+def test_driver_family(driver) :
+
+    radio, chip = emulated(driver)
+    radio.setLoRaModulation(6, 125000, 5)
+    radio.setLoRaPacket(radio.HEADER_IMPLICIT, 8, 10, True)
+    family = FAMILY_SX126X if driver == 'SX126x' else FAMILY_SX127X
+    assert radio.timeOnAir() == pytest.approx(timeOnAir(6, 125000, 5, 10, 8, HEADER_IMPLICIT, True, False, family) * 1000)
+
+def test_sx127x_emulator_airtime() :
+
+    radio, chip = emulated('SX127x')
+    radio.setLoRaModulation(6, 125000, 5)
+    radio.setLoRaPacket(radio.HEADER_IMPLICIT, 8, 10, True)
+    assert chip._airtime(10) * 1000 == pytest.approx(radio.timeOnAir(10))
@@ -0,0 +1,60 @@
+import asyncio
+from conftest import emulated, IRQ_PIN
+
+def _standby(radio) -> bool :
+
+    if hasattr(radio, 'getMode') : return radio.getMode() == radio.STATUS_MODE_STDBY_RC
+    return radio.readRegister(radio.REG_OP_MODE) & 0x07 == radio.MODE_STDBY
+
+async def _stopThenSend(radio, chip) :
+
+    async def feed() :
+        await asyncio.sleep(0.05)
+        chip.inject(b"hello")
+        await asyncio.sleep(0.05)
+        chip.inject(b"stop")
+    asyncio.get_running_loop().create_task(feed())
+    received = []
+    # generator is not referenced after break so event loop close it later
+    async for payload in radio.packets() :
+        received.append(payload)
+        if payload == b"stop" : break
+    sent = await asyncio.wait_for(radio.send(b"bye"), 3)
+    return received, sent
+
+def test_send_receive_irq(driver) :
+
+    # SX127x symbol timeout register limit RX timeout to about 1 second with SF7
+    radio, chip = emulated(driver, IRQ_PIN, 0.1)
+    async def main() :
+        assert await radio.send(b"ping")
+        asyncio.get_running_loop().call_later(0.02, chip.inject, b"pong")
+        return await radio.receive(1000)
+    assert asyncio.run(main()) == b"pong"
+
+def test_receive_timeout_polling(driver) :
+
+    radio, chip = emulated(driver, -1, 0.001)
+    assert asyncio.run(radio.receive(50)) is None
+
+def test_packets_break_then_send(driver) :
+
+    radio, chip = emulated(driver, IRQ_PIN, 0.01)
+    received, sent = asyncio.run(_stopThenSend(radio, chip))
+    assert received == [b"hello", b"stop"]
+    assert sent
+    assert radio.status() == radio.STATUS_TX_DONE
+
+def test_packets_aclose_stop_rx(driver) :
+
+    radio, chip = emulated(driver, IRQ_PIN, 0.001)
+    async def main() :
+        asyncio.get_running_loop().call_later(0.02, chip.inject, b"one")
+        packets = radio.packets()
+        async for payload in packets :
+            break
+        await packets.aclose()
+        return payload
+    assert asyncio.run(main()) == b"one"
+    assert radio._irqNotify is None
+    assert _standby(radio)
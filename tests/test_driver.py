@@ -0,0 +1,242 @@
+import threading
+import time
+import pytest
+from conftest import emulated, emulatedPair, IRQ_PIN
+
+def _settle(radio, received: int) :
+
+    # wait until emulator thread interrupt handler queued number of packets
+    deadline = time.monotonic() + 2
+    while radio.rxQueueStatus()[1] < received and time.monotonic() < deadline :
+        time.sleep(0.001)
+    assert radio.rxQueueStatus()[1] >= received
+
+def _transmit(radio, payload: bytes) -> int :
+
+    radio.beginPacket()
+    radio.put(payload)
+    radio.endPacket()
+    assert radio.wait(1)
+    return radio.status()
+
+def test_round_trip_polling(driver) :
+
+    tx, rx, chip = emulatedPair(driver)
+    for payload in (b'a', b'hello world', bytes(range(255))) :
+        assert rx.request()
+        assert _transmit(tx, payload) == tx.STATUS_TX_DONE
+        assert rx.wait(1)
+        assert rx.status() == rx.STATUS_RX_DONE
+        assert rx.available() == len(payload)
+        assert rx.get(rx.available()) == payload
+
+def test_round_trip_irq(driver) :
+
+    tx, rx, chip = emulatedPair(driver, IRQ_PIN)
+    assert rx.request()
+    assert _transmit(tx, b'ping') == tx.STATUS_TX_DONE
+    # interrupt handler store payload length and packet info before wait() return
+    assert rx.wait(1)
+    assert rx.status() == rx.STATUS_RX_DONE
+    payload, info = rx.getPacket()
+    assert payload == b'ping' and info.length == 4
+
+def test_crc_error_status(driver) :
+
+    radio, chip = emulated(driver)
+    radio.request()
+    chip.inject(b'noise', crcError=True)
+    assert radio.wait(1)
+    assert radio.status() == radio.STATUS_CRC_ERR
+
+def test_send_many_order(driver) :
+
+    # receiver interrupt handler need emulated airtime to read packet before next one arrive
+    tx, rx, chip = emulatedPair(driver, IRQ_PIN, 0.01)
+    rx.setRxQueue(16)
+    rx.request(rx.RX_CONTINUOUS)
+    # payloads both staged together in data buffer and too long to share it
+    payloads = [bytes([i]) * (20 + i * 40 % 230) for i in range(8)]
+    report = tx.sendMany(iter(payloads))
+    assert report.results == [tx.STATUS_TX_DONE] * len(payloads)
+    assert report.elapsed > 0 and report.maxPacketRate > 0
+    _settle(rx, len(payloads))
+    packets = [rx.popPacket() for _ in payloads]
+    assert [packet.payload for packet in packets] == payloads
+    assert rx.popPacket() is None
+
+def test_send_many_report(driver) :
+
+    radio, chip = emulated(driver)
+    payloads = [b'a' * 10, b'b' * 100, b'c' * 200]
+    endPacket = radio.endPacket
+    calls = []
+    # second packet fail to start transmit
+    def failing(timeout = 0) :
+        calls.append(timeout)
+        if len(calls) == 2 : return False
+        return endPacket(timeout)
+    radio.endPacket = failing
+    report = radio.sendMany(payloads)
+    assert report.results == [radio.STATUS_TX_DONE, radio.STATUS_DEFAULT, radio.STATUS_TX_DONE]
+    airtime = sum(radio.timeOnAir(len(payload)) for payload in payloads) / 1000
+    assert abs(report.maxPacketRate - len(payloads) / airtime) < 1e-9
+    assert report.packetRate == len(payloads) / report.elapsed
+
+def test_send_many_lost_interrupt(driver) :
+
+    # emulated airtime so TX done interrupt raised after handler removed
+    radio, chip = emulated(driver, IRQ_PIN, 0.01)
+    endPacket = radio.endPacket
+    def lost(timeout = 0) :
+        started = endPacket(timeout)
+        chip.removeEdgeCallback(IRQ_PIN)
+        return started
+    radio.endPacket = lost
+    start = time.monotonic()
+    report = radio.sendMany([b'hello'])
+    assert report.results == [radio.STATUS_TX_TIMEOUT]
+    assert time.monotonic() - start < 2
+
+def test_send_many_reject_long_payload(driver) :
+
+    radio, chip = emulated(driver)
+    with pytest.raises(ValueError) :
+        radio.sendMany([bytes(256)])
+    # current packet finished before invalid next payload raised
+    sent = []
+    status = radio.status
+    radio.status = lambda : sent.append(status()) or sent[-1]
+    with pytest.raises(ValueError) :
+        radio.sendMany([b'first', bytes(300), b'never'])
+    assert sent == [radio.STATUS_TX_DONE]
+
+def test_rx_queue_overflow_drop_newest(driver) :
+
+    radio, chip = emulated(driver, IRQ_PIN)
+    radio.setRxQueue(2)
+    radio.request(radio.RX_CONTINUOUS)
+    for i in range(3) :
+        chip.inject(bytes([i]) * 4, rssi=-80, snr=2)
+        _settle(radio, i + 1)
+    assert radio.rxQueueStatus() == (2, 3, 1)
+    first = radio.popPacket()
+    assert first.payload == bytes(4) and first.status == radio.STATUS_RX_DONE and first.snr == 2
+    assert radio.popPacket().payload == b'\x01' * 4
+    assert radio.popPacket() is None
+    # disabled queue keep packets in chip buffer for read()
+    radio.setRxQueue(0)
+    assert radio.rxQueueStatus() == (0, 0, 0)
+
+def test_packet_info_reset_on_timeout(driver) :
+
+    radio, chip = emulated(driver)
+    radio.request()
+    chip.inject(b'first', rssi=-50.0, snr=5.0)
+    assert radio.wait(1)
+    rssi = radio.packetRssi()
+    assert rssi is not None and radio.packetInfo().rssi == rssi
+    # new RX clear packet info and RX timeout does not report previous packet values
+    assert radio.request(10)
+    assert radio.packetInfo() is None
+    assert radio.wait(1)
+    assert radio.status() == radio.STATUS_RX_TIMEOUT
+    info = radio.packetInfo()
+    assert info.rssi is None and info.snr is None and info.length == 0
+    assert radio.packetRssi() is None and radio.snr() is None and radio.signalRssi() is None
+
+def test_lbt_free_channel(driver) :
+
+    radio, chip = emulated(driver)
+    report = radio.sendLbt(b'hello')
+    assert report == (radio.STATUS_TX_DONE, 1, 0.0, 0)
+
+def test_lbt_busy_ratio_per_call(driver) :
+
+    radio, chip = emulated(driver)
+    radio.setFrequency(868100000)
+    chip.setActivity(868100000)
+    report = radio.sendLbt(b'hello', maxAttempts=3, minBackoff=0.1, maxBackoff=0.1)
+    assert report == (radio.STATUS_CAD_DETECTED, 3, 1.0, 0)
+    # busy ratio only count CAD of this transmit
+    chip.setActivity(868100000, False)
+    report = radio.sendLbt(b'hello')
+    assert report == (radio.STATUS_TX_DONE, 1, 0.0, 0)
+
+def test_lbt_cad_error_not_busy(driver) :
+
+    radio, chip = emulated(driver)
+    radio.requestCad = lambda *args : False
+    report = radio.sendLbt(b'hello', maxAttempts=3, minBackoff=0.1, maxBackoff=0.1)
+    assert report == (radio.STATUS_CAD_WAIT, 3, 0.0, 3)
+
+def test_lbt_transmit_failure(driver) :
+
+    # emulated airtime so TX done interrupt raised after handler removed
+    radio, chip = emulated(driver, IRQ_PIN, 0.01)
+    endPacket = radio.endPacket
+    radio.endPacket = lambda timeout = 0 : False
+    assert radio.sendLbt(b'hello').status == radio.STATUS_DEFAULT
+    # TX done interrupt lost, wait bounded by time on air and radio back to standby
+    def lost(timeout = 0) :
+        started = endPacket(timeout)
+        chip.removeEdgeCallback(IRQ_PIN)
+        return started
+    radio.endPacket = lost
+    start = time.monotonic()
+    assert radio.sendLbt(b'hello').status == radio.STATUS_TX_TIMEOUT
+    assert time.monotonic() - start < 2
+
+def _mainTransfers(chip) -> list :
+
+    # record SPI transfers issued by test thread, not by interrupt handler in emulator thread
+    sent = []
+    xfer = chip.xfer
+    main = threading.current_thread()
+    def counting(buf) :
+        if threading.current_thread() is main : sent.append(buf[0])
+        return xfer(buf)
+    chip.xfer = counting
+    return sent
+
+def test_wait_irq_path(driver) :
+
+    radio, chip = emulated(driver, IRQ_PIN, 0.01)
+    radio.request()
+    sent = _mainTransfers(chip)
+    threading.Timer(0.05, chip.inject, (b'late',)).start()
+    start = time.monotonic()
+    # blocked on event set by interrupt handler without any SPI transfer
+    assert radio.wait(2)
+    assert time.monotonic() - start >= 0.04
+    assert sent == []
+    assert radio.status() == radio.STATUS_RX_DONE
+    assert radio.get(radio.available()) == b'late'
+
+def test_wait_polling_path(driver) :
+
+    radio, chip = emulated(driver, -1, 0.01)
+    radio.request()
+    sent = _mainTransfers(chip)
+    threading.Timer(0.05, chip.inject, (b'late',)).start()
+    assert radio.wait(2)
+    # IRQ status polled with increasing interval capped by poll interval
+    assert 0 < len(sent) < 0.1 / radio._pollInterval + 20
+    assert radio.status() == radio.STATUS_RX_DONE
+    assert radio.get(radio.available()) == b'late'
+
+@pytest.mark.parametrize('irq', [-1, IRQ_PIN])
+def test_wait_timeout_keep_state(driver, irq) :
+
+    radio, chip = emulated(driver, irq, 0.01)
+    radio.request()
+    start = time.monotonic()
+    assert not radio.wait(0.05)
+    assert 0.05 <= time.monotonic() - start < 0.5
+    # timeout leave radio waiting so packet arriving later is still received
+    assert radio.status() == radio.STATUS_RX_WAIT
+    assert radio.packetInfo() is None
+    chip.inject(b'after')
+    assert radio.wait(2)
+    assert radio.status() == radio.STATUS_RX_DONE
+    assert radio.get(radio.available()) == b'after'
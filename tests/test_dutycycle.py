@@ -0,0 +1,87 @@
+import pytest
+from LoRaRF import DutyCycleScheduler
+from conftest import emulated
+
+class FakeTime :
+
+    # simulated clock advanced only by sleep
+    def __init__(self) :
+        self.now = 0.0
+        self.sleeps = []
+    def clock(self) :
+        return self.now
+    def sleep(self, delay: float) :
+        self.sleeps.append(delay)
+        self.now += delay
+
+def _scheduler(driver, fake: FakeTime, window: float = 100.0) :
+
+    radio, chip = emulated(driver)
+    radio.setLoRaModulation(7, 125000, 5)
+    radio.setLoRaPacket(radio.HEADER_EXPLICIT, 8, 32, True)
+    scheduler = DutyCycleScheduler(radio, 868100000, window=window, clock=fake.clock, sleep=fake.sleep)
+    return radio, scheduler
+
+def test_blocking_send_use_injected_sleep(driver) :
+
+    fake = FakeTime()
+    radio, scheduler = _scheduler(driver, fake)
+    # 1% of 100 s window is 1 s budget
+    airtime = radio.timeOnAir(50) / 1000
+    count = int(1.0 // airtime)
+    for i in range(count) :
+        assert scheduler.send(bytes(50))
+    assert fake.sleeps == []
+    assert not scheduler.send(bytes(50), block=False)
+    assert scheduler.send(bytes(50))
+    assert len(fake.sleeps) == 1
+    assert fake.sleeps[0] == pytest.approx(100.0, abs=0.01)
+
+def test_usage_and_earliest(driver) :
+
+    fake = FakeTime()
+    radio, scheduler = _scheduler(driver, fake)
+    airtime = radio.timeOnAir(20) / 1000
+    scheduler.record(airtime * 1000)
+    used, budget = scheduler.usage()
+    assert used == pytest.approx(airtime) and budget == pytest.approx(1.0)
+    assert scheduler.earliest(20) == fake.now
+    with pytest.raises(ValueError) :
+        scheduler.setFrequency(915000000)
+
+def test_enqueue_process(driver) :
+
+    fake = FakeTime()
+    radio, scheduler = _scheduler(driver, fake)
+    for i in range(100) :
+        scheduler.enqueue(bytes(100), 869525000)
+    sent = scheduler.process()
+    assert 0 < sent < 100
+    fake.now = scheduler.nextDue()
+    assert scheduler.process() > 0
+
+def test_lost_tx_done_does_not_block(driver) :
+
+    fake = FakeTime()
+    radio, scheduler = _scheduler(driver, fake)
+    waits = []
+    radio.wait = lambda timeout = 0 : waits.append(timeout) or False
+    assert not scheduler.send(bytes(10))
+    assert waits and 0 < waits[0] < 2
+    assert scheduler.usage()[0] == pytest.approx(radio.timeOnAir(10) / 1000)
+
+def test_packet_frequency_keep_default(driver) :
+
+    fake = FakeTime()
+    radio, scheduler = _scheduler(driver, fake)
+    tuned = []
+    setFrequency = radio.setFrequency
+    radio.setFrequency = lambda frequency : tuned.append(frequency) or setFrequency(frequency)
+    assert scheduler.send(bytes(10), 869525000)
+    # radio set back to default frequency after packet with own frequency
+    assert tuned == [869525000, 868100000]
+    assert scheduler.send(bytes(10))
+    assert tuned == [869525000, 868100000]
+    airtime = radio.timeOnAir(10) / 1000
+    assert scheduler.usage()[0] == pytest.approx(airtime)
+    assert scheduler.usage(869525000)[0] == pytest.approx(airtime)
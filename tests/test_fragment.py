@@ -0,0 +1,145 @@
+import io
+import random
+import time
+import pytest
+from LoRaRF import Fragmenter, Reassembler, fragmentLength
+from LoRaRF.fragment import FRAGMENT_HEADER, FRAGMENT_LAST
+from conftest import emulatedPair, IRQ_PIN
+
+def _fragment(messageId: int, index: int, data: bytes = b'x') -> bytes :
+    return FRAGMENT_HEADER.pack(messageId, index) + data
+
+def test_fragments_bytes_and_file_equal() :
+
+    fragmenter = Fragmenter(None, length=20)
+    data = bytes(range(256)) * 3
+    fragments = list(fragmenter.fragments(data, 5))
+    assert fragments == list(fragmenter.fragments(io.BytesIO(data), 5))
+    assert all(len(fragment) == 20 for fragment in fragments[:-1])
+    assert [FRAGMENT_HEADER.unpack_from(f)[1] & FRAGMENT_LAST for f in fragments].count(FRAGMENT_LAST) == 1
+
+def test_empty_message() :
+
+    fragments = list(Fragmenter(None, length=20).fragments(b'', 1))
+    assert len(fragments) == 1
+    assert Reassembler().add(fragments[0]) == b''
+
+def test_reassemble_out_of_order() :
+
+    data = bytes(random.randrange(256) for _ in range(1000))
+    fragments = list(Fragmenter(None, length=40).fragments(data, 9))
+    random.shuffle(fragments)
+    reassembler = Reassembler()
+    results = [reassembler.add(fragment) for fragment in fragments]
+    assert results[-1] == data
+    assert results[:-1] == [None] * (len(fragments) - 1)
+    assert reassembler.status() == (0, 0, 1, 0)
+
+def test_duplicate_fragment_ignored() :
+
+    fragments = list(Fragmenter(None, length=20).fragments(b'a' * 40, 2))
+    reassembler = Reassembler()
+    assert reassembler.add(fragments[0]) is None
+    assert reassembler.add(fragments[0]) is None
+    assert reassembler.add(fragments[1]) is None
+    assert reassembler.add(fragments[2]) == b'a' * 40
+
+def test_sources_separate_message_id() :
+
+    fragmenter = Fragmenter(None, length=20)
+    first = list(fragmenter.fragments(b'1' * 30, 3))
+    second = list(fragmenter.fragments(b'2' * 30, 3))
+    reassembler = Reassembler()
+    assert reassembler.add(first[0], 'a') is None
+    assert reassembler.add(second[0], 'b') is None
+    assert reassembler.add(second[1], 'b') == b'2' * 30
+    assert reassembler.add(first[1], 'a') == b'1' * 30
+
+def test_evict_least_recently_active() :
+
+    fragmenter = Fragmenter(None, length=20)
+    messages = [list(fragmenter.fragments(bytes([i]) * 40, i)) for i in range(3)]
+    reassembler = Reassembler(maxMessages=2)
+    reassembler.add(messages[0][0])
+    reassembler.add(messages[1][0])
+    reassembler.add(messages[2][0])
+    assert reassembler.status()[0] == 2
+    assert reassembler.status()[3] == 1
+    # message 0 evicted so its remaining fragments never complete
+    assert reassembler.add(messages[0][1]) is None
+    assert reassembler.add(messages[0][2]) is None
+    assert reassembler.add(messages[2][1]) is None
+    assert reassembler.add(messages[2][2]) == bytes([2]) * 40
+
+def test_byte_limit() :
+
+    fragmenter = Fragmenter(None, length=20)
+    reassembler = Reassembler(maxBytes=50)
+    for fragment in list(fragmenter.fragments(b'a' * 100, 1))[:4] :
+        reassembler.add(fragment)
+    assert reassembler.status()[1] <= 50
+    assert reassembler.status()[3] == 1
+
+def test_timeout() :
+
+    now = [0.0]
+    reassembler = Reassembler(timeout=10, clock=lambda : now[0])
+    reassembler.add(_fragment(1, 0))
+    now[0] = 10.0
+    reassembler.add(_fragment(2, 0))
+    assert reassembler.status() == (1, 1, 0, 1)
+
+def test_stored_index_after_last_is_corruption() :
+
+    reassembler = Reassembler()
+    assert reassembler.add(_fragment(7, 0)) is None
+    assert reassembler.add(_fragment(7, 5)) is None
+    assert reassembler.add(_fragment(7, 2 | FRAGMENT_LAST)) is None
+    assert reassembler.status() == (0, 0, 0, 1)
+
+def test_conflicting_last_is_corruption() :
+
+    reassembler = Reassembler()
+    assert reassembler.add(_fragment(7, 0)) is None
+    assert reassembler.add(_fragment(7, 3 | FRAGMENT_LAST)) is None
+    assert reassembler.add(_fragment(7, 1 | FRAGMENT_LAST)) is None
+    assert reassembler.status() == (0, 0, 0, 1)
+    # next message with the same ID reassemble normally
+    assert reassembler.add(_fragment(7, 1 | FRAGMENT_LAST, b'b')) is None
+    assert reassembler.add(_fragment(7, 0, b'a')) == b'ab'
+
+def test_short_fragment_ignored() :
+
+    assert Reassembler().add(b'\x01') is None
+
+def test_fragment_length_fill_symbol(driver) :
+
+    tx, rx, chip = emulatedPair(driver)
+    tx.setLoRaModulation(9, 125000, 5)
+    tx.setLoRaPacket(tx.HEADER_EXPLICIT, 12, 255, True)
+    assert fragmentLength(tx) == 255
+    length = fragmentLength(tx, maxAirtime=400)
+    assert tx.timeOnAir(length) <= 400 < tx.timeOnAir(length + 1)
+    with pytest.raises(ValueError) :
+        fragmentLength(tx, maxAirtime=1)
+
+def test_send_over_the_air(driver) :
+
+    # receiver interrupt handler need emulated airtime to read packet before next one arrive
+    tx, rx, chip = emulatedPair(driver, IRQ_PIN, 0.01)
+    rx.setRxQueue(64)
+    rx.request(rx.RX_CONTINUOUS)
+    data = bytes(random.randrange(256) for _ in range(2000))
+    report = Fragmenter(tx).send(io.BytesIO(data))
+    assert all(status == tx.STATUS_TX_DONE for status in report.results)
+    # interrupt handler of receiver read the last packet in emulator thread
+    deadline = time.monotonic() + 2
+    while rx.rxQueueStatus()[1] < len(report.results) and time.monotonic() < deadline :
+        time.sleep(0.001)
+    reassembler = Reassembler()
+    message = None
+    packet = rx.popPacket()
+    while packet is not None :
+        message = reassembler.add(packet.payload)
+        packet = rx.popPacket()
+    assert message == data
@@ -0,0 +1,65 @@
+import time
+from LoRaRF import Gateway
+from conftest import emulated, emulatedPair, IRQ_PIN
+
+def _collect(gateway: Gateway, count: int) -> list :
+
+    packets = []
+    deadline = time.monotonic() + 3
+    while len(packets) < count and time.monotonic() < deadline :
+        packet = gateway.receive(0.1)
+        if packet is not None : packets.append(packet)
+    return packets
+
+def test_mixed_radios_attribution() :
+
+    # SX126x served by interrupt handler and SX127x polled by gateway thread
+    radio1, chip1 = emulated('SX126x', IRQ_PIN, 0.01)
+    radio2, chip2 = emulated('SX127x', -1, 0.01)
+    gateway = Gateway()
+    assert gateway.addRadio(radio1, "sx126x") == "sx126x"
+    assert gateway.addRadio(radio2) == "radio1"
+    gateway.start()
+    chip1.inject(b'one', rssi=-50, snr=8)
+    chip2.inject(b'two', rssi=-90, snr=-4)
+    chip1.inject(b'bad', crcError=True)
+    packets = _collect(gateway, 3)
+    gateway.stop()
+
+    byRadio = {}
+    for packet in packets : byRadio.setdefault(packet.radio, []).append(packet)
+    assert [packet.payload for packet in byRadio['sx126x']] == [b'one', b'bad']
+    assert [packet.payload for packet in byRadio['radio1']] == [b'two']
+    assert byRadio['sx126x'][1].status == radio1.STATUS_CRC_ERR
+    assert byRadio['sx126x'][0].rssi == -50 and byRadio['sx126x'][0].snr == 8
+    assert byRadio['radio1'][0].snr == -4
+
+    stats1, stats2 = gateway.stats()
+    assert (stats1.radio, stats1.received, stats1.errors, stats1.dropped) == ("sx126x", 2, 1, 0)
+    assert (stats2.radio, stats2.received, stats2.errors, stats2.dropped) == ("radio1", 1, 0, 0)
+    # averages only count packets received without error
+    assert stats1.rssi == -50 and stats2.rssi == byRadio['radio1'][0].rssi
+    assert stats1.lastTimestamp == byRadio['sx126x'][1].timestamp
+
+def test_fan_in_over_the_air(driver) :
+
+    # one transmitter per radio, both polled and interrupt driven radios of same driver
+    tx1, rx1, chip1 = emulatedPair(driver, IRQ_PIN, 0.01)
+    tx2, rx2, chip2 = emulatedPair(driver, -1, 0.01)
+    gateway = Gateway()
+    gateway.addRadio(rx1, "irq")
+    gateway.addRadio(rx2, "polled")
+    gateway.start()
+    # polled radio read packet after poll interval, so next round sent after both packets collected
+    packets = []
+    for i in range(5) :
+        assert tx1.sendMany([b'irq' + bytes([i])]).results == [tx1.STATUS_TX_DONE]
+        assert tx2.sendMany([b'polled' + bytes([i])]).results == [tx2.STATUS_TX_DONE]
+        packets += _collect(gateway, 2)
+    gateway.stop()
+    assert gateway.receive(0) is None
+    # every packet attributed to radio which received it, order kept per radio
+    for name in ("irq", "polled") :
+        payloads = [packet.payload for packet in packets if packet.radio == name]
+        assert payloads == [name.encode() + bytes([i]) for i in range(5)]
+    assert [stats.received for stats in gateway.stats()] == [5, 5]
@@ -0,0 +1,96 @@
+from LoRaRF import Metrics, InstrumentedTransport
+from conftest import emulated
+
+def _transfers(chip) -> list :
+
+    # record length of every SPI transfer sent to emulated chip
+    sent = []
+    xfer = chip.xfer
+    def counting(buf) :
+        sent.append(len(buf))
+        return xfer(buf)
+    chip.xfer = counting
+    return sent
+
+def _transmit(radio) :
+
+    radio.beginPacket()
+    radio.put(b'hello')
+    radio.endPacket()
+    assert radio.wait(1)
+
+def test_transfer_counters_and_call_timings(driver) :
+
+    radio, chip = emulated(driver)
+    metrics = Metrics()
+    radio.setMetrics(metrics)
+    sent = _transfers(chip)
+    _transmit(radio)
+    data = metrics.asDict()
+    # every SPI transfer counted with its length under label of first byte
+    assert sum(data['spi_transfers'].values()) == len(sent)
+    assert sum(data['spi_bytes'].values()) == sum(sent)
+    assert sum(histogram['count'] for histogram in data['spi_transfer_seconds'].values()) == len(sent)
+    calls = data['api_call_seconds']
+    assert sorted(calls) == ['beginPacket', 'endPacket', 'put', 'wait']
+    for histogram in calls.values() :
+        assert histogram['count'] == 1 and histogram['sum'] >= 0
+        assert histogram['buckets'][float('inf')] == 1
+    metrics.reset()
+    assert metrics.asDict() == {}
+
+def test_busy_timeout_and_dropped_command() :
+
+    radio, chip = emulated('SX126x')
+    radio.busyCheck = lambda timeout = 0 : True
+    metrics = Metrics()
+    radio.setMetrics(metrics)
+    radio.setStandby(radio.STANDBY_RC)
+    data = metrics.asDict()
+    assert data['busy_timeouts'] == {'': 1}
+    assert data['commands_dropped'] == {'0x80': 1}
+    assert data['busy_wait_seconds']['']['count'] == 1
+    assert 'spi_transfers' not in data
+
+def test_unwrap_restore_methods(driver) :
+
+    radio, chip = emulated(driver)
+    Driver = type(radio)
+    radio.setMetrics(Metrics())
+    first = Metrics()
+    radio.setMetrics(first)
+    # enabling again replace wrappers instead of wrapping twice
+    assert isinstance(radio._transport, InstrumentedTransport)
+    assert radio._transport.transport is chip
+    assert 'beginPacket' in radio.__dict__
+    radio.setMetrics(None)
+    assert radio._transport is chip
+    for name in radio._timedMethods + ('busyCheck',) :
+        assert name not in radio.__dict__
+    assert radio.beginPacket.__func__ is Driver.beginPacket
+    _transmit(radio)
+    assert first.asDict() == {}
+
+def test_open_metrics_format() :
+
+    metrics = Metrics(buckets=(0.001, 0.01))
+    metrics.count('spi_transfers', '0x0e', 2)
+    metrics.count('spi_transfers', '0x80')
+    metrics.count('busy_timeouts')
+    metrics.observe('busy_wait_seconds', '', 0.005)
+    metrics.observe('busy_wait_seconds', '', 0.5)
+    assert metrics.openMetrics().splitlines() == [
+        '# TYPE lora_busy_timeouts counter',
+        'lora_busy_timeouts_total 1',
+        '# TYPE lora_busy_wait_seconds histogram',
+        'lora_busy_wait_seconds_bucket{le="0.001"} 0',
+        'lora_busy_wait_seconds_bucket{le="0.01"} 1',
+        'lora_busy_wait_seconds_bucket{le="+Inf"} 2',
+        'lora_busy_wait_seconds_sum 0.505',
+        'lora_busy_wait_seconds_count 2',
+        '# TYPE lora_spi_transfers counter',
+        'lora_spi_transfers_total{op="0x0e"} 2',
+        'lora_spi_transfers_total{op="0x80"} 1',
+        '# EOF'
+    ]
+    assert metrics.openMetrics('radio').startswith('# TYPE radio_busy_timeouts counter\n')
@@ -0,0 +1,44 @@
+import pytest
+from LoRaRF import listenPeriods, minPreambleLength, missProbability, listenReport
+from conftest import emulated
+
+def test_listen_periods_known_values() :
+
+    # SF7 125 kHz symbol 1.024 ms: RX period cover 4 symbols, sleep period preamble minus 8 symbols and wake time
+    assert listenPeriods(7, 125000, 12) == (5, 3)
+    assert listenPeriods(9, 125000, 16) == (17, 32)
+    assert listenPeriods(12, 125000, 12) == (132, 130)
+    assert listenPeriods(7, 125000, 12, detectSymbols=2) == (3, 7)
+
+def test_listen_periods_never_miss() :
+
+    for (sf, bw, preambleLength) in ((7, 125000, 12), (9, 125000, 16), (10, 250000, 32)) :
+        rxPeriod, sleepPeriod = listenPeriods(sf, bw, preambleLength)
+        assert missProbability(sf, bw, preambleLength, rxPeriod, sleepPeriod) == 0.0
+        assert minPreambleLength(sf, bw, sleepPeriod) <= preambleLength
+
+def test_listen_periods_reject_invalid() :
+
+    # preamble too short, error tell minimum preamble length
+    with pytest.raises(ValueError, match="at least 10 symbols") :
+        listenPeriods(7, 125000, 8)
+    assert listenPeriods(7, 125000, 10) == (5, 1)
+    with pytest.raises(ValueError) :
+        listenPeriods(7, 0, 12)
+    with pytest.raises(ValueError) :
+        listenPeriods(13, 125000, 12)
+    # bandwidth and spreading factor swapped
+    with pytest.raises(ValueError) :
+        listenPeriods(125000, 7, 12)
+    with pytest.raises(ValueError) :
+        listenPeriods(7, 125000, 12, detectSymbols=0)
+
+def test_listen_report_and_radio() :
+
+    report = listenReport(7, 125000, 12)
+    assert report[0].sleepPeriod == 0 and report[0].missProbability == 0.0
+    assert all(a.current > b.current for a, b in zip(report, report[1:]))
+    radio, chip = emulated('SX126x')
+    radio.setLoRaModulation(7, 125000, 5)
+    radio.setLoRaPacket(radio.HEADER_EXPLICIT, 12, 32, True)
+    assert radio.listenPeriods() == (5, 3)
@@ -0,0 +1,113 @@
+import threading
+import time
+from conftest import emulated, IRQ_PIN
+
+def _settle(radio, received: int) :
+
+    # wait until emulator thread interrupt handler processed number of packets
+    deadline = time.monotonic() + 2
+    while radio.rxRingStatus()[2] < received and time.monotonic() < deadline :
+        time.sleep(0.001)
+    assert radio.rxRingStatus()[2] >= received
+
+def _ringRadio(size: int = 64, maxLength: int = 32) :
+
+    radio, chip = emulated('SX126x', IRQ_PIN)
+    radio.setRxRing(size, maxLength)
+    radio.request(radio.RX_CONTINUOUS)
+    return radio, chip
+
+def test_ring_keep_order_and_wrap() :
+
+    radio, chip = _ringRadio()
+    payloads = [bytes([i]) * (10 + i % 20) for i in range(40)]
+    received = []
+    for i, payload in enumerate(payloads) :
+        chip.inject(payload, rssi=-70, snr=5)
+        _settle(radio, i + 1)
+        if i % 7 == 6 : received += radio.readRing()
+    received += radio.readRing()
+    assert [packet.payload for packet in received] == payloads
+    assert all(packet.status == radio.STATUS_RX_DONE and packet.rssi == -70 for packet in received)
+    assert radio.rxRingStatus() == (0, 0, 40, 0)
+
+def test_ring_batched_read() :
+
+    radio, chip = _ringRadio()
+    for i in range(5) :
+        chip.inject(bytes([i]) * 16)
+        _settle(radio, i + 1)
+    reads = []
+    xfer = chip.xfer
+    def counting(buf) :
+        if buf[0] == 0x1E : reads.append(len(buf))
+        return xfer(buf)
+    chip.xfer = counting
+    packets = radio.readRing()
+    assert len(packets) == 5
+    assert reads == [5 * 16 + 3]
+
+def test_ring_drain_when_almost_full() :
+
+    radio, chip = _ringRadio(maxLength=64)
+    for i in range(6) :
+        chip.inject(bytes([i]) * 60)
+        _settle(radio, i + 1)
+    resident, drained, received, overflow = radio.rxRingStatus()
+    assert drained > 0 and resident + drained == 6 and overflow == 0
+    assert [packet.payload for packet in radio.readRing()] == [bytes([i]) * 60 for i in range(6)]
+
+def test_ring_oversized_packet_counted() :
+
+    radio, chip = _ringRadio(maxLength=32)
+    for i in range(10) :
+        chip.inject(bytes([i]) * 20)
+        _settle(radio, i + 1)
+    # 100 bytes packet in 56 bytes free space overwrite first 44 bytes of resident packets 0, 1, and 2
+    chip.inject(b'B' * 100)
+    _settle(radio, 11)
+    assert radio.rxRingStatus() == (7, 0, 11, 4)
+    chip.inject(b'z' * 5)
+    _settle(radio, 12)
+    assert [packet.payload for packet in radio.readRing()] == [bytes([i]) * 20 for i in range(3, 10)] + [b'z' * 5]
+
+def test_ring_full_drop_newest() :
+
+    radio, chip = _ringRadio(size=3)
+    for i in range(5) :
+        chip.inject(bytes([i]) * 8)
+        _settle(radio, i + 1)
+    assert radio.rxRingStatus() == (3, 0, 5, 2)
+    assert [packet.payload for packet in radio.readRing()] == [bytes([i]) * 8 for i in range(3)]
+
+def test_ring_read_concurrent_with_interrupt() :
+
+    radio, chip = emulated('SX126x', IRQ_PIN, 0.001)
+    radio.setRxRing(256, 32)
+    radio.request(radio.RX_CONTINUOUS)
+    payloads = [bytes([i]) * (8 + i % 16) for i in range(150)]
+    received = []
+    stop = threading.Event()
+    def reader() :
+        while not stop.is_set() :
+            received.extend(radio.readRing())
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i, payload in enumerate(payloads) :
+        chip.inject(payload)
+        _settle(radio, i + 1)
+    stop.set()
+    thread.join()
+    received += radio.readRing()
+    assert [packet.payload for packet in received] == payloads
+
+def test_ring_polling() :
+
+    radio, chip = emulated('SX126x', -1)
+    radio.setRxRing(16, 32)
+    radio.request(radio.RX_CONTINUOUS)
+    for i in range(4) :
+        chip.inject(bytes([i]) * 12)
+        assert radio.wait(1)
+        radio.status()
+    assert [packet.payload for packet in radio.readRing()] == [bytes([i]) * 12 for i in range(4)]
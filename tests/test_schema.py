@@ -0,0 +1,86 @@
+import struct
+import pytest
+from LoRaRF import PayloadSchema
+
+FIELDS = (('gatewayId', 'B'), ('nodeId', 'B'), ('messageId', 'H'), ('time', 'I'), ('data', 'i'))
+
+def _payloads(count: int) -> list :
+    return [struct.pack('<BBHIi', 0xCC, i % 256, i, 1700000000 + i, -i * 1000) for i in range(count)]
+
+def test_pack_unpack_match_struct() :
+
+    schema = PayloadSchema(FIELDS, name='Message')
+    assert schema.format == '<BBHIi'
+    assert schema.size == struct.calcsize('<BBHIi')
+    payload = struct.pack('<BBHIi', 0xCC, 0x77, 5, 1000, -42)
+    assert schema.pack(0xCC, 0x77, 5, 1000, -42) == payload
+    assert schema.pack(gatewayId=0xCC, nodeId=0x77, messageId=5, time=1000, data=-42) == payload
+    message = schema.unpack(payload + b'extra')
+    assert tuple(message) == struct.unpack('<BBHIi', payload)
+    assert message.nodeId == 0x77 and message.data == -42
+
+def test_padding_bytes_and_byte_order() :
+
+    schema = PayloadSchema((('a', 'h'), ('pad', '3x'), ('tag', '4s'), ('v', 'd')), byteOrder='>')
+    payload = schema.pack(-3, b'ab', 1.5)
+    assert payload == struct.pack('>h3x4sd', -3, b'ab', 1.5)
+    assert schema.names == ('a', 'tag', 'v')
+    assert tuple(schema.unpack(payload)) == (-3, b'ab\x00\x00', 1.5)
+
+@pytest.mark.parametrize("fieldFormat", ['3h', 'z', 'ab', ''])
+def test_unsupported_format(fieldFormat) :
+
+    with pytest.raises(ValueError) :
+        PayloadSchema((('field', fieldFormat),))
+
+def test_short_payload_rejected() :
+
+    schema = PayloadSchema(FIELDS)
+    with pytest.raises(ValueError) :
+        schema.unpack(b'\x00' * 4)
+
+def test_unpack_array_match_struct() :
+
+    pytest.importorskip("numpy")
+    schema = PayloadSchema(FIELDS)
+    payloads = _payloads(1000)
+    array = schema.unpackArray(payloads)
+    expected = [struct.unpack('<BBHIi', payload) for payload in payloads]
+    assert [tuple(row) for row in array.tolist()] == expected
+    assert (schema.unpackArray(b''.join(payloads)) == array).all()
+    assert schema.packArray(array) == b''.join(payloads)
+
+def test_unpack_array_iterator() :
+
+    pytest.importorskip("numpy")
+    schema = PayloadSchema(FIELDS)
+    payloads = _payloads(10)
+    array = schema.unpackArray(payload for payload in payloads)
+    assert len(array) == 10
+    assert array['messageId'].tolist() == list(range(10))
+    assert len(schema.unpackArray(iter([]))) == 0
+
+def test_unpack_array_length_check() :
+
+    pytest.importorskip("numpy")
+    schema = PayloadSchema((('a', 'H'),))
+    assert schema.unpackArray([b'\x01\x00\x09', b'\x02\x00'])['a'].tolist() == [1, 2]
+    with pytest.raises(ValueError) :
+        schema.unpackArray([b'\x01\x00\x09', b'\x02'])
+
+def test_pack_array_columns() :
+
+    pytest.importorskip("numpy")
+    schema = PayloadSchema(FIELDS)
+    columns = {'gatewayId': [1, 2], 'nodeId': [3, 4], 'messageId': [5, 6], 'time': [7, 8], 'data': [-1, -2]}
+    assert schema.packArray(columns) == schema.pack(1, 3, 5, 7, -1) + schema.pack(2, 4, 6, 8, -2)
+
+def test_put_get_radio(driver) :
+
+    from conftest import emulated
+    schema = PayloadSchema(FIELDS)
+    radio, chip = emulated(driver)
+    radio.request()
+    chip.inject(schema.pack(1, 2, 3, 4, 5))
+    assert radio.wait(1)
+    assert tuple(schema.get(radio)) == (1, 2, 3, 4, 5)
@@ -0,0 +1,144 @@
+from conftest import emulated, IRQ_PIN
+
+def _registerReads(chip, address: int) -> list :
+
+    # record ReadRegister commands of address sent to emulated chip
+    reads = []
+    xfer = chip.xfer
+    def counting(buf) :
+        if buf[0] == 0x1D and (buf[1] << 8 | buf[2]) == address : reads.append(address)
+        return xfer(buf)
+    chip.xfer = counting
+    return reads
+
+def test_event_mask_never_cached() :
+
+    radio, chip = emulated('SX126x')
+    radio.setRegisterCache(True)
+    reads = _registerReads(chip, radio.REG_EVENT_MASK)
+    radio._fixRxTimeout()
+    radio._fixRxTimeout()
+    assert len(reads) == 2
+    assert radio.readRegister(radio.REG_EVENT_MASK, 1)[0] & 0x02
+
+def test_readinto_fill_buffer() :
+
+    radio, chip = emulated('SX126x')
+    radio.request()
+    chip.inject(b'hello world')
+    assert radio.wait(1)
+    buf = bytearray(5)
+    assert radio.readinto(buf) == 5
+    assert buf == b'hello'
+    view = memoryview(bytearray(16))
+    assert radio.readinto(view) == 6
+    assert view[:6].tobytes() == b' world'
+    assert radio.readinto(buf) == 0
+
+def test_readinto_busy_timeout_short_count() :
+
+    radio, chip = emulated('SX126x')
+    radio.request()
+    chip.inject(b'payload')
+    assert radio.wait(1)
+    radio.busyCheck = lambda timeout = 0 : True
+    buf = bytearray(b'xxxxxxx')
+    assert radio.readinto(buf) == 0
+    assert buf == b'xxxxxxx'
+    assert radio.available() == 7
+
+def _commands(chip, opCode: int) -> list :
+
+    # record commands with opcode sent to emulated chip
+    sent = []
+    xfer = chip.xfer
+    def counting(buf) :
+        if buf[0] == opCode : sent.append(list(buf))
+        return xfer(buf)
+    chip.xfer = counting
+    return sent
+
+def test_image_calibration_skipped_in_same_band() :
+
+    radio, chip = emulated('SX126x')
+    radio.setFrequency(868100000)
+    calibrations = _commands(chip, 0x98)
+    radio.setFrequency(868300000)
+    assert calibrations == []
+    radio.setFrequency(433000000)
+    assert len(calibrations) == 1
+
+def test_dropped_calibration_not_recorded() :
+
+    radio, chip = emulated('SX126x')
+    radio.setFrequency(433000000)
+    busyCheck = radio.busyCheck
+    radio.busyCheck = lambda timeout = 0 : True
+    radio.setFrequency(868100000)
+    radio.busyCheck = busyCheck
+    calibrations = _commands(chip, 0x98)
+    radio.setFrequency(868300000)
+    assert len(calibrations) == 1
+
+def test_modulation_params_invalidate_prepared_tx() :
+
+    radio, chip = emulated('SX126x')
+    prepared = radio.prepareTx()
+    assert prepared.send(b'one')
+    assert radio.wait(1)
+    assert radio._txPrepared is prepared
+    radio.setModulationParamsLoRa(7, radio.BW_500000, radio.CR_4_5, radio.LDRO_OFF)
+    assert radio._txPrepared is None
+    fixes = _commands(chip, 0x0D)
+    assert prepared.send(b'two')
+    assert radio.wait(1)
+    # IRQ, buffer address, and BW 500 workaround register sent again
+    assert any((command[1] << 8 | command[2]) == radio.REG_TX_MODULATION for command in fixes)
+
+def test_prepared_tx_keep_later_setting() :
+
+    radio, chip = emulated('SX126x')
+    prepared = radio.prepareTx()
+    assert prepared.send(b'one')
+    assert radio.wait(1)
+    assert chip._preambleLength == 12
+    assert chip._registers[radio.REG_TX_MODULATION] & 0x04
+    radio.setLoRaPacket(radio.HEADER_EXPLICIT, 20, 10, False)
+    radio.setLoRaModulation(7, radio.BW_500000, radio.CR_4_5)
+    assert prepared.send(b'two')
+    assert radio.wait(1)
+    # packet parameter and workaround register built from current setting, not from prepareTx() time
+    assert chip._preambleLength == 20 and chip._crcType == 0 and chip._payloadLength == 3
+    assert chip._registers[radio.REG_TX_MODULATION] & 0x04 == 0
+    radio.setLoRaModulation(7, radio.BW_125000, radio.CR_4_5)
+    assert prepared.send(b'three')
+    assert radio.wait(1)
+    assert chip._preambleLength == 20
+    assert chip._registers[radio.REG_TX_MODULATION] & 0x04
+
+def test_cad_scanner_activity() :
+
+    radio, chip = emulated('SX126x')
+    channels = [868100000, 868300000, 868500000, 867100000]
+    scanner = radio.cadScanner(channels)
+    assert scanner.activity() == [0.0] * 4
+    chip.setActivity(868300000)
+    chip.setActivity(867100000)
+    cads = _commands(chip, 0xC5)
+    assert scanner.scan(3) == [0, 3, 0, 3]
+    assert len(cads) == 12
+    # activity is ratio of CAD detected to number of scans since created
+    chip.setActivity(867100000, False)
+    chip.setActivity(868100000)
+    assert scanner.scan() == [1, 1, 0, 0]
+    assert scanner.activity() == [0.25, 1.0, 0.0, 0.75]
+    scanner.reset()
+    assert scanner.activity() == [0.0] * 4
+
+def test_cad_scanner_irq() :
+
+    radio, chip = emulated('SX126x', IRQ_PIN, 0.01)
+    scanner = radio.cadScanner([868100000, 868300000])
+    chip.setActivity(868100000)
+    assert scanner.scan(2) == [2, 0]
+    assert scanner.activity() == [1.0, 0.0]
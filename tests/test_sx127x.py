@@ -0,0 +1,83 @@
+import pytest
+from LoRaRF import Metrics
+from conftest import emulated
+
+def _metricsRadio() :
+
+    radio, chip = emulated('SX127x')
+    metrics = Metrics()
+    radio.setMetrics(metrics)
+    return radio, chip, metrics
+
+def test_fifo_write_round_trip() :
+
+    radio, chip = emulated('SX127x')
+    radio.beginPacket()
+    base = radio.readRegister(radio.REG_FIFO_ADDR_PTR)
+    radio.put(b'hello')
+    radio.write([1, 2, 3])
+    radio.write(7)
+    payload = b'hello' + bytes((1, 2, 3, 7))
+    assert bytes(chip.fifo[base:base+len(payload)]) == payload
+    # read back from FIFO with pointer set to TX base address
+    radio.writeRegister(radio.REG_FIFO_ADDR_PTR, base)
+    assert radio.get(5) == b'hello'
+    assert radio.read(3) == (1, 2, 3)
+    assert radio.read() == 7
+
+def test_fifo_receive_round_trip() :
+
+    radio, chip = emulated('SX127x')
+    payload = bytes(range(255))
+    radio.request()
+    chip.inject(payload)
+    assert radio.wait(1)
+    assert radio.available() == 255
+    assert radio.get(100) == payload[:100]
+    assert radio.read(55) == tuple(payload[100:155])
+    assert radio.get(radio.available()) == payload[155:]
+
+def test_fifo_burst_single_transfer() :
+
+    radio, chip, metrics = _metricsRadio()
+    radio.put(bytes(200))
+    radio.write(list(range(50)))
+    data = metrics.asDict()
+    # FIFO write address with write bit, one transfer per call with address byte
+    assert data['spi_transfers'] == {'0x80': 2}
+    assert data['spi_bytes'] == {'0x80': 252}
+    metrics.reset()
+    radio.get(200)
+    assert metrics.asDict()['spi_transfers'] == {'0x00': 1}
+    assert metrics.asDict()['spi_bytes'] == {'0x00': 201}
+
+def test_register_burst_auto_increment() :
+
+    radio, chip, metrics = _metricsRadio()
+    radio.writeRegisterBurst(radio.REG_FRF_MSB, [0xD9, 0x06, 0x8B])
+    assert metrics.asDict()['spi_transfers'] == {'0x86': 1}
+    assert [radio.readRegister(radio.REG_FRF_MSB + i) for i in range(3)] == [0xD9, 0x06, 0x8B]
+    metrics.reset()
+    assert radio.readRegisterBurst(radio.REG_FRF_MSB, 3) == [0xD9, 0x06, 0x8B]
+    assert metrics.asDict()['spi_transfers'] == {'0x06': 1}
+    # empty burst send no transfer
+    metrics.reset()
+    radio.writeRegisterBurst(radio.REG_FIFO, b'')
+    assert radio.readRegisterBurst(radio.REG_FIFO, 0) == []
+    assert metrics.asDict() == {}
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_write_bits_skip_unchanged(cache) :
+
+    radio, chip, metrics = _metricsRadio()
+    radio.setRegisterCache(cache)
+    address = radio.REG_MODEM_CONFIG_2
+    value = radio.readRegister(address)
+    label = '0x%02x' % (address | 0x80)
+    # writing same bits again must not send register write
+    radio.writeBits(address, (value >> 2) & 0x01, 2, 1)
+    radio.writeBits(address, (value >> 2) & 0x01, 2, 1)
+    assert label not in metrics.asDict().get('spi_transfers', {})
+    radio.writeBits(address, ~(value >> 2) & 0x01, 2, 1)
+    assert metrics.asDict()['spi_transfers'][label] == 1
+    assert radio.readRegister(address) == value ^ 0x04
@@ -0,0 +1,52 @@
+from LoRaRF import TraceRecorder, TraceReader, TraceReplay
+from LoRaRF.trace import TRACE_XFER
+from conftest import DRIVERS
+
+def _session(radio, chip = None) -> bytes :
+
+    # transmit then receive one packet, payload injected only while recording
+    radio.beginPacket()
+    radio.put(b'ping')
+    radio.endPacket()
+    assert radio.wait(1)
+    radio.request()
+    if chip is not None : chip.inject(b'pong')
+    assert radio.wait(1)
+    return radio.get(radio.available())
+
+def test_record_replay_round_trip(driver, tmp_path) :
+
+    Driver, Emulator, pin = DRIVERS[driver]
+    path = str(tmp_path / "session.lrft")
+    chip = Emulator(timeScale=0)
+    recorder = TraceRecorder(chip, path)
+    radio = Driver(recorder)
+    assert radio.begin()
+    assert _session(radio, chip) == b'pong'
+    recorder.close()
+    recorder.cleanup()
+
+    replay = TraceReplay(path)
+    radio = Driver(replay)
+    assert radio.begin()
+    assert _session(radio) == b'pong'
+    assert replay.mismatches == 0 and replay.exhausted == 0
+    replay.cleanup()
+
+def test_reader_close_with_records_alive(driver, tmp_path) :
+
+    Driver, Emulator, pin = DRIVERS[driver]
+    path = str(tmp_path / "session.lrft")
+    recorder = TraceRecorder(Emulator(timeScale=0), path)
+    assert Driver(recorder).begin()
+    recorder.cleanup()
+
+    reader = TraceReader(path)
+    records = list(reader)
+    assert len(records) == len(reader) > 0
+    transfer = next(record for record in records if record.type == TRACE_XFER)
+    assert len(transfer.tx) == len(transfer.rx)
+    # records still valid after reader closed
+    tx = bytes(transfer.tx)
+    reader.close()
+    assert transfer.tx == tx and len(transfer.rx) == len(tx)